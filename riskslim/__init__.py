@@ -1,3 +1,7 @@
 from .coefficient_set import CoefficientSet
-from .lattice_cpa import run_lattice_cpa, setup_lattice_cpa, finish_lattice_cpa
+from .lattice_cpa import run_lattice_cpa, setup_lattice_cpa, finish_lattice_cpa, resume_lattice_cpa
+from .regularization_path import run_c0_path, run_L0_path, get_path_table
+from .cross_validation import run_cross_validation
+from .grid_search import run_grid_search
+from .mapped_data import convert_csv_to_mmap, load_data_from_mmap
 from .utils import load_data_from_csv, print_model
\ No newline at end of file
@@ -1,8 +1,10 @@
 import numpy as np
 
 
-def chained_updates(bounds, C_0_nnz, new_objval_at_feasible = None, new_objval_at_relaxation = None, MAX_CHAIN_COUNT = 20):
+def chained_updates(bounds, C_0_nnz, new_objval_at_feasible = None, new_objval_at_relaxation = None, MAX_CHAIN_COUNT = 20, loss_bounds_by_L0 = None):
 
+    # loss_bounds_by_L0 = (loss_min_by_L0, loss_max_by_L0) from get_loss_bounds_by_L0 (optional)
+    # if provided, loss_min and loss_max are tightened whenever L0_max is reduced
     new_bounds = dict(bounds)
 
     # update objval_min using new_value (only done once)
@@ -66,6 +68,17 @@ def chained_updates(bounds, C_0_nnz, new_objval_at_feasible = None, new_objval_a
                 new_bounds['L0_max'] = proposed_L0_max
                 improved_bounds = True
 
+        # loss_min, loss_max when at most L0_max coefficients are non-zero
+        if loss_bounds_by_L0 is not None:
+            loss_min_by_L0, loss_max_by_L0 = loss_bounds_by_L0
+            L0_idx = int(min(new_bounds['L0_max'], len(loss_min_by_L0) - 1))
+            if loss_min_by_L0[L0_idx] > new_bounds['loss_min']:
+                new_bounds['loss_min'] = loss_min_by_L0[L0_idx]
+                improved_bounds = True
+            if loss_max_by_L0[L0_idx] < new_bounds['loss_max']:
+                new_bounds['loss_max'] = loss_max_by_L0[L0_idx]
+                improved_bounds = True
+
         # objval_max = min(objval_max, loss_max + penalty_max)
         proposed_objval_max = new_bounds['loss_max'] + L0_penalty_max
         if proposed_objval_max < new_bounds['objval_max']:
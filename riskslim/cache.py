@@ -0,0 +1,193 @@
+from collections import OrderedDict
+import numpy as np
+import scipy.sparse as sp
+from .heuristics import _add_scaled_column
+
+
+class ScoreCache(object):
+    """
+    Bounded LRU cache of score vectors (scores = Z.dot(rho)) keyed on integer coefficient vectors.
+
+    ScoreCache is shared by the heuristics in the PolishAndRoundCallback. On a miss, the scores are derived from the
+    cached solution that differs from rho in the fewest coordinates using a sparse column update, which avoids
+    computing a full N x P matrix-vector product when the solutions are close.
+    """
+
+    def __init__(self, Z, max_size = 100, max_update_dims = None):
+        """
+        Parameters
+        ----------
+        Z:                      N x P data matrix computed as X * Y
+        max_size:               max # of score vectors to store
+        max_update_dims:        max # of coordinates that can differ from the nearest cached solution for a sparse update
+                                (default is P // 2; solutions that differ in more coordinates are computed from scratch)
+        """
+        assert max_size >= 1
+        N, P = Z.shape
+        self._Z = Z
+        self._N = int(N)
+        self._P = int(P)
+        self._max_size = int(max_size)
+        self._max_update_dims = max(1, self._P // 2) if max_update_dims is None else int(max_update_dims)
+
+        # scores for integer data are integers, so we snap scores passed by other heuristics to remove roundoff error
+        # other matrix types are treated as real-valued unless they report integer entries through Z.is_integer
+        if isinstance(Z, np.ndarray):
+            self._integer_data = np.array_equal(Z, np.round(Z))
+        elif sp.issparse(Z):
+            self._integer_data = np.array_equal(Z.data, np.round(Z.data))
+        else:
+            self._integer_data = bool(getattr(Z, 'is_integer', False))
+
+        # entries map the bytes of rho -> slot in self._solutions / self._scores
+        self._entries = OrderedDict()
+        self._solutions = np.empty(shape = (self._max_size, self._P), dtype = np.int_)
+        self._scores = [None] * self._max_size
+
+        self.n_hits = 0
+        self.n_misses = 0
+        self.n_updates = 0
+
+
+    def __len__(self):
+        return len(self._entries)
+
+
+    @property
+    def max_size(self):
+        return self._max_size
+
+
+    @property
+    def nbytes(self):
+        return self._solutions.nbytes + sum(s.nbytes for s in self._scores if s is not None)
+
+
+    def get_scores(self, rho):
+        """
+        returns scores = Z.dot(rho) for an integer coefficient vector rho (the array is read-only)
+        """
+        rho_int = np.require(rho, dtype = np.int_)
+        key = rho_int.tobytes()
+        if key in self._entries:
+            self.n_hits += 1
+            self._entries.move_to_end(key)
+            return self._scores[self._entries[key]]
+
+        self.n_misses += 1
+        scores = None
+        n_cached = len(self._entries)
+        if n_cached > 0:
+            n_diff = np.count_nonzero(self._solutions[0:n_cached] != rho_int, axis = 1)
+            nearest = np.argmin(n_diff)
+            if n_diff[nearest] <= self._max_update_dims:
+                diff_idx = np.flatnonzero(self._solutions[nearest] != rho_int)
+                step = (rho_int[diff_idx] - self._solutions[nearest, diff_idx]).astype(np.float_)
+                scores = np.array(self._scores[nearest])
+                for j, step_j in zip(diff_idx, step):
+                    _add_scaled_column(scores, self._Z, j, step_j)
+                self.n_updates += 1
+
+        if scores is None:
+            scores = self._Z.dot(np.require(rho_int, dtype = np.float_))
+
+        return self._store(key, rho_int, scores)
+
+
+    def put(self, rho, scores):
+        """
+        stores scores = Z.dot(rho) for an integer coefficient vector rho that were computed elsewhere
+        """
+        rho_int = np.require(rho, dtype = np.int_)
+        key = rho_int.tobytes()
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return
+        if self._integer_data:
+            scores = np.round(scores)
+        self._store(key, rho_int, np.array(scores, dtype = np.float_))
+
+
+    def _store(self, key, rho_int, scores):
+        if len(self._entries) < self._max_size:
+            slot = len(self._entries)
+        else:
+            _, slot = self._entries.popitem(last = False)
+
+        scores.setflags(write = False)
+        self._entries[key] = slot
+        self._solutions[slot] = rho_int
+        self._scores[slot] = scores
+        return scores
+
+
+class LossCutCache(object):
+    """
+    Bounded LRU cache of loss cuts (loss value and loss slope) keyed on integer coefficient vectors.
+
+    LossCutCache is used by the LossCallback so that cuts at integer solutions that are reported multiple times are
+    not recomputed. Entries are evicted in LRU order once the memory used by the cache exceeds max_memory.
+    """
+
+    def __init__(self, max_memory = 100.0):
+        """
+        Parameters
+        ----------
+        max_memory:             max memory (in MB) used to store loss cuts
+        """
+        assert max_memory > 0.0
+        self._max_bytes = int(max_memory * 2**20)
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self.n_hits = 0
+        self.n_misses = 0
+        self.n_evictions = 0
+
+
+    def __len__(self):
+        return len(self._entries)
+
+
+    def __contains__(self, rho):
+        return self._key(rho) in self._entries
+
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+
+    @staticmethod
+    def _key(rho):
+        return np.require(rho, dtype = np.int_).tobytes()
+
+
+    def get(self, rho):
+        """
+        returns (loss_value, loss_slope) at rho if the cut is stored, and None otherwise
+        """
+        key = self._key(rho)
+        cut = self._entries.get(key)
+        if cut is None:
+            self.n_misses += 1
+        else:
+            self.n_hits += 1
+            self._entries.move_to_end(key)
+        return cut
+
+
+    def put(self, rho, loss_value, loss_slope):
+        key = self._key(rho)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return
+
+        loss_slope = np.array(loss_slope, dtype = np.float_)
+        loss_slope.setflags(write = False)
+        self._entries[key] = (float(loss_value), loss_slope)
+        self._nbytes += len(key) + loss_slope.nbytes
+
+        while self._nbytes > self._max_bytes and len(self._entries) > 1:
+            old_key, (_, old_slope) = self._entries.popitem(last = False)
+            self._nbytes -= len(old_key) + old_slope.nbytes
+            self.n_evictions += 1
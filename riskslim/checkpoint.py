@@ -0,0 +1,101 @@
+import os
+from pathlib import Path
+import numpy as np
+
+# bounds stored in each checkpoint
+CHECKPOINT_BOUND_NAMES = ('objval_min', 'objval_max', 'loss_min', 'loss_max', 'L0_min', 'L0_max')
+
+
+def get_dense_cut(cut, cut_idx):
+    """
+    converts a cut over the loss and rho variables into a dense vector of coefficients
+
+    Parameters
+    ----------
+    cut                 cut stored as [indices, coefficients] or as a cplex.SparsePair
+    cut_idx             indices of the loss and rho variables in the MIP
+
+    Returns
+    -------
+    numpy.array of coefficients with shape = (len(cut_idx),) such that coefs[k] is the coefficient of cut_idx[k]
+    """
+    if hasattr(cut, 'ind'):
+        ind, val = cut.ind, cut.val
+    else:
+        ind, val = cut
+
+    position = {j: k for k, j in enumerate(cut_idx)}
+    coefs = np.zeros(len(cut_idx))
+    for j, v in zip(ind, val):
+        coefs[position[j]] = v
+    return coefs
+
+
+def save_checkpoint(checkpoint_file, c0_value, cut_coefs, cut_rhs, pool_objvals, pool_solutions, bounds, lowerbound = 0.0):
+    """
+    saves the state of LCPA to a file that can be loaded with load_checkpoint
+    the file is written to a temporary file and then renamed so that an interrupted save never corrupts a checkpoint
+
+    Parameters
+    ----------
+    checkpoint_file     path of the checkpoint file
+    c0_value            L0 penalty of the problem (used to check that we resume the same problem)
+    cut_coefs           K x (P + 1) array of coefficients for the loss and rho variables in each cut
+    cut_rhs             K x 1 vector with the right hand side of each cut (cuts have the form cut_coefs[k] * x >= cut_rhs[k])
+    pool_objvals        objective values of feasible solutions (e.g. incumbent, heuristic solutions)
+    pool_solutions      M x P array of feasible solutions
+    bounds              dictionary of bounds with the fields in CHECKPOINT_BOUND_NAMES
+    lowerbound          lower bound on the optimal objective value
+
+    Returns
+    -------
+    Path of the checkpoint file
+    """
+    checkpoint_file = Path(checkpoint_file)
+    P = np.shape(pool_solutions)[1]
+    tmp_file = checkpoint_file.with_name('%s.%d.tmp' % (checkpoint_file.name, os.getpid()))
+    with open(tmp_file, 'wb') as f:
+        np.savez(f,
+                 c0_value = float(c0_value),
+                 cut_coefs = np.reshape(np.array(cut_coefs, dtype = np.float_), (-1, P + 1)),
+                 cut_rhs = np.array(cut_rhs, dtype = np.float_).flatten(),
+                 pool_objvals = np.array(pool_objvals, dtype = np.float_).flatten(),
+                 pool_solutions = np.reshape(np.array(pool_solutions, dtype = np.float_), (-1, P)),
+                 bounds = np.array([bounds[k] for k in CHECKPOINT_BOUND_NAMES], dtype = np.float_),
+                 lowerbound = float(lowerbound))
+    os.replace(tmp_file, checkpoint_file)
+    return checkpoint_file
+
+
+def load_checkpoint(checkpoint_file):
+    """
+    loads a checkpoint created with save_checkpoint
+
+    Parameters
+    ----------
+    checkpoint_file     path of the checkpoint file
+
+    Returns
+    -------
+    dictionary with the fields:
+
+     - 'c0_value' L0 penalty of the problem
+     - 'cut_coefs' K x (P + 1) array of cut coefficients for the loss and rho variables
+     - 'cut_rhs' K x 1 vector with the right hand side of each cut
+     - 'pool_objvals' objective values of feasible solutions
+     - 'pool_solutions' M x P array of feasible solutions
+     - 'bounds' dictionary of bounds
+     - 'lowerbound' lower bound on the optimal objective value
+    """
+    checkpoint_file = Path(checkpoint_file)
+    if not checkpoint_file.exists():
+        raise IOError('could not find checkpoint_file: %s' % checkpoint_file)
+
+    with np.load(checkpoint_file) as f:
+        checkpoint = {k: f[k] for k in f.files}
+
+    for k in ('c0_value', 'lowerbound'):
+        checkpoint[k] = float(checkpoint[k])
+
+    checkpoint['bounds'] = {k: float(v) for k, v in zip(CHECKPOINT_BOUND_NAMES, checkpoint['bounds'])}
+    return checkpoint
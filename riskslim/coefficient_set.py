@@ -1,4 +1,5 @@
 import numpy as np
+import scipy.sparse as sp
 from prettytable import PrettyTable
 from .defaults import INTERCEPT_NAME
 
@@ -153,9 +154,23 @@ class CoefficientSet(object):
             max_L0_value = min(trivial_L0_max, max_L0_value)
 
         # update intercept bounds
-        Z = X * y
-        Z_min = np.min(Z, axis = 0)
-        Z_max = np.max(Z, axis = 0)
+        if sp.issparse(X):
+            Z = sp.csc_matrix(X.multiply(y))
+            Z_min = Z.min(axis = 0).toarray().flatten()
+            Z_max = Z.max(axis = 0).toarray().flatten()
+        elif isinstance(X, np.memmap):
+            # memory-mapped data is processed in blocks of rows
+            block_size = max(1, 2**20 // X.shape[1])
+            Z_min = np.repeat(np.inf, X.shape[1])
+            Z_max = np.repeat(-np.inf, X.shape[1])
+            for i in range(0, X.shape[0], block_size):
+                Z_block = X[i:i + block_size] * y[i:i + block_size]
+                Z_min = np.minimum(Z_min, np.min(Z_block, axis = 0))
+                Z_max = np.maximum(Z_max, np.max(Z_block, axis = 0))
+        else:
+            Z = X * y
+            Z_min = np.min(Z, axis = 0)
+            Z_max = np.max(Z, axis = 0)
 
         # get regularized indices
         L0_reg_ind = np.isnan(self.C_0j)[variable_idx]
@@ -0,0 +1,184 @@
+import time
+import multiprocessing as mp
+import numpy as np
+import pandas as pd
+from .defaults import DEFAULT_LCPA_SETTINGS
+from .lattice_cpa import run_lattice_cpa
+from .parallel import SHARED_DATA_FIELDS, attach_shared_data, release_shared_data, share_data, split_core_budget
+from .utils import print_log, validate_settings
+
+# state of each worker process (set by _init_fold_worker)
+_worker = {}
+
+
+def get_auc(scores, Y, sample_weights = None):
+    """
+    returns the area under the ROC curve for real-valued scores
+
+    each pair of a positive and a negative sample is weighted by the product of their sample weights, and pairs with
+    tied scores count as half-correct
+
+    Parameters
+    ----------
+    scores              N x 1 vector of scores
+    Y                   N x 1 vector of labels (+1/-1)
+    sample_weights      N x 1 vector of sample weights (optional)
+
+    Returns
+    -------
+    AUC (nan if Y only contains one class)
+    """
+    scores = np.asarray(scores, dtype = np.float_).flatten()
+    pos_ind = np.asarray(Y).flatten() == 1
+    if sample_weights is None:
+        sample_weights = np.ones(len(scores))
+    sample_weights = np.asarray(sample_weights, dtype = np.float_).flatten()
+
+    # total weight of positive / negative samples with each distinct score
+    _, score_idx = np.unique(scores, return_inverse = True)
+    pos_weights = np.bincount(score_idx, weights = sample_weights * pos_ind)
+    neg_weights = np.bincount(score_idx, weights = sample_weights * ~pos_ind)
+    total_pos, total_neg = np.sum(pos_weights), np.sum(neg_weights)
+    if total_pos == 0.0 or total_neg == 0.0:
+        return float('nan')
+
+    neg_weights_below = np.cumsum(neg_weights) - neg_weights
+    return float(np.sum(pos_weights * (neg_weights_below + 0.5 * neg_weights)) / (total_pos * total_neg))
+
+
+def get_fold_metrics(rho, X, Y, sample_weights):
+    """
+    returns the weighted logistic loss, AUC and error of a linear model on a dataset
+
+    Parameters
+    ----------
+    rho                 P x 1 vector of coefficients
+    X                   N x P matrix of features
+    Y                   N x 1 vector of labels (+1/-1)
+    sample_weights      N x 1 vector of sample weights
+
+    Returns
+    -------
+    loss, auc, error
+    """
+    Y = np.asarray(Y).flatten()
+    sample_weights = np.asarray(sample_weights).flatten()
+    scores = X.dot(rho)
+    margins = Y * scores
+    loss = float(np.average(np.logaddexp(0.0, -margins), weights = sample_weights))
+    error = float(np.average(margins <= 0.0, weights = sample_weights))
+    return loss, get_auc(scores, Y, sample_weights), error
+
+
+def _init_fold_worker(specs, fold_idx, constraints, settings):
+    _worker['blocks'], _worker['data'] = attach_shared_data(specs)
+    _worker['fold_idx'] = fold_idx
+    _worker['constraints'] = constraints
+    _worker['settings'] = settings
+
+
+def _run_fold(fold_num):
+
+    data = _worker['data']
+    fold_idx = _worker['fold_idx']
+    train_idx = fold_idx != fold_num
+    test_idx = ~train_idx
+
+    fold_data = {k: v for k, v in data.items() if k not in SHARED_DATA_FIELDS}
+    for field in SHARED_DATA_FIELDS:
+        fold_data[field] = data[field][train_idx]
+
+    start_time = time.time()
+    model_info, _, lcpa_info = run_lattice_cpa(fold_data, _worker['constraints'], _worker['settings'])
+    total_time = time.time() - start_time
+
+    rho = model_info['solution']
+    train_loss, train_auc, train_error = get_fold_metrics(rho, fold_data['X'], fold_data['Y'], fold_data['sample_weights'])
+    test_loss, test_auc, test_error = get_fold_metrics(rho, data['X'][test_idx], data['Y'][test_idx], data['sample_weights'][test_idx])
+
+    return {
+        'fold': int(fold_num),
+        'n_train': int(np.count_nonzero(train_idx)),
+        'n_test': int(np.count_nonzero(test_idx)),
+        'train_loss': train_loss,
+        'test_loss': test_loss,
+        'train_auc': train_auc,
+        'test_auc': test_auc,
+        'train_error': train_error,
+        'test_error': test_error,
+        'objective_value': model_info['objective_value'],
+        'optimality_gap': model_info['optimality_gap'],
+        'run_time': model_info['run_time'],
+        'total_time': total_time,
+        'nodes_processed': model_info['nodes_processed'],
+        'cplex_status': lcpa_info['cplex_status'],
+        'solution': rho,
+        }
+
+
+def run_cross_validation(data, constraints, fold_idx, settings = DEFAULT_LCPA_SETTINGS, n_cores = None, n_workers = None, mp_context = None):
+    """
+    trains a RiskSLIM model for each fold of K-fold cross validation in a pool of worker processes
+
+    the data is loaded once and the arrays in data are shared with the worker processes using shared memory.
+    the number of CPLEX threads in each worker is set so that all workers use at most n_cores cores.
+
+    Parameters
+    ----------
+    data, dict containing training data should pass check_data (X must be a dense numpy.ndarray)
+    constraints, dict containing 'L0_min, L0_max, CoefficientSet'
+    fold_idx, N x 1 vector with the fold of each sample (integers between 1 to K, see load_fold_indices)
+    settings, LCPA settings (settings['cplex_n_cores'] is set by the core budget)
+    n_cores, max # of cores used by all workers (None = all cores)
+    n_workers, # of worker processes (None = min(K, n_cores))
+    mp_context, multiprocessing start method (None = default start method)
+
+    Returns
+    -------
+    cv_info, dict with the fields:
+
+     - 'folds' pandas.DataFrame with the training/test loss, AUC, error and runtime of the model for each fold
+     - 'mean_test_loss', 'std_test_loss', 'mean_test_auc', 'std_test_auc', 'mean_test_error', 'std_test_error'
+     - 'total_run_time' time spent running LCPA summed over all folds
+     - 'wall_time' time to run all folds
+     - 'n_workers', 'n_cores_per_worker'
+    """
+    settings = validate_settings(settings, default_settings = DEFAULT_LCPA_SETTINGS)
+
+    fold_idx = np.asarray(fold_idx, dtype = int).flatten()
+    N = data['X'].shape[0]
+    assert len(fold_idx) == N, "dimension mismatch: read %r fold indices (expected N = %r)" % (len(fold_idx), N)
+    fold_nums = np.sort(np.unique(fold_idx))
+    K = len(fold_nums)
+    assert np.all(fold_nums == np.arange(1, K + 1)), "folds should contain indices between 1 to %r" % K
+
+    # split the core budget between workers
+    n_workers, n_cores_per_worker = split_core_budget(settings, n_tasks = K, n_cores = n_cores, n_workers = n_workers)
+
+    print_log('running %d-fold cross validation with %d workers (%d cores per worker)' % (K, n_workers, n_cores_per_worker))
+    start_time = time.time()
+    blocks, specs = share_data(data)
+    try:
+        ctx = mp.get_context(mp_context)
+        with ctx.Pool(processes = n_workers,
+                      initializer = _init_fold_worker,
+                      initargs = (specs, fold_idx, constraints, settings)) as pool:
+            fold_results = pool.map(_run_fold, fold_nums.tolist(), chunksize = 1)
+    finally:
+        release_shared_data(blocks)
+    wall_time = time.time() - start_time
+
+    folds = pd.DataFrame(fold_results)
+    cv_info = {
+        'folds': folds,
+        'total_run_time': float(folds['total_time'].sum()),
+        'wall_time': wall_time,
+        'n_workers': n_workers,
+        'n_cores_per_worker': n_cores_per_worker,
+        }
+
+    for metric in ('test_loss', 'test_auc', 'test_error'):
+        cv_info['mean_%s' % metric] = float(folds[metric].mean())
+        cv_info['std_%s' % metric] = float(folds[metric].std())
+
+    return cv_info
@@ -0,0 +1,149 @@
+import os
+import hashlib
+from contextlib import contextmanager
+from pathlib import Path
+import numpy as np
+import scipy.sparse as sp
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# each pool is stored as a compressed .npz file named after the fingerprint of the data
+# cuts have the form cut_coefs[k] * [loss, rho] >= cut_rhs[k] and are valid for any problem on the same data
+CUT_POOL_FILE_SUFFIX = '.cuts.npz'
+
+
+def get_data_fingerprint(data, w_pos = 1.0, block_size = 100000):
+    """
+    returns a hash that identifies the loss function of a dataset
+
+    two datasets have the same fingerprint if they have the same variable names, features, labels, sample weights,
+    and w_pos. large dense / memory-mapped feature matrices are hashed a block of rows at a time.
+
+    Parameters
+    ----------
+    data                dictionary containing training data (see check_data)
+    w_pos               relative weight on examples with y = +1
+    block_size          number of rows hashed at a time
+
+    Returns
+    -------
+    hexadecimal string
+    """
+    h = hashlib.sha1()
+    h.update('\n'.join(data['variable_names']).encode('utf-8'))
+    h.update(np.float64(w_pos).tobytes())
+
+    X = data['X']
+    h.update(np.array(X.shape, dtype = np.int64).tobytes())
+    if sp.issparse(X):
+        X = X.tocsr()
+        X.sort_indices()
+        for part in (X.data, X.indices, X.indptr):
+            h.update(np.ascontiguousarray(part, dtype = np.float64).tobytes())
+    else:
+        for start in range(0, X.shape[0], block_size):
+            h.update(np.ascontiguousarray(X[start:start + block_size], dtype = np.float64).tobytes())
+
+    h.update(np.ascontiguousarray(data['Y'], dtype = np.float64).tobytes())
+    if data.get('sample_weights') is not None:
+        h.update(np.ascontiguousarray(data['sample_weights'], dtype = np.float64).tobytes())
+
+    return h.hexdigest()
+
+
+def get_cut_pool_file(cut_pool_dir, fingerprint):
+    return Path(cut_pool_dir) / (fingerprint + CUT_POOL_FILE_SUFFIX)
+
+
+@contextmanager
+def _locked_cut_pool(cut_pool_file):
+    """
+    holds an exclusive lock on cut_pool_file so that processes that update the same pool do not drop each other's cuts
+    (no-op on platforms without fcntl)
+    """
+    with open(str(cut_pool_file) + '.lock', 'a') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def load_cut_pool(cut_pool_dir, fingerprint):
+    """
+    loads the cuts stored for the data with the given fingerprint
+
+    Parameters
+    ----------
+    cut_pool_dir        directory containing cut pools
+    fingerprint         fingerprint of the data (see get_data_fingerprint)
+
+    Returns
+    -------
+    cut_coefs           K x (P + 1) array of coefficients for the loss and rho variables in each cut
+    cut_rhs             K x 1 vector with the right hand side of each cut
+    returns (None, None) if there are no cuts for the data
+    """
+    cut_pool_file = get_cut_pool_file(cut_pool_dir, fingerprint)
+    if not cut_pool_file.exists():
+        return None, None
+
+    with np.load(cut_pool_file) as f:
+        cut_coefs, cut_rhs = f['cut_coefs'], f['cut_rhs']
+
+    return cut_coefs, cut_rhs
+
+
+def append_to_cut_pool(cut_pool_dir, fingerprint, cut_coefs, cut_rhs, max_cuts = None):
+    """
+    adds cuts to the pool for the data with the given fingerprint
+
+    duplicate cuts are dropped. if the pool has more than max_cuts cuts, the oldest cuts are dropped.
+    the pool is written to a temporary file and then renamed so that other processes never read a partial pool, and
+    the pool is locked while it is updated so that processes that finish at the same time do not drop each other's cuts.
+
+    Parameters
+    ----------
+    cut_pool_dir        directory containing cut pools (created if it does not exist)
+    fingerprint         fingerprint of the data (see get_data_fingerprint)
+    cut_coefs           K x (P + 1) array of coefficients for the loss and rho variables in each cut
+    cut_rhs             K x 1 vector with the right hand side of each cut
+    max_cuts            max # of cuts stored in the pool (None = no limit)
+
+    Returns
+    -------
+    number of cuts in the pool
+    """
+    cut_rhs = np.array(cut_rhs, dtype = np.float64).flatten()
+    cut_coefs = np.reshape(np.array(cut_coefs, dtype = np.float64), (len(cut_rhs), -1))
+
+    cut_pool_dir = Path(cut_pool_dir)
+    cut_pool_dir.mkdir(parents = True, exist_ok = True)
+    cut_pool_file = get_cut_pool_file(cut_pool_dir, fingerprint)
+
+    with _locked_cut_pool(cut_pool_file):
+
+        old_coefs, old_rhs = load_cut_pool(cut_pool_dir, fingerprint)
+        if old_coefs is not None:
+            assert old_coefs.shape[1] == cut_coefs.shape[1], 'cut pool was created for a different problem'
+            cut_coefs = np.vstack([old_coefs, cut_coefs])
+            cut_rhs = np.concatenate([old_rhs, cut_rhs])
+
+        # drop duplicates and keep cuts in the order they were added
+        cuts = np.column_stack([cut_coefs, cut_rhs])
+        _, keep_idx = np.unique(cuts, axis = 0, return_index = True)
+        keep_idx = np.sort(keep_idx)
+        if max_cuts is not None and len(keep_idx) > max_cuts:
+            keep_idx = keep_idx[-int(max_cuts):] if max_cuts > 0 else keep_idx[:0]
+
+        tmp_file = cut_pool_dir / ('%s.%d.tmp' % (cut_pool_file.name, os.getpid()))
+        with open(tmp_file, 'wb') as f:
+            np.savez_compressed(f, cut_coefs = cut_coefs[keep_idx], cut_rhs = cut_rhs[keep_idx])
+        os.replace(tmp_file, cut_pool_file)
+
+    return len(keep_idx)
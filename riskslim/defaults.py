@@ -18,14 +18,28 @@ DEFAULT_LCPA_SETTINGS = {
     'max_runtime': 300.0,  # max runtime for LCPA
     'max_tolerance': 0.000001,  # tolerance to stop LCPA
     'display_cplex_progress': True,  # setting to True shows CPLEX progress
-    'loss_computation': 'normal',  # type of loss computation to use ('normal','fast','lookup')
+    'loss_computation': 'normal',  # type of loss computation to use ('normal','fast','lookup','binary','mixed','interpolated')
+    'compress_rows': False,  # collapse duplicate rows of the data into unique rows with multiplicity weights
+    'loss_n_threads': 1,  # threads used by the fast loss computation (1 = serial, 0 = all cores)
+    'loss_deterministic': True,  # multi-threaded loss values do not depend on the number of threads
+    'loss_block_size': 0,  # rows of the data processed at a time by the loss computation (0 = all rows)
+    'loss_interpolation_error': 1e-6,  # max error of the interpolated loss used by heuristics ('interpolated' only)
+    'loss_integer_lookup': False,  # store integer data as int8/int16 and compute integer scores ('lookup' only; turns off compiled polishing and preallocated cut buffers)
+    'lookup_table_cache_dir': None,  # directory of memory-mapped lookup tables shared across runs (None = no cache)
     'chained_updates_flag': True,  # use chained updates
+    'loss_bounds_by_L0_flag': True,  # tighten loss_min/loss_max whenever chained updates reduce L0_max (bounds are computed the first time L0_max is reduced)
     'initialization_flag': False,  # use initialization procedure
     'initial_bound_updates': True, # update bounds before solving
     'add_cuts_at_heuristic_solutions': True, #add cuts at integer feasible solutions found using polishing/rounding
+    'checkpoint_file': None,  # file used to save cuts, solutions and bounds so that LCPA can be resumed (None = off)
+    'checkpoint_interval': 300.0,  # min time between checkpoints
+    'cut_pool_dir': None,  # directory of loss cuts shared by runs on the same data (None = off)
+    'cut_pool_max_cuts': 10000,  # max # of cuts stored for each dataset (oldest cuts are dropped first)
+    'record_loss_cuts': False,  # return all loss cuts in mip_info['loss_cuts'] so they can warm start related problems
     #
     #  LCPA Rounding Heuristic
     'round_flag': True,  # round continuous solutions with SeqRd
+    'rounding_method': 'batch',  # implementation of SeqRd ('standard', 'batch')
     'polish_rounded_solutions': True,  # polish solutions rounded with SeqRd using DCD
     'rounding_tolerance': float('inf'),  # only solutions with objective value < (1 + tol) are rounded
     'rounding_start_cuts': 0,  # cuts needed to start using rounding heuristic
@@ -35,6 +49,9 @@ DEFAULT_LCPA_SETTINGS = {
     #
     # LCPA Polishing Heuristic
     'polish_flag': True,  # polish integer feasible solutions with DCD
+    'polishing_method': 'compiled',  # implementation of DCD ('standard', 'compiled')
+    'score_cache_size': 10,  # max # of score vectors shared by SeqRd/DCD (set to 0 to turn off)
+    'heuristic_n_workers': 0,  # worker processes that run SeqRd/DCD without blocking the heuristic callback (0 = run them in the callback)
     'polishing_tolerance': 0.1, # only solutions with objective value (1 + polishing_ub_to_objval_relgap) are polished. setting to
     'polishing_max_runtime': 10.0,  # max time to run polishing each time
     'polishing_max_solutions': 5.0,  # max # of solutions to polish each time
@@ -45,6 +62,7 @@ DEFAULT_LCPA_SETTINGS = {
     #
     #  Internal Parameters
     'purge_loss_cuts': False,
+    'loss_cut_cache_max_memory': 100.0,  # max memory (MB) used to memoize loss cuts at integer solutions (set to 0 to turn off)
     'purge_bound_cuts': False,
     }
 
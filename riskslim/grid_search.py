@@ -0,0 +1,210 @@
+import time
+import itertools
+import tempfile
+import multiprocessing as mp
+import numpy as np
+import pandas as pd
+from .coefficient_set import CoefficientSet
+from .defaults import DEFAULT_LCPA_SETTINGS
+from .lattice_cpa import setup_lattice_cpa, finish_lattice_cpa
+from .parallel import attach_shared_data, release_shared_data, share_data, split_core_budget
+from .regularization_path import add_warm_start_cuts, get_warm_start_pool
+from .utils import print_log, validate_settings
+
+# hyperparameters that can be tuned with run_grid_search
+GRID_PARAMETERS = ('c0_value', 'max_coefficient', 'L0_max', 'w_pos')
+
+# state of each worker process (set by _init_grid_worker)
+_worker = {}
+
+
+def get_grid_chains(param_grid):
+    """
+    splits the points of a hyperparameter grid into chains of runs that can reuse each other's results
+
+    runs in the same chain have the same c0_value, w_pos and max_coefficient, and therefore the same objective function
+    and coefficient bounds. each chain is sorted by increasing L0_max, so that every run relaxes the constraints of the
+    previous run: models from earlier runs are feasible for later runs, and the loss cuts from earlier runs are valid
+    for later runs. chains can run in parallel. loss cuts only depend on the data and w_pos, and models for a smaller
+    max_coefficient are feasible for a larger max_coefficient, so run_grid_search also shares cuts and models between
+    chains with the same w_pos.
+
+    Parameters
+    ----------
+    param_grid          dict mapping each name in GRID_PARAMETERS to a list of values
+
+    Returns
+    -------
+    list of chains, where each chain is a list of dicts that map each name in GRID_PARAMETERS to a value
+    chains are sorted by increasing max_coefficient so that their models can warm start chains with larger values
+    """
+    assert set(param_grid) == set(GRID_PARAMETERS), 'param_grid must contain the fields %r' % (GRID_PARAMETERS,)
+    values = {k: np.unique(np.array(param_grid[k], dtype = np.float_)).tolist() for k in GRID_PARAMETERS}
+    for k in GRID_PARAMETERS:
+        assert len(values[k]) > 0, 'param_grid[%r] is empty' % k
+
+    chains = []
+    for c0_value, w_pos, max_coefficient in itertools.product(values['c0_value'], values['w_pos'], values['max_coefficient']):
+        chain = [{'c0_value': c0_value, 'max_coefficient': max_coefficient, 'L0_max': int(L0_max), 'w_pos': w_pos}
+                 for L0_max in values['L0_max']]
+        chains.append(chain)
+
+    chains.sort(key = lambda chain: chain[0]['max_coefficient'])
+    return chains
+
+
+def _init_grid_worker(specs, settings, max_offset, shared_models):
+    _worker['blocks'], _worker['data'] = attach_shared_data(specs)
+    _worker['settings'] = settings
+    _worker['max_offset'] = max_offset
+    _worker['shared_models'] = shared_models
+
+
+def _run_chain(chain):
+    data = _worker['data']
+    return run_grid_chain(data, chain, _worker['settings'], _worker['max_offset'], shared_models = _worker['shared_models'])
+
+
+def run_grid_chain(data, chain, settings, max_offset = float('inf'), shared_models = None):
+    """
+    trains a RiskSLIM model for each point in a chain from get_grid_chains
+
+    each run is warm started with the loss cuts and the feasible models from the previous runs in the chain.
+    if settings['cut_pool_dir'] is set, the cuts from previous runs are read from the cut pool instead, which also
+    contains the cuts of other runs on the same data and w_pos. the initialization procedure is only run for the first run.
+
+    Parameters
+    ----------
+    data, dict containing training data should pass check_data
+    chain, list of dicts that map each name in GRID_PARAMETERS to a value
+    settings, LCPA settings (settings['max_runtime'] is the time limit for each run)
+    max_offset, max absolute value of the intercept (see CoefficientSet.update_intercept_bounds)
+    shared_models, list of (w_pos, loss_value, solution) tuples shared with other chains, e.g. a multiprocessing
+                   manager list (optional). models found by the chain are appended to it, and each run is warm started
+                   with the feasible models in the list with the same w_pos.
+
+    Returns
+    -------
+    list of dicts with the hyperparameters and the results of each run
+    """
+    use_cut_pool = settings['cut_pool_dir'] is not None
+    models = shared_models if shared_models is not None else []
+    cuts = None
+    results = []
+
+    for params in chain:
+
+        run_settings = dict(settings)
+        run_settings['c0_value'] = params['c0_value']
+        run_settings['w_pos'] = params['w_pos']
+        run_settings['record_loss_cuts'] = True
+        if cuts is not None:
+            run_settings['initialization_flag'] = False
+
+        max_coefficient = params['max_coefficient']
+        L0_max = params['L0_max']
+        coef_set = CoefficientSet(variable_names = data['variable_names'], lb = -max_coefficient, ub = max_coefficient, sign = 0, print_flag = False)
+        coef_set.update_intercept_bounds(X = data['X'], y = data['Y'], max_offset = max_offset, max_L0_value = L0_max)
+        constraints = {'L0_min': 0, 'L0_max': L0_max, 'coef_set': coef_set}
+
+        start_time = time.time()
+        mip_objects = setup_lattice_cpa(data, constraints, run_settings)
+
+        # models from previous runs with the same w_pos that satisfy the constraints of this run
+        L0_reg_ind = np.isnan(coef_set.c0)
+        rho_lb, rho_ub = np.array(coef_set.lb), np.array(coef_set.ub)
+        warm_models = [(v, rho) for w, v, rho in list(models) if w == params['w_pos'] and
+                       np.all(rho_lb <= rho) and np.all(rho <= rho_ub) and np.count_nonzero(rho[L0_reg_ind]) <= L0_max]
+        warm_loss_values = [v for v, _ in warm_models]
+        warm_solutions = [rho for _, rho in warm_models]
+
+        # cuts from the cut pool are added by setup_lattice_cpa
+        if use_cut_pool:
+            n_warm_start_cuts = len(mip_objects['initial_cuts']['lhs']) if not run_settings['initialization_flag'] and mip_objects['initial_cuts'] is not None else 0
+        else:
+            n_warm_start_cuts = add_warm_start_cuts(mip_objects, cuts)
+        mip_objects['initial_pool'] = get_warm_start_pool(mip_objects['initial_pool'], warm_loss_values, warm_solutions, coef_set, params['c0_value'])
+
+        model_info, mip_info, lcpa_info = finish_lattice_cpa(data, constraints, mip_objects, run_settings)
+
+        result = dict(params)
+        result.update({
+            'objective_value': model_info['objective_value'],
+            'loss_value': model_info['loss_value'],
+            'optimality_gap': model_info['optimality_gap'],
+            'model_size': np.count_nonzero(model_info['solution'][L0_reg_ind]) if lcpa_info['found_solution'] else np.nan,
+            'run_time': model_info['run_time'],
+            'total_time': time.time() - start_time,
+            'n_warm_start_cuts': n_warm_start_cuts,
+            'n_warm_start_solutions': len(warm_solutions),
+            'cplex_status': lcpa_info['cplex_status'],
+            'solution': model_info['solution'],
+            })
+        results.append(result)
+
+        # the recorded cuts include the initial cuts, so they replace the cuts from previous runs
+        cuts = mip_info['loss_cuts']
+        if lcpa_info['found_solution']:
+            models.append((params['w_pos'], model_info['loss_value'], model_info['solution']))
+
+    return results
+
+
+def run_grid_search(data, param_grid, settings = DEFAULT_LCPA_SETTINGS, max_offset = float('inf'), results_file = None, n_cores = None, n_workers = None, mp_context = None):
+    """
+    trains RiskSLIM models for each point of a grid of hyperparameters in a pool of worker processes
+
+    the data is loaded once and the arrays in data are shared with the worker processes using shared memory. the grid
+    is split into chains of runs with the same c0_value, w_pos and max_coefficient (see get_grid_chains). each chain
+    runs in one worker. each run is warm started with the loss cuts and models of the runs that have finished in all
+    chains with the same w_pos: cuts are shared through settings['cut_pool_dir'] (a temporary directory if it is
+    None), and models are shared through a multiprocessing manager list.
+    the number of CPLEX threads in each worker is set so that all workers use at most n_cores cores.
+
+    Parameters
+    ----------
+    data, dict containing training data should pass check_data (X must be a dense numpy.ndarray)
+    param_grid, dict mapping 'c0_value', 'max_coefficient', 'L0_max', 'w_pos' to lists of values
+    settings, LCPA settings (settings['max_runtime'] is the time limit for each run)
+    max_offset, max absolute value of the intercept (see CoefficientSet.update_intercept_bounds)
+    results_file, csv file used to save the results table (optional)
+    n_cores, max # of cores used by all workers (None = all cores)
+    n_workers, # of worker processes (None = min(# of chains, n_cores))
+    mp_context, multiprocessing start method (None = default start method)
+
+    Returns
+    -------
+    pandas.DataFrame with one row for each point of the grid, containing the hyperparameters, the objective value,
+    loss, optimality gap, model size, runtime, and the coefficient of each variable
+    """
+    settings = validate_settings(settings, default_settings = DEFAULT_LCPA_SETTINGS)
+    chains = get_grid_chains(param_grid)
+    n_workers, n_cores_per_worker = split_core_budget(settings, n_tasks = len(chains), n_cores = n_cores, n_workers = n_workers)
+
+    n_runs = sum(len(chain) for chain in chains)
+    print_log('running grid search with %d runs in %d chains using %d workers (%d cores per worker)' % (n_runs, len(chains), n_workers, n_cores_per_worker))
+    start_time = time.time()
+    blocks, specs = share_data(data)
+    try:
+        ctx = mp.get_context(mp_context)
+        with tempfile.TemporaryDirectory() as tmp_cut_pool_dir, ctx.Manager() as manager:
+            if settings['cut_pool_dir'] is None:
+                settings = dict(settings, cut_pool_dir = tmp_cut_pool_dir)
+            with ctx.Pool(processes = n_workers,
+                          initializer = _init_grid_worker,
+                          initargs = (specs, settings, max_offset, manager.list())) as pool:
+                chain_results = pool.map(_run_chain, chains, chunksize = 1)
+    finally:
+        release_shared_data(blocks)
+    print_log('finished grid search in %1.1f seconds' % (time.time() - start_time))
+
+    # one row per run with a column for each coefficient
+    results = pd.DataFrame([result for chain in chain_results for result in chain])
+    coefs = pd.DataFrame(np.vstack(results.pop('solution')), columns = ['rho_%s' % name for name in data['variable_names']])
+    results = pd.concat([results, coefs], axis = 1)
+    results = results.sort_values(list(GRID_PARAMETERS)).reset_index(drop = True)
+
+    if results_file is not None:
+        results.to_csv(results_file, index = False)
+
+    return results
@@ -0,0 +1,174 @@
+import time
+import multiprocessing as mp
+import numpy as np
+import scipy.sparse as sp
+from .cache import ScoreCache
+from .heuristics import setup_polishing_handle, setup_rounding_handle
+from .parallel import attach_shared_data, release_shared_data, share_data
+from .setup_functions import setup_loss_functions, setup_objective_functions, setup_penalty_parameters
+
+# state of each worker process (set by _init_heuristic_worker)
+_worker = {}
+
+
+def _init_heuristic_worker(specs, data, constraints, settings):
+
+    if specs is not None:
+        _worker['blocks'], data = attach_shared_data(specs)
+
+    # each worker runs serially since the workers already run in parallel
+    (Z,
+     compute_loss,
+     _,
+     compute_loss_from_scores,
+     compute_loss_real,
+     _,
+     compute_loss_from_scores_real,
+     compute_loss_from_scores_real_batch,
+     loss_info) = setup_loss_functions(data = data,
+                                       coef_set = constraints['coef_set'],
+                                       L0_max = constraints['L0_max'],
+                                       loss_computation = settings['loss_computation'],
+                                       w_pos = settings['w_pos'],
+                                       compress_rows = settings['compress_rows'],
+                                       n_threads = 1,
+                                       deterministic = settings['loss_deterministic'],
+                                       block_size = settings['loss_block_size'],
+                                       interpolation_error = settings['loss_interpolation_error'],
+                                       integer_lookup = settings['loss_integer_lookup'],
+                                       table_cache_dir = settings['lookup_table_cache_dir'])
+
+    _, C_0, L0_reg_ind, C_0_nnz = setup_penalty_parameters(c0_value = settings['c0_value'], coef_set = constraints['coef_set'])
+    _, _, get_L0_penalty, _, _ = setup_objective_functions(compute_loss, L0_reg_ind, C_0_nnz)
+
+    rho_lb = np.array(constraints['coef_set'].lb)
+    rho_ub = np.array(constraints['coef_set'].ub)
+    trivial_L0_max = np.sum(constraints['coef_set'].penalized_indices())
+    score_cache = ScoreCache(Z, max_size = settings['score_cache_size']) if settings['score_cache_size'] > 0 else None
+
+    _worker['polishing_handle'] = setup_polishing_handle(Z, C_0, rho_ub, rho_lb, get_L0_penalty, compute_loss_from_scores, loss_info,
+                                                         active_set_flag = constraints['L0_max'] <= trivial_L0_max,
+                                                         polishing_method = settings['polishing_method'],
+                                                         score_cache = score_cache,
+                                                         compute_loss_real = compute_loss_real if loss_info['loss_computation'] == 'interpolated' else None)
+
+    _worker['rounding_handle'] = setup_rounding_handle(Z, C_0, get_L0_penalty, compute_loss_from_scores_real, compute_loss_from_scores_real_batch,
+                                                       rounding_method = settings['rounding_method'],
+                                                       score_cache = score_cache)
+
+
+def _round_in_worker(rho, rounding_cutoff, polish_after_rounding):
+    result = {'task': 'round', 'rounded': None, 'polished': None, 'round_time': 0.0, 'polish_time': 0.0}
+
+    start_time = time.time()
+    rounded_solution, rounded_objval, early_stop = _worker['rounding_handle'](rho, rounding_cutoff)
+    result['round_time'] = time.time() - start_time
+    if early_stop:
+        return result
+
+    result['rounded'] = (rounded_objval, rounded_solution)
+    if polish_after_rounding:
+        start_time = time.time()
+        polished_solution, _, polished_objval = _worker['polishing_handle'](rounded_solution)
+        result['polish_time'] = time.time() - start_time
+        result['polished'] = (polished_objval, polished_solution)
+
+    return result
+
+
+def _polish_in_worker(rho):
+    start_time = time.time()
+    polished_solution, _, polished_objval = _worker['polishing_handle'](rho)
+    return {'task': 'polish', 'rounded': None, 'polished': (polished_objval, polished_solution), 'round_time': 0.0, 'polish_time': time.time() - start_time}
+
+
+class HeuristicWorkerPool(object):
+    """
+    pool of worker processes that run sequential rounding and polishing outside of the CPLEX callbacks
+
+    each worker builds its own loss functions and heuristics from the data, so the callbacks only send solutions to the
+    workers and collect the results. the arrays in data are shared with the workers using shared memory when X is a
+    dense numpy.ndarray.
+    """
+
+    def __init__(self, data, constraints, settings, n_workers, max_pending = None, mp_context = None):
+        """
+        Parameters
+        ----------
+        data            dict containing training data
+        constraints     dict containing 'L0_min, L0_max, CoefficientSet'
+        settings        LCPA settings
+        n_workers       # of worker processes
+        max_pending     max # of tasks that are submitted but not collected (None = 2 * n_workers)
+        mp_context      multiprocessing start method (None = default start method)
+        """
+        assert n_workers >= 1
+        self.n_workers = int(n_workers)
+        self.max_pending = 2 * self.n_workers if max_pending is None else int(max_pending)
+        self._pending = []
+
+        X = data['X']
+        if isinstance(X, np.ndarray) and not isinstance(X, np.memmap) and not sp.issparse(X):
+            self._blocks, specs = share_data(data)
+            initargs = (specs, None, constraints, settings)
+        else:
+            self._blocks = []
+            initargs = (None, data, constraints, settings)
+
+        ctx = mp.get_context(mp_context)
+        self._pool = ctx.Pool(processes = self.n_workers, initializer = _init_heuristic_worker, initargs = initargs)
+
+    def __len__(self):
+        return len(self._pending)
+
+    def is_full(self):
+        return len(self._pending) >= self.max_pending
+
+    def submit_rounding(self, rho, rounding_cutoff, polish_after_rounding):
+        """
+        rounds the continuous solution rho in a worker (and polishes the rounded solution if polish_after_rounding)
+        returns False if the task was not submitted since too many tasks are pending
+        """
+        if self.is_full():
+            return False
+        self._pending.append(self._pool.apply_async(_round_in_worker, (np.array(rho), float(rounding_cutoff), bool(polish_after_rounding))))
+        return True
+
+    def submit_polishing(self, rho):
+        """
+        polishes the integer solution rho in a worker
+        returns False if the task was not submitted since too many tasks are pending
+        """
+        if self.is_full():
+            return False
+        self._pending.append(self._pool.apply_async(_polish_in_worker, (np.array(rho),)))
+        return True
+
+    def collect(self):
+        """
+        returns the results of finished tasks without waiting for tasks that are running
+
+        Returns
+        -------
+        list of dicts with the fields:
+
+         - 'task' 'round' or 'polish'
+         - 'rounded' (objval, solution) of the rounded solution (None if rounding stopped early)
+         - 'polished' (objval, solution) of the polished solution (None if the solution was not polished)
+         - 'round_time', 'polish_time'
+        """
+        finished = [r for r in self._pending if r.ready()]
+        if len(finished) == 0:
+            return []
+        self._pending = [r for r in self._pending if not r.ready()]
+        return [r.get() for r in finished]
+
+    def close(self):
+        """
+        stops the workers (tasks that are running are discarded)
+        """
+        self._pool.terminate()
+        self._pool.join()
+        self._pending = []
+        release_shared_data(self._blocks)
+        self._blocks = []
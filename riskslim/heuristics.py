@@ -1,10 +1,11 @@
 import numpy as np
+import scipy.sparse as sp
+from .utils import print_log
 
 #todo: finish specifications
 #todo: add input checking (with ability to turn off)
-#todo: Cython implementation
 
-def sequential_rounding(rho, Z, C_0, compute_loss_from_scores_real, get_L0_penalty, objval_cutoff = float('Inf')):
+def sequential_rounding(rho, Z, C_0, compute_loss_from_scores_real, get_L0_penalty, objval_cutoff = float('Inf'), score_cache = None):
     """
 
     Parameters
@@ -16,6 +17,7 @@ def sequential_rounding(rho, Z, C_0, compute_loss_from_scores_real, get_L0_penal
     get_L0_penalty:                     function handle to compute L0_penalty from rho
     objval_cutoff:                      objective value used for early stopping.
                                         the procedure will stop if the objective value achieved by an intermediate solution will exceeds objval_cutoff
+    score_cache:                        ScoreCache used to store the scores of the rounded solution (optional)
 
     Returns
     -------
@@ -52,12 +54,12 @@ def sequential_rounding(rho, Z, C_0, compute_loss_from_scores_real, get_L0_penal
         for idx in dimensions_to_round:
 
             # scores go from center to ceil -> center + dist_from_start_to_ceil
-            Z_dim = Z[:, idx]
-            base_scores = scores + dist_from_start_to_ceil[idx] * Z_dim
+            base_scores = np.copy(scores)
+            _add_scaled_column(base_scores, Z, idx, dist_from_start_to_ceil[idx])
             objvals_at_ceil[idx] = compute_loss_from_scores_real(base_scores)
 
             # move from ceil to floor => -1*Z_j
-            base_scores -= Z_dim
+            _add_scaled_column(base_scores, Z, idx, -1.0)
             objvals_at_floor[idx] = compute_loss_from_scores_real(base_scores)
 
             if ceil_is_zero[idx]:
@@ -76,21 +78,129 @@ def sequential_rounding(rho, Z, C_0, compute_loss_from_scores_real, get_L0_penal
             best_objval = best_objval_at_ceil
             best_dim = np.nanargmin(objvals_at_ceil)
             rho[best_dim] += dist_from_start_to_ceil[best_dim]
-            scores += dist_from_start_to_ceil[best_dim] * Z[:, best_dim]
+            _add_scaled_column(scores, Z, best_dim, dist_from_start_to_ceil[best_dim])
         else:
             best_objval = best_objval_at_floor
             best_dim = np.nanargmin(objvals_at_floor)
             rho[best_dim] += dist_from_start_to_floor[best_dim]
-            scores += dist_from_start_to_floor[best_dim] * Z[:, best_dim]
+            _add_scaled_column(scores, Z, best_dim, dist_from_start_to_floor[best_dim])
 
         dimensions_to_round.remove(best_dim)
         #assert(np.all(np.isclose(scores, Z.dot(rho))))
 
     early_stop_flag = best_objval > objval_cutoff
+    if score_cache is not None and len(dimensions_to_round) == 0:
+        score_cache.put(rho, scores)
+
+    return rho, best_objval, early_stop_flag
+
+
+def sequential_rounding_batch(rho, Z, C_0, compute_loss_from_scores_real_batch, get_L0_penalty, objval_cutoff = float('Inf'), max_batch_size = 2**22, score_cache = None):
+    """
+    vectorized version of sequential_rounding
+
+    at each iteration, the scores at the ceil/floor of every dimension that remains to be rounded are stored as
+    columns of an N x 2D block, and their loss values are computed in a single call to a batched loss function.
+    this produces the same solutions as sequential_rounding.
+
+    Parameters
+    ----------
+    rho:                                    P x 1 vector of continuous coefficients
+    Z:                                      N x P data matrix computed as X * Y
+    C_0:                                    N x 1 vector of L0 penalties. C_0[j] = L0 penalty for rho[j] for j = 0,..., P.
+    compute_loss_from_scores_real_batch:    function handle to compute K loss values using an N x K matrix of scores
+    get_L0_penalty:                         function handle to compute L0_penalty from rho
+    objval_cutoff:                          objective value used for early stopping.
+                                            the procedure will stop if the objective value achieved by an intermediate solution will exceeds objval_cutoff
+    max_batch_size:                         max # of entries in the block of scores (dimensions are processed in chunks if needed)
+    score_cache:                            ScoreCache used to store the scores of the rounded solution (optional)
+
+    Returns
+    -------
+
+    rho:                                    P x 1 vector of integer coefficients (if early_stop_flag = False, otherwise continuous solution)
+    best_objval:                            objective value achieved by rho (if early_stop_flag = False, otherwise NaN)
+    early_stop_flag:                        True if procedure was stopped early (in which case rho is not integer feasible)
+
+    """
+
+    assert callable(compute_loss_from_scores_real_batch)
+    assert callable(get_L0_penalty)
+
+    N = Z.shape[0]
+
+    rho_floor = np.floor(rho)
+    floor_is_zero = np.equal(rho_floor, 0)
+    dist_from_start_to_floor = rho_floor - rho
+
+    rho_ceil = np.ceil(rho)
+    ceil_is_zero = np.equal(rho_ceil, 0)
+    dist_from_start_to_ceil = rho_ceil - rho
+
+    # penalty adjustments when rounding to zero removes the L0 penalty of a dimension
+    ceil_penalty_adjustment = np.where(ceil_is_zero, -C_0, 0.0)
+    floor_penalty_adjustment = np.where(np.logical_and(floor_is_zero, ~ceil_is_zero), -C_0, 0.0)
+
+    dimensions_to_round = np.flatnonzero(np.not_equal(rho_floor, rho_ceil))
+    n_dims_per_batch = max(1, int(max_batch_size // max(2 * N, 1)))
+    score_block = np.empty(shape = (N, 2 * min(n_dims_per_batch, len(dimensions_to_round))), order = 'F')
+
+    scores = Z.dot(rho)
+    best_objval = compute_loss_from_scores_real_batch(scores.reshape((N, 1), order = 'F'))[0] + get_L0_penalty(rho)
+    while len(dimensions_to_round) > 0 and best_objval < objval_cutoff:
+
+        objvals_at_ceil = np.empty(len(dimensions_to_round))
+        objvals_at_floor = np.empty(len(dimensions_to_round))
+        current_penalty = get_L0_penalty(rho)
+
+        for start in range(0, len(dimensions_to_round), n_dims_per_batch):
+
+            batch_dims = dimensions_to_round[start:(start + n_dims_per_batch)]
+            n_batch = len(batch_dims)
+            batch_idx = slice(start, start + n_batch)
+            Z_batch = _get_columns(Z, batch_dims)
+
+            # scores go from center to ceil -> center + dist_from_start_to_ceil
+            ceil_block = score_block[:, 0:n_batch]
+            np.multiply(Z_batch, dist_from_start_to_ceil[batch_dims], out = ceil_block)
+            ceil_block += scores[:, None]
+
+            # move from ceil to floor => -1*Z_j
+            floor_block = score_block[:, n_batch:(2 * n_batch)]
+            np.subtract(ceil_block, Z_batch, out = floor_block)
+
+            batch_objvals = compute_loss_from_scores_real_batch(score_block[:, 0:(2 * n_batch)])
+            objvals_at_ceil[batch_idx] = batch_objvals[0:n_batch]
+            objvals_at_floor[batch_idx] = batch_objvals[n_batch:]
+
+        # adjust for penalty value
+        objvals_at_ceil += current_penalty + ceil_penalty_adjustment[dimensions_to_round]
+        objvals_at_floor += current_penalty + floor_penalty_adjustment[dimensions_to_round]
+        best_ceil_idx = np.argmin(objvals_at_ceil)
+        best_floor_idx = np.argmin(objvals_at_floor)
+
+        if objvals_at_ceil[best_ceil_idx] <= objvals_at_floor[best_floor_idx]:
+            best_objval = objvals_at_ceil[best_ceil_idx]
+            best_dim = dimensions_to_round[best_ceil_idx]
+            best_step = dist_from_start_to_ceil[best_dim]
+            dimensions_to_round = np.delete(dimensions_to_round, best_ceil_idx)
+        else:
+            best_objval = objvals_at_floor[best_floor_idx]
+            best_dim = dimensions_to_round[best_floor_idx]
+            best_step = dist_from_start_to_floor[best_dim]
+            dimensions_to_round = np.delete(dimensions_to_round, best_floor_idx)
+
+        rho[best_dim] += best_step
+        _add_scaled_column(scores, Z, best_dim, best_step)
+
+    early_stop_flag = best_objval > objval_cutoff
+    if score_cache is not None and len(dimensions_to_round) == 0:
+        score_cache.put(rho, scores)
+
     return rho, best_objval, early_stop_flag
 
 
-def discrete_descent(rho, Z, C_0, rho_ub, rho_lb, get_L0_penalty, compute_loss_from_scores, descent_dimensions = None, active_set_flag = True):
+def discrete_descent(rho, Z, C_0, rho_ub, rho_lb, get_L0_penalty, compute_loss_from_scores, descent_dimensions = None, active_set_flag = True, base_scores = None):
 
     """
     Given a initial feasible solution, rho, produces an improved solution that is 1-OPT
@@ -108,6 +218,8 @@ def discrete_descent(rho, Z, C_0, rho_ub, rho_lb, get_L0_penalty, compute_loss_f
     compute_loss_from_scores_real:      function handle to compute loss using N x 1 vector of scores, where scores = Z.dot(rho)
     get_L0_penalty:                     function handle to compute L0_penalty from rho
     descent_dimensions
+    active_set_flag
+    base_scores:                        N x 1 vector of scores at rho, where scores = Z.dot(rho) (optional)
 
     Returns
     -------
@@ -138,7 +250,10 @@ def discrete_descent(rho, Z, C_0, rho_ub, rho_lb, get_L0_penalty, compute_loss_f
 
     descent_dimensions = descent_dimensions.tolist()
 
-    base_scores = Z.dot(rho)
+    if base_scores is None:
+        base_scores = Z.dot(rho)
+    else:
+        base_scores = np.array(base_scores, dtype = np.float_)
     base_loss = compute_loss_from_scores(base_scores)
     base_objval = base_loss + get_L0_penalty(rho)
     n_iterations = 0
@@ -179,7 +294,7 @@ def discrete_descent(rho, Z, C_0, rho_ub, rho_lb, get_L0_penalty, compute_loss_f
         rho[best_idx] += best_step
         base_objval = next_objval
         base_loss = base_objval - get_L0_penalty(rho)
-        base_scores = base_scores + (best_step * Z[:, best_idx])
+        _add_scaled_column(base_scores, Z, best_idx, best_step)
 
         # remove the current best direction from the set of directions to explore
         search_dimensions = list(descent_dimensions)
@@ -219,7 +334,6 @@ def _compute_objvals_at_dim(Z, C_0, base_rho, base_scores, base_loss, dim_coefs,
     base_index = np.flatnonzero(dim_coefs == base_coef_value)
     loss_at_coef_value = np.repeat(np.nan, len(dim_coefs))
     loss_at_coef_value[base_index] = float(base_loss)
-    Z_dim = Z[:, dim_idx]
 
     # start by moving forward
     forward_indices = np.flatnonzero(base_coef_value <= dim_coefs)
@@ -231,7 +345,7 @@ def _compute_objvals_at_dim(Z, C_0, base_rho, base_scores, base_loss, dim_coefs,
     total_distance_from_base = 0
 
     for i in range(n_forward_steps):
-        scores += forward_step_sizes[i] * Z_dim
+        _add_scaled_column(scores, Z, dim_idx, forward_step_sizes[i])
         total_distance_from_base += forward_step_sizes[i]
         current_loss = compute_loss_from_scores(scores)
         if current_loss >= best_loss:
@@ -257,7 +371,7 @@ def _compute_objvals_at_dim(Z, C_0, base_rho, base_scores, base_loss, dim_coefs,
         best_loss = base_loss
 
         for i in range(n_backward_steps):
-            scores += backward_step_sizes[i] * Z_dim
+            _add_scaled_column(scores, Z, dim_idx, backward_step_sizes[i])
             total_distance_from_base += backward_step_sizes[i]
             current_loss = compute_loss_from_scores(scores)
             if current_loss >= best_loss:
@@ -285,7 +399,7 @@ def _compute_objvals_at_dim(Z, C_0, base_rho, base_scores, base_loss, dim_coefs,
             # steps_from_here_to_zero: step_from_here_to_base + step_from_base_to_zero
             # steps_from_here_to_zero: -step_from_base_to_here + -step_from_zero_to_base
             steps_to_zero = -(base_coef_value + total_distance_from_base)
-            scores += steps_to_zero * Z_dim
+            _add_scaled_column(scores, Z, dim_idx, steps_to_zero)
             objval_at_coef_values[zero_coef_idx] = compute_loss_from_scores(scores) + other_dim_penalty
             # assert(all(np.isclose(scores, base_scores - base_coef_value * Z_dim)))
 
@@ -293,3 +407,122 @@ def _compute_objvals_at_dim(Z, C_0, base_rho, base_scores, base_loss, dim_coefs,
     return objval_at_coef_values
 
 
+def _add_scaled_column(scores, Z, dim_idx, step):
+    """
+    updates scores in place to scores + step * Z[:, dim_idx]
+    if Z is a sparse matrix in CSC format, only the rows where Z[:, dim_idx] is non-zero are updated
+
+    Parameters
+    ----------
+    scores:                             N x 1 vector of scores, where scores = Z.dot(rho)
+    Z:                                  N x P data matrix computed as X * Y (numpy.ndarray, scipy.sparse.csc_matrix, or BinaryMatrix)
+    dim_idx:                            index of the column of Z
+    step:                               step size
+
+    """
+    if isinstance(Z, np.ndarray):
+        scores += step * Z[:, dim_idx]
+    elif sp.isspmatrix_csc(Z):
+        start, end = Z.indptr[dim_idx], Z.indptr[dim_idx + 1]
+        scores[Z.indices[start:end]] += step * Z.data[start:end]
+    else:
+        Z.add_scaled_column(scores, dim_idx, step)
+
+
+def _get_columns(Z, dims):
+    """
+    returns Z[:, dims] as a dense numpy.ndarray
+
+    Parameters
+    ----------
+    Z:                                  N x P data matrix computed as X * Y (numpy.ndarray, scipy.sparse.csc_matrix, or BinaryMatrix)
+    dims:                               indices of the columns of Z
+
+    """
+    if isinstance(Z, np.ndarray):
+        return Z[:, dims]
+    elif sp.issparse(Z):
+        return Z[:, dims].toarray()
+    else:
+        return Z.get_columns(dims)
+
+
+def setup_polishing_handle(Z, C_0, rho_ub, rho_lb, get_L0_penalty, compute_loss_from_scores, loss_info, active_set_flag = True, polishing_method = 'compiled', score_cache = None, compute_loss_real = None):
+    """
+    returns a function handle that polishes an integer solution using discrete coordinate descent
+
+    Parameters
+    ----------
+    Z:                                  N x P data matrix computed as X * Y
+    C_0:                                P x 1 vector of L0 penalties. C_0[j] = L0 penalty for rho[j] for j = 0,..., P.
+    rho_ub
+    rho_lb
+    get_L0_penalty:                     function handle to compute L0_penalty from rho
+    compute_loss_from_scores:           function handle to compute loss using N x 1 vector of scores, where scores = Z.dot(rho)
+    loss_info:                          dictionary produced by setup_loss_functions
+    active_set_flag:                    set to True to only polish dimensions where rho[j] != 0
+    polishing_method:                   'compiled' to use fast_discrete_descent when possible; 'standard' to use discrete_descent
+    score_cache:                        ScoreCache used to get the scores of the solution to polish (optional)
+    compute_loss_real:                  function handle to compute the exact loss from rho (optional). if provided, the
+                                        loss and objective value of each polished solution are recomputed with it, which
+                                        is needed when compute_loss_from_scores is approximate
+
+    Returns
+    -------
+    polishing_handle:                   function handle such that polishing_handle(rho) returns (rho, loss, objval)
+
+    """
+    assert polishing_method in ('standard', 'compiled')
+
+    if score_cache is None:
+        get_scores = lambda rho: None
+    else:
+        get_scores = score_cache.get_scores
+
+    if polishing_method == 'compiled':
+        # fast_discrete_descent requires a dense float64 data matrix
+        if loss_info['loss_computation'] in ('fast', 'lookup') and isinstance(Z, np.ndarray):
+            try:
+                from .loss_functions.fast_discrete_descent import discrete_descent as fast_discrete_descent
+                loss_value_tbl = loss_info.get('loss_value_tbl')
+                tbl_offset = loss_info.get('tbl_offset', 0)
+                return lambda rho: fast_discrete_descent(rho, Z, C_0, rho_ub, rho_lb, loss_value_tbl, tbl_offset, active_set_flag = active_set_flag, base_scores = get_scores(rho))
+            except ImportError:
+                print_log("warning: could not import fast_discrete_descent")
+        print_log("using standard discrete_descent for %s loss computation" % loss_info['loss_computation'])
+
+    polishing_handle = lambda rho: discrete_descent(rho, Z, C_0, rho_ub, rho_lb, get_L0_penalty, compute_loss_from_scores, active_set_flag = active_set_flag, base_scores = get_scores(rho))
+    if compute_loss_real is None:
+        return polishing_handle
+
+    def exact_polishing_handle(rho):
+        polished_rho, _, _ = polishing_handle(rho)
+        polished_loss = compute_loss_real(polished_rho)
+        return polished_rho, polished_loss, polished_loss + get_L0_penalty(polished_rho)
+
+    return exact_polishing_handle
+
+
+def setup_rounding_handle(Z, C_0, get_L0_penalty, compute_loss_from_scores_real, compute_loss_from_scores_real_batch, rounding_method = 'batch', score_cache = None):
+    """
+    returns a function handle that rounds a continuous solution using sequential rounding
+
+    Parameters
+    ----------
+    Z:                                      N x P data matrix computed as X * Y
+    C_0:                                    P x 1 vector of L0 penalties. C_0[j] = L0 penalty for rho[j] for j = 0,..., P.
+    get_L0_penalty:                         function handle to compute L0_penalty from rho
+    compute_loss_from_scores_real:          function handle to compute loss using N x 1 vector of scores
+    compute_loss_from_scores_real_batch:    function handle to compute K loss values using an N x K matrix of scores
+    rounding_method:                        'batch' to use sequential_rounding_batch; 'standard' to use sequential_rounding
+    score_cache:                            ScoreCache used to store the scores of rounded solutions (optional)
+
+    Returns
+    -------
+    rounding_handle:                        function handle such that rounding_handle(rho, cutoff) returns (rho, objval, early_stop)
+
+    """
+    assert rounding_method in ('standard', 'batch')
+    if rounding_method == 'batch':
+        return lambda rho, cutoff: sequential_rounding_batch(rho, Z, C_0, compute_loss_from_scores_real_batch, get_L0_penalty, cutoff, score_cache = score_cache)
+    return lambda rho, cutoff: sequential_rounding(rho, Z, C_0, compute_loss_from_scores_real, get_L0_penalty, cutoff, score_cache = score_cache)
@@ -23,9 +23,15 @@ def initialize_lattice_cpa(Z,
                            compute_loss_from_scores,
                            get_objval,
                            get_L0_penalty,
-                           is_feasible):
+                           is_feasible,
+                           initial_cuts = None):
     """
 
+    Parameters
+    ----------
+    initial_cuts        dict with cuts that are added to the LP before running CPA (e.g. from a cut pool), with fields
+                        'coefs' (K x (P + 1) array of coefficients for the loss and rho variables) and 'lhs' (K x 1 vector)
+
     Returns
     -------
     cuts
@@ -59,12 +65,21 @@ def initialize_lattice_cpa(Z,
     risk_slim_lp, risk_slim_lp_indices = create_risk_slim(coef_set = constraints['coef_set'], input = risk_slim_settings)
     risk_slim_lp = set_cplex_mip_parameters(risk_slim_lp, cplex_settings, display_cplex_progress = settings['display_cplex_progress'])
 
+    if initial_cuts is not None:
+        cut_idx = risk_slim_lp_indices['loss'] + risk_slim_lp_indices['rho']
+        initial_cuts = {
+            'coefs': [[cut_idx, coefs.tolist()] for coefs in initial_cuts['coefs']],
+            'lhs': np.asarray(initial_cuts['lhs']).tolist(),
+            }
+        print_log('adding %d initial cuts to the LP' % len(initial_cuts['lhs']))
+
     # solve risk_slim_lp LP using standard CPA
     cpa_stats, cuts, cpa_pool = run_standard_cpa(cpx = risk_slim_lp,
                                                  cpx_indices = risk_slim_lp_indices,
                                                  compute_loss = compute_loss_real,
                                                  compute_loss_cut = compute_loss_cut_real,
-                                                 settings = settings)
+                                                 settings = settings,
+                                                 initial_cuts = initial_cuts)
 
     # update bounds
     bounds = chained_updates(bounds, C_0_nnz, new_objval_at_relaxation = cpa_stats['lowerbound'])
@@ -159,7 +174,8 @@ def run_standard_cpa(cpx,
                      compute_loss,
                      compute_loss_cut,
                      settings = DEFAULT_CPA_SETTINGS,
-                     print_flag = False):
+                     print_flag = False,
+                     initial_cuts = None):
 
     assert isinstance(cpx, Cplex)
     assert isinstance(cpx_indices, dict)
@@ -223,6 +239,12 @@ def run_standard_cpa(cpx,
         'total_times': []
         }
 
+    # cuts from previous runs on the same data
+    if initial_cuts is not None and len(initial_cuts['lhs']) > 0:
+        cpx.linear_constraints.add(lin_expr = [SparsePair(ind = ind, val = val) for ind, val in initial_cuts['coefs']],
+                                   senses = ["G"] * len(initial_cuts['lhs']),
+                                   rhs = list(initial_cuts['lhs']))
+
     run_start_time = time.time()
     while True:
 
@@ -3,12 +3,16 @@ import numpy as np
 from cplex.callbacks import HeuristicCallback, LazyConstraintCallback
 from cplex.exceptions import CplexError
 from .bound_tightening import chained_updates
+from .cache import LossCutCache, ScoreCache
+from .checkpoint import get_dense_cut, load_checkpoint, save_checkpoint
+from .cut_pool import append_to_cut_pool, get_data_fingerprint, load_cut_pool
 from .defaults import DEFAULT_LCPA_SETTINGS
 from .utils import print_log, validate_settings
-from .heuristics import discrete_descent, sequential_rounding
+from .heuristics import setup_polishing_handle, setup_rounding_handle
+from .heuristic_workers import HeuristicWorkerPool
 from .initialization import initialize_lattice_cpa
 from .mip import add_mip_starts, convert_to_risk_slim_cplex_solution, create_risk_slim, set_cplex_mip_parameters
-from .setup_functions import get_loss_bounds, setup_loss_functions, setup_objective_functions, setup_penalty_parameters
+from .setup_functions import check_loss_precision, get_loss_bounds, get_loss_bounds_by_L0, setup_loss_functions, setup_objective_functions, setup_penalty_parameters
 from .solution_pool import SolutionPool, FastSolutionPool
 
 DEFAULT_BOUNDS = {
@@ -43,7 +47,52 @@ def run_lattice_cpa(data, constraints, settings = DEFAULT_LCPA_SETTINGS):
     return model_info, mip_info, lcpa_info
 
 
-def setup_lattice_cpa(data, constraints, settings = DEFAULT_LCPA_SETTINGS):
+def resume_lattice_cpa(data, constraints, checkpoint_file, settings = DEFAULT_LCPA_SETTINGS):
+    """
+    resumes LCPA from a checkpoint saved by a previous run with settings['checkpoint_file'] = checkpoint_file
+
+    the MIP is rebuilt using the bounds in the checkpoint, the cuts are added the first time the LossCallback is
+    called, and the solutions are used to warm start the solver. the data, constraints and c0_value must match
+    the ones used to create the checkpoint.
+
+    Parameters
+    ----------
+    data, dict containing training data should pass check_data
+    constraints, dict containing 'L0_min, L0_max, CoefficientSet'
+    checkpoint_file, path of the checkpoint file
+    settings
+
+    Returns
+    -------
+    model_info, mip_info, lcpa_info (see run_lattice_cpa)
+    """
+    checkpoint = load_checkpoint(checkpoint_file)
+    settings = validate_settings(settings, default_settings = DEFAULT_LCPA_SETTINGS)
+    assert np.isclose(settings['c0_value'], checkpoint['c0_value']), \
+        'checkpoint was created with c0_value = %r (settings contain c0_value = %r)' % (checkpoint['c0_value'], settings['c0_value'])
+
+    # the cuts in the checkpoint replace the cuts from the initialization procedure
+    settings['initialization_flag'] = False
+    mip_objects = setup_lattice_cpa(data, constraints, settings, initial_bounds = checkpoint['bounds'])
+
+    indices = mip_objects['indices']
+    cut_idx = indices['loss'] + indices['rho']
+    assert checkpoint['cut_coefs'].shape[1] == len(cut_idx), 'checkpoint was created for a different problem'
+    mip_objects['initial_cuts'] = {
+        'coefs': [[cut_idx, coefs.tolist()] for coefs in checkpoint['cut_coefs']],
+        'lhs': checkpoint['cut_rhs'].tolist(),
+        }
+
+    if len(checkpoint['pool_objvals']) > 0:
+        initial_pool = mip_objects['initial_pool'].add(objvals = checkpoint['pool_objvals'], solutions = checkpoint['pool_solutions'])
+        mip_objects['initial_pool'] = initial_pool.distinct().sort()
+
+    print_log('resuming from checkpoint with %d cuts and %d solutions' % (len(checkpoint['cut_rhs']), len(checkpoint['pool_objvals'])))
+    model_info, mip_info, lcpa_info = finish_lattice_cpa(data, constraints, mip_objects, settings)
+    return model_info, mip_info, lcpa_info
+
+
+def setup_lattice_cpa(data, constraints, settings = DEFAULT_LCPA_SETTINGS, initial_bounds = None):
     """
 
     Parameters
@@ -51,6 +100,7 @@ def setup_lattice_cpa(data, constraints, settings = DEFAULT_LCPA_SETTINGS):
     data, dict containing training data should pass check_data
     constraints, dict containing 'L0_min, L0_max, CoefficientSet'
     settings
+    initial_bounds, dict containing bounds from a previous run of LCPA on the same problem (optional)
 
     Returns
     -------
@@ -71,11 +121,20 @@ def setup_lattice_cpa(data, constraints, settings = DEFAULT_LCPA_SETTINGS):
      compute_loss_from_scores,
      compute_loss_real,
      compute_loss_cut_real,
-     compute_loss_from_scores_real) = setup_loss_functions(data = data,
+     compute_loss_from_scores_real,
+     compute_loss_from_scores_real_batch,
+     loss_info) = setup_loss_functions(data = data,
                                                            coef_set = constraints['coef_set'],
                                                            L0_max = constraints['L0_max'],
                                                            loss_computation = settings['loss_computation'],
-                                                           w_pos = settings['w_pos'])
+                                                           w_pos = settings['w_pos'],
+                                                           compress_rows = settings['compress_rows'],
+                                                           n_threads = settings['loss_n_threads'],
+                                                           deterministic = settings['loss_deterministic'],
+                                                           block_size = settings['loss_block_size'],
+                                                           interpolation_error = settings['loss_interpolation_error'],
+                                                           integer_lookup = settings['loss_integer_lookup'],
+                                                           table_cache_dir = settings['lookup_table_cache_dir'])
 
     # data
     N, P = Z.shape
@@ -103,12 +162,20 @@ def setup_lattice_cpa(data, constraints, settings = DEFAULT_LCPA_SETTINGS):
     bounds = dict(DEFAULT_BOUNDS)
     bounds['L0_min'] = constraints['L0_min']
     bounds['L0_max'] = constraints['L0_max']
-    bounds['loss_min'], bounds['loss_max'] = get_loss_bounds(Z, rho_ub, rho_lb, L0_reg_ind, L0_max)
+    bounds['loss_min'], bounds['loss_max'] = get_loss_bounds(Z, rho_ub, rho_lb, L0_reg_ind, L0_max, sample_weights = loss_info.get('sample_weights'))
 
     # initialize
     initial_pool = SolutionPool(P)
     initial_cuts = None
 
+    # load cuts from previous runs on the same data
+    pooled_cuts = None
+    if lcpa_settings['cut_pool_dir'] is not None:
+        pool_coefs, pool_rhs = load_cut_pool(lcpa_settings['cut_pool_dir'], get_data_fingerprint(data, settings['w_pos']))
+        if pool_coefs is not None and pool_coefs.shape[1] == P + 1 and len(pool_rhs) > 0:
+            pooled_cuts = {'coefs': pool_coefs, 'lhs': pool_rhs}
+            print_log('loaded %d cuts from cut pool' % len(pool_rhs))
+
     # check if trivial solution is feasible, if so add it to the pool and update bounds
     trivial_solution = np.zeros(P)
     if is_feasible(trivial_solution):
@@ -120,6 +187,11 @@ def setup_lattice_cpa(data, constraints, settings = DEFAULT_LCPA_SETTINGS):
 
         initial_pool = initial_pool.add(objvals = trivial_objval, solutions = trivial_solution)
 
+    # bounds from a previous run are valid for this problem
+    if initial_bounds is not None:
+        for k, v in initial_bounds.items():
+            bounds[k] = max(bounds[k], v) if k.endswith('_min') else min(bounds[k], v)
+
     # setup risk_slim_lp and risk_slim_mip parameters
     risk_slim_settings = {
         'C_0': c0_value,
@@ -132,6 +204,7 @@ def setup_lattice_cpa(data, constraints, settings = DEFAULT_LCPA_SETTINGS):
     risk_slim_settings.update(bounds)
 
     # run initialization procedure
+    # note: the initialization updates the bounds on the objective value, so it uses exact losses when losses are interpolated
     if lcpa_settings['initialization_flag']:
         initial_pool, initial_cuts, initial_bounds = initialize_lattice_cpa(Z = Z,
                                                                             c0_value = lcpa_settings['c0_value'],
@@ -140,13 +213,14 @@ def setup_lattice_cpa(data, constraints, settings = DEFAULT_LCPA_SETTINGS):
                                                                             settings = init_settings,
                                                                             risk_slim_settings = risk_slim_settings,
                                                                             cplex_settings = cplex_settings,
-                                                                            compute_loss_from_scores = compute_loss_from_scores,
+                                                                            compute_loss_from_scores = compute_loss_from_scores_real if loss_info['loss_computation'] == 'interpolated' else compute_loss_from_scores,
                                                                             compute_loss_real = compute_loss_real,
                                                                             compute_loss_cut_real = compute_loss_cut_real,
                                                                             compute_loss_from_scores_real = compute_loss_from_scores_real,
                                                                             get_objval = get_objval,
                                                                             get_L0_penalty = get_L0_penalty,
-                                                                            is_feasible = is_feasible)
+                                                                            is_feasible = is_feasible,
+                                                                            initial_cuts = pooled_cuts)
 
         if lcpa_settings['initial_bound_updates']:
             bounds.update(initial_bounds)
@@ -158,6 +232,14 @@ def setup_lattice_cpa(data, constraints, settings = DEFAULT_LCPA_SETTINGS):
     risk_slim_indices['C_0_nnz'] = C_0_nnz
     risk_slim_indices['L0_reg_ind'] = L0_reg_ind
 
+    # cuts from the initialization procedure already include the pooled cuts
+    if pooled_cuts is not None and initial_cuts is None:
+        cut_idx = risk_slim_indices['loss'] + risk_slim_indices['rho']
+        initial_cuts = {
+            'coefs': [[cut_idx, coefs.tolist()] for coefs in pooled_cuts['coefs']],
+            'lhs': pooled_cuts['lhs'].tolist(),
+            }
+
     # mip
     mip_objects = {
         'mip': risk_slim_mip,
@@ -206,11 +288,20 @@ def finish_lattice_cpa(data, constraints, mip_objects, settings = DEFAULT_LCPA_S
      compute_loss_from_scores,
      compute_loss_real,
      compute_loss_cut_real,
-     compute_loss_from_scores_real) = setup_loss_functions(data = data,
+     compute_loss_from_scores_real,
+     compute_loss_from_scores_real_batch,
+     loss_info) = setup_loss_functions(data = data,
                                                            coef_set = constraints['coef_set'],
                                                            L0_max = constraints['L0_max'],
                                                            loss_computation = settings['loss_computation'],
-                                                           w_pos = settings['w_pos'])
+                                                           w_pos = settings['w_pos'],
+                                                           compress_rows = settings['compress_rows'],
+                                                           n_threads = settings['loss_n_threads'],
+                                                           deterministic = settings['loss_deterministic'],
+                                                           block_size = settings['loss_block_size'],
+                                                           interpolation_error = settings['loss_interpolation_error'],
+                                                           integer_lookup = settings['loss_integer_lookup'],
+                                                           table_cache_dir = settings['lookup_table_cache_dir'])
 
     # data
     N, P = Z.shape
@@ -267,12 +358,16 @@ def finish_lattice_cpa(data, constraints, mip_objects, settings = DEFAULT_LCPA_S
         'n_incumbent_updates': 0,
         'n_heuristic_updates': 0,
         'n_cuts': 0,
+        'n_cut_cache_hits': 0,
         'n_polished': 0,
         'n_rounded': 0,
         'n_rounded_then_polished': 0,
+        'n_heuristic_worker_tasks': 0,
         #
         # total # of bound updates
         'n_update_bounds_calls': 0,
+        'n_checkpoints': 0,
+        'n_cut_pool_cuts': 0,
         'n_bound_updates': 0,
         'n_bound_updates_loss_min': 0,
         'n_bound_updates_loss_max': 0,
@@ -280,12 +375,39 @@ def finish_lattice_cpa(data, constraints, mip_objects, settings = DEFAULT_LCPA_S
         'n_bound_updates_L0_max': 0,
         'n_bound_updates_objval_min': 0,
         'n_bound_updates_objval_max': 0,
+        #
+        # score cache statistics
+        'n_score_cache_hits': 0,
+        'n_score_cache_misses': 0,
+        'n_score_cache_updates': 0,
+        'score_cache_memory': 0,
+        #
+        # error of the mixed-precision loss at the incumbent
+        'loss_precision_error': float('nan'),
         }
 
     lcpa_cut_queue = FastSolutionPool(P)
     lcpa_polish_queue = FastSolutionPool(P)
 
     heuristic_flag = lcpa_settings['round_flag'] or lcpa_settings['polish_flag']
+    score_cache = None
+    heuristic_pool = None
+
+    # loss bounds for each value of L0_max, which are used to tighten loss_min/loss_max when L0_max is reduced
+    # the bounds require a pass over Z, so LossCallback only computes them if L0_max is reduced during B&B
+    if lcpa_settings['chained_updates_flag'] and lcpa_settings['loss_bounds_by_L0_flag']:
+        loss_bounds_by_L0_handle = lambda: get_loss_bounds_by_L0(Z, rho_ub, rho_lb, L0_reg_ind, L0_max, sample_weights = loss_info.get('sample_weights'))
+    else:
+        loss_bounds_by_L0_handle = None
+
+    # cuts in the LossCallback are computed using preallocated buffers when possible
+    # cuts from the mixed-precision loss can remove feasible points, so mixed-precision runs compute cuts in float64
+    if loss_info['loss_computation'] == 'mixed':
+        callback_loss_cut = compute_loss_cut_real
+    elif 'loss_workspace' in loss_info:
+        callback_loss_cut = loss_info['loss_workspace'].loss_value_and_slope
+    else:
+        callback_loss_cut = compute_loss_cut
 
     if heuristic_flag:
 
@@ -293,17 +415,28 @@ def finish_lattice_cpa(data, constraints, mip_objects, settings = DEFAULT_LCPA_S
         loss_cb.initialize(indices = indices,
                            control = control,
                            settings = lcpa_settings,
-                           compute_loss_cut = compute_loss_cut,
+                           compute_loss_cut = callback_loss_cut,
                            get_alpha = get_alpha,
                            get_L0_penalty_from_alpha = get_L0_penalty_from_alpha,
+                           get_loss_bounds_by_L0 = loss_bounds_by_L0_handle,
                            initial_cuts = initial_cuts,
                            cut_queue = lcpa_cut_queue,
                            polish_queue = lcpa_polish_queue)
 
         heuristic_cb = risk_slim_mip.register_callback(PolishAndRoundCallback)
+        if lcpa_settings['heuristic_n_workers'] > 0:
+            heuristic_pool = HeuristicWorkerPool(data, constraints, settings, n_workers = lcpa_settings['heuristic_n_workers'])
         active_set_flag = L0_max <= trivial_L0_max
-        polishing_handle = lambda rho: discrete_descent(rho, Z, C_0, rho_ub, rho_lb, get_L0_penalty, compute_loss_from_scores, active_set_flag)
-        rounding_handle = lambda rho, cutoff: sequential_rounding(rho, Z, C_0, compute_loss_from_scores_real, get_L0_penalty, cutoff)
+        if lcpa_settings['score_cache_size'] > 0:
+            score_cache = ScoreCache(Z, max_size = lcpa_settings['score_cache_size'])
+        polishing_handle = setup_polishing_handle(Z, C_0, rho_ub, rho_lb, get_L0_penalty, compute_loss_from_scores, loss_info,
+                                                  active_set_flag = active_set_flag,
+                                                  polishing_method = lcpa_settings['polishing_method'],
+                                                  score_cache = score_cache,
+                                                  compute_loss_real = compute_loss_real if loss_info['loss_computation'] == 'interpolated' else None)
+        rounding_handle = setup_rounding_handle(Z, C_0, get_L0_penalty, compute_loss_from_scores_real, compute_loss_from_scores_real_batch,
+                                                rounding_method = lcpa_settings['rounding_method'],
+                                                score_cache = score_cache)
         heuristic_cb.initialize(indices = indices,
                                 control = control,
                                 settings = lcpa_settings,
@@ -313,16 +446,18 @@ def finish_lattice_cpa(data, constraints, mip_objects, settings = DEFAULT_LCPA_S
                                 get_L0_norm = get_L0_norm,
                                 is_feasible = is_feasible,
                                 polishing_handle = polishing_handle,
-                                rounding_handle = rounding_handle)
+                                rounding_handle = rounding_handle,
+                                heuristic_pool = heuristic_pool)
 
     else:
         loss_cb = risk_slim_mip.register_callback(LossCallback)
         loss_cb.initialize(indices = indices,
                            control = control,
                            settings = lcpa_settings,
-                           compute_loss_cut = compute_loss_cut,
+                           compute_loss_cut = callback_loss_cut,
                            get_alpha = get_alpha,
                            get_L0_penalty_from_alpha = get_L0_penalty_from_alpha,
+                           get_loss_bounds_by_L0 = loss_bounds_by_L0_handle,
                            initial_cuts = initial_cuts)
 
     # attach solution pool
@@ -338,10 +473,21 @@ def finish_lattice_cpa(data, constraints, mip_objects, settings = DEFAULT_LCPA_S
 
     # solve using lcpa
     control['start_time'] = time.time()
-    risk_slim_mip.solve()
+    try:
+        risk_slim_mip.solve()
+    finally:
+        if heuristic_pool is not None:
+            heuristic_pool.close()
     control['total_run_time'] = time.time() - control['start_time']
     control.pop('start_time')
 
+    # record score cache statistics
+    if score_cache is not None:
+        control['n_score_cache_hits'] = score_cache.n_hits
+        control['n_score_cache_misses'] = score_cache.n_misses
+        control['n_score_cache_updates'] = score_cache.n_updates
+        control['score_cache_memory'] = score_cache.nbytes
+
     # record mip solution statistics
     try:
         control['incumbent'] = np.array(risk_slim_mip.solution.get_values(indices['rho']))
@@ -352,6 +498,25 @@ def finish_lattice_cpa(data, constraints, mip_objects, settings = DEFAULT_LCPA_S
     except CplexError:
         control['found_solution'] = False
 
+    # save the final state of LCPA
+    if lcpa_settings['checkpoint_file'] is not None:
+        loss_cb.save_checkpoint()
+
+    # add cuts to the cut pool for the data
+    if lcpa_settings['cut_pool_dir'] is not None and len(loss_cb.recorded_cut_rhs) > 0:
+        control['n_cut_pool_cuts'] = append_to_cut_pool(lcpa_settings['cut_pool_dir'],
+                                                        get_data_fingerprint(data, settings['w_pos']),
+                                                        cut_coefs = loss_cb.recorded_cut_coefs,
+                                                        cut_rhs = loss_cb.recorded_cut_rhs,
+                                                        max_cuts = lcpa_settings['cut_pool_max_cuts'])
+
+    # compare the mixed-precision loss with the float64 loss at the incumbent
+    if loss_info['loss_computation'] == 'mixed' and control['found_solution']:
+        control['loss_precision_error'] = check_loss_precision(compute_loss,
+                                                               compute_loss_real,
+                                                               control['incumbent'],
+                                                               max_error = loss_info['get_loss_error_bound'](control['incumbent']))
+
     control['cplex_status'] = risk_slim_mip.solution.get_status_string()
     control['total_callback_time'] = control['total_cut_callback_time'] + control['total_heuristic_callback_time']
     control['total_solver_time'] = control['total_run_time'] - control['total_callback_time']
@@ -381,6 +546,12 @@ def finish_lattice_cpa(data, constraints, mip_objects, settings = DEFAULT_LCPA_S
         'risk_slim_idx': indices
         }
 
+    if lcpa_settings['record_loss_cuts']:
+        mip_info['loss_cuts'] = {
+            'coefs': np.reshape(np.array(loss_cb.recorded_cut_coefs, dtype = np.float_), (-1, P + 1)),
+            'lhs': np.array(loss_cb.recorded_cut_rhs, dtype = np.float_),
+            }
+
     # Output for LCPA
     lcpa_info = dict(control)
     lcpa_info['bounds'] = dict(bounds)
@@ -413,7 +584,7 @@ class LossCallback(LazyConstraintCallback):
       requires settings['chained_updates_flag'] = True
     """
 
-    def initialize(self, indices, control, settings, compute_loss_cut, get_alpha, get_L0_penalty_from_alpha, initial_cuts = None, cut_queue = None, polish_queue = None):
+    def initialize(self, indices, control, settings, compute_loss_cut, get_alpha, get_L0_penalty_from_alpha, get_loss_bounds_by_L0 = None, initial_cuts = None, cut_queue = None, polish_queue = None):
 
         assert isinstance(indices, dict)
         assert isinstance(control, dict)
@@ -437,11 +608,35 @@ class LossCallback(LazyConstraintCallback):
         self.C_0_nnz = indices['C_0_nnz']
         self.compute_loss_cut = compute_loss_cut
         self.get_alpha = get_alpha
+
+        # buffer for the coefficients of each cut: [1.0, -loss_slope]
+        self.cut_coefs = np.ones(len(self.cut_idx))
+        self.cut_slope_coefs = self.cut_coefs[1:]
         self.get_L0_penalty_from_alpha = get_L0_penalty_from_alpha
 
+        # loss bounds for each value of L0_max are computed the first time that chained updates reduce L0_max
+        assert get_loss_bounds_by_L0 is None or callable(get_loss_bounds_by_L0)
+        self.get_loss_bounds_by_L0 = get_loss_bounds_by_L0
+        self.loss_bounds_by_L0 = None
+        self.initial_L0_max = control['bounds']['L0_max']
+
         # cplex has the ability to drop cutting planes that are not used. by default, we force CPLEX to use all cutting planes.
         self.loss_cut_purge_flag = self.use_constraint.purge if self.settings['purge_loss_cuts'] else self.use_constraint.force
 
+        # record all cuts so that the state of LCPA can be saved to checkpoint_file and the cuts can be added to the cut pool
+        self.checkpoint_file = self.settings['checkpoint_file']
+        self.record_cuts = self.checkpoint_file is not None or self.settings['cut_pool_dir'] is not None or self.settings['record_loss_cuts']
+        if self.record_cuts:
+            self.recorded_cut_coefs = []
+            self.recorded_cut_rhs = []
+            self.last_checkpoint_time = time.time()
+
+        # memoize cuts at integer solutions since CPLEX and the heuristics report the same solutions many times
+        if self.settings['loss_cut_cache_max_memory'] > 0.0:
+            self.loss_cut_cache = LossCutCache(max_memory = self.settings['loss_cut_cache_max_memory'])
+        else:
+            self.loss_cut_cache = None
+
         # setup pointer to cut_queue to receive cuts from PolishAndRoundCallback
         if self.settings['add_cuts_at_heuristic_solutions']:
             if cut_queue is None:
@@ -470,21 +665,73 @@ class LossCallback(LazyConstraintCallback):
 
     def add_loss_cut(self, rho):
 
-        loss_value, loss_slope = self.compute_loss_cut(rho)
+        cut = None if self.loss_cut_cache is None else self.loss_cut_cache.get(rho)
+        cache_hit = cut is not None
 
-        self.add(constraint = [self.cut_idx, [1.0] + (-loss_slope).tolist()],
+        if cache_hit:
+            loss_value, loss_slope = cut
+            self.control['n_cut_cache_hits'] += 1
+        else:
+            loss_value, loss_slope = self.compute_loss_cut(rho)
+            if self.loss_cut_cache is not None:
+                self.loss_cut_cache.put(rho, loss_value, loss_slope)
+
+        # cuts are always added since CPLEX may have removed a previous copy of the cut (e.g. during presolve)
+        np.negative(loss_slope, out = self.cut_slope_coefs)
+        cut_rhs = float(loss_value - loss_slope.dot(rho))
+        self.add(constraint = [self.cut_idx, self.cut_coefs.tolist()],
                  sense = "G",
-                 rhs = float(loss_value - loss_slope.dot(rho)),
+                 rhs = cut_rhs,
                  use = self.loss_cut_purge_flag)
 
+        # cuts from the cache were recorded when they were computed
+        if self.record_cuts and not cache_hit:
+            self.recorded_cut_coefs.append(self.cut_coefs.copy())
+            self.recorded_cut_rhs.append(cut_rhs)
+
+        self.control['n_cuts'] += 1
         return loss_value
 
+    def save_checkpoint(self):
+        """
+        saves the cuts, the incumbent, the solutions in the polish/cut queues and the bounds to checkpoint_file
+        """
+        pool = FastSolutionPool(len(self.rho_idx))
+        if not np.any(np.isnan(self.control['incumbent'])):
+            pool.add(self.control['upperbound'], self.control['incumbent'])
+
+        for queue in (getattr(self, 'polish_queue', None), getattr(self, 'cut_queue', None)):
+            if queue is not None and len(queue) > 0:
+                pool.add(queue.objvals, queue.solutions)
+
+        save_checkpoint(self.checkpoint_file,
+                        c0_value = self.settings['c0_value'],
+                        cut_coefs = self.recorded_cut_coefs,
+                        cut_rhs = self.recorded_cut_rhs,
+                        pool_objvals = pool.objvals,
+                        pool_solutions = pool.solutions,
+                        bounds = self.control['bounds'],
+                        lowerbound = self.control['lowerbound'])
+
+        self.last_checkpoint_time = time.time()
+        self.control['n_checkpoints'] += 1
+
     def update_bounds(self):
 
         bounds = chained_updates(bounds = self.control['bounds'],
                                  C_0_nnz = self.C_0_nnz,
                                  new_objval_at_relaxation = self.control['lowerbound'],
-                                 new_objval_at_feasible = self.control['upperbound'])
+                                 new_objval_at_feasible = self.control['upperbound'],
+                                 loss_bounds_by_L0 = self.loss_bounds_by_L0)
+
+        # compute loss bounds for each value of L0_max once L0_max is reduced, then redo the updates with them
+        if self.loss_bounds_by_L0 is None and self.get_loss_bounds_by_L0 is not None and bounds['L0_max'] < self.initial_L0_max:
+            self.loss_bounds_by_L0 = self.get_loss_bounds_by_L0()
+            bounds = chained_updates(bounds = self.control['bounds'],
+                                     C_0_nnz = self.C_0_nnz,
+                                     new_objval_at_relaxation = self.control['lowerbound'],
+                                     new_objval_at_feasible = self.control['upperbound'],
+                                     loss_bounds_by_L0 = self.loss_bounds_by_L0)
 
         #add cuts if bounds need to be tighter
         if bounds['loss_min'] > self.control['bounds']['loss_min']:
@@ -531,6 +778,9 @@ class LossCallback(LazyConstraintCallback):
             print_log('adding %1.0f initial cuts' % len(self.initial_cuts['lhs']))
             for cut, lhs in zip(self.initial_cuts['coefs'], self.initial_cuts['lhs']):
                 self.add(constraint = cut, sense = "G", rhs = lhs, use = self.loss_cut_purge_flag)
+                if self.record_cuts:
+                    self.recorded_cut_coefs.append(get_dense_cut(cut, self.cut_idx))
+                    self.recorded_cut_rhs.append(lhs)
             self.initial_cuts = None
 
         # get integer feasible solution
@@ -546,7 +796,6 @@ class LossCallback(LazyConstraintCallback):
         cut_start_time = time.time()
         loss_value = self.add_loss_cut(rho)
         cut_time = time.time() - cut_start_time
-        cuts_added = 1
 
         # if solution updates incumbent, then add solution to queue for polishing
         current_upperbound = float(loss_value + self.get_L0_penalty_from_alpha(alpha))
@@ -570,7 +819,6 @@ class LossCallback(LazyConstraintCallback):
                 for cut_rho in self.cut_queue.solutions:
                     self.add_loss_cut(cut_rho)
                 cut_time += time.time() - cut_start_time
-                cuts_added += len(self.cut_queue)
                 self.cut_queue.clear()
 
         # update bounds
@@ -579,8 +827,11 @@ class LossCallback(LazyConstraintCallback):
                 self.control['n_update_bounds_calls'] += 1
                 self.update_bounds()
 
+        # save the state of LCPA periodically
+        if self.checkpoint_file is not None and time.time() - self.last_checkpoint_time > self.settings['checkpoint_interval']:
+            self.save_checkpoint()
+
         # record metrics at end
-        self.control['n_cuts'] += cuts_added
         self.control['total_cut_time'] += cut_time
         self.control['total_cut_callback_time'] += time.time() - callback_start_time
         #print_log('left cut callback')
@@ -607,12 +858,16 @@ class PolishAndRoundCallback(HeuristicCallback):
 
     - Feasible solutions are passed to LazyCutConstraintCallback via cut_queue
 
+    - Rounding and polishing run in the worker processes of heuristic_pool. Each call sends new solutions to the workers
+      and collects the solutions they produced since the previous call without waiting. Requires
+      settings['heuristic_n_workers'] > 0.
+
     Known issues:
 
     - Sometimes CPLEX does not return an integer feasible solution (in which case we correct this manually)
     """
 
-    def initialize(self, indices, control, settings, cut_queue, polish_queue, get_objval, get_L0_norm, is_feasible, polishing_handle, rounding_handle):
+    def initialize(self, indices, control, settings, cut_queue, polish_queue, get_objval, get_L0_norm, is_feasible, polishing_handle, rounding_handle, heuristic_pool = None):
 
         #todo: add basic assertions to make sure that nothing weird is going on
         assert isinstance(indices, dict)
@@ -660,6 +915,7 @@ class PolishAndRoundCallback(HeuristicCallback):
         self.is_feasible = is_feasible
         self.polishing_handle = polishing_handle
         self.rounding_handle = rounding_handle
+        self.heuristic_pool = heuristic_pool
 
         return
 
@@ -685,7 +941,7 @@ class PolishAndRoundCallback(HeuristicCallback):
         # todo write rounding/polishing as separate function calls
 
         #print_log('in heuristic callback')
-        if not (self.round_flag or self.polish_flag):
+        if not (self.round_flag or self.polish_flag or (self.heuristic_pool is not None and len(self.heuristic_pool) > 0)):
             return
 
         callback_start_time = time.time()
@@ -718,6 +974,13 @@ class PolishAndRoundCallback(HeuristicCallback):
         # update flags on whether or not to keep rounding / polishing
         self.update_heuristic_flags(n_cuts = self.control['n_cuts'], relative_gap = self.control['relative_gap'])
 
+        # run heuristics in worker processes without waiting for them to finish
+        if self.heuristic_pool is not None:
+            best_objval, best_solution = self.run_heuristics_in_workers(lowerbound_update)
+            self.propose_solution(best_objval, best_solution)
+            self.control['total_heuristic_callback_time'] += time.time() - callback_start_time
+            return
+
         #variables to store best objective value / solution from heuristics
         best_objval = float('inf')
         best_solution = None
@@ -726,14 +989,7 @@ class PolishAndRoundCallback(HeuristicCallback):
         if self.round_flag and lowerbound_update:
 
             rho_cts = np.array(self.get_values(self.rho_idx))
-            zero_idx_rho_ceil = np.equal(np.ceil(rho_cts), 0)
-            zero_idx_rho_floor = np.equal(np.floor(rho_cts), 0)
-            cannot_round_to_zero = np.logical_not(np.logical_or(zero_idx_rho_ceil, zero_idx_rho_floor))
-            min_l0_norm = np.count_nonzero(cannot_round_to_zero[self.L0_reg_ind])
-            max_l0_norm = np.count_nonzero(rho_cts[self.L0_reg_ind])
-            rounded_solution_is_feasible = (min_l0_norm < self.control['bounds']['L0_max'] and max_l0_norm > self.control['bounds']['L0_min'])
-
-            if rounded_solution_is_feasible:
+            if self.rounded_solution_is_feasible(rho_cts):
 
                 rounding_cutoff = self.rounding_tolerance * self.control['upperbound']
                 rounding_start_time = time.time()
@@ -814,6 +1070,14 @@ class PolishAndRoundCallback(HeuristicCallback):
                 if len(polished_queue) > 0:
                     best_objval, best_solution = polished_queue.get_best_objval_and_solution()
 
+        self.propose_solution(best_objval, best_solution)
+        self.control['total_heuristic_callback_time'] += time.time() - callback_start_time
+        #print_log('left heuristic callback')
+        return
+
+
+    def propose_solution(self, best_objval, best_solution):
+
         # if heuristics produces a better solution then update the incumbent
         heuristic_update = best_objval < self.control['upperbound']
         if heuristic_update:
@@ -821,11 +1085,82 @@ class PolishAndRoundCallback(HeuristicCallback):
             proposed_solution, proposed_objval = convert_to_risk_slim_cplex_solution(indices = self.indices, rho = best_solution, objval = best_objval)
             self.set_solution(solution = proposed_solution, objective_value = proposed_objval)
 
-        self.control['total_heuristic_callback_time'] += time.time() - callback_start_time
-        #print_log('left heuristic callback')
         return
 
 
+    def rounded_solution_is_feasible(self, rho_cts):
+
+        # rounding can only produce a feasible solution if it can satisfy the bounds on the L0 norm
+        zero_idx_rho_ceil = np.equal(np.ceil(rho_cts), 0)
+        zero_idx_rho_floor = np.equal(np.floor(rho_cts), 0)
+        cannot_round_to_zero = np.logical_not(np.logical_or(zero_idx_rho_ceil, zero_idx_rho_floor))
+        min_l0_norm = np.count_nonzero(cannot_round_to_zero[self.L0_reg_ind])
+        max_l0_norm = np.count_nonzero(rho_cts[self.L0_reg_ind])
+        return min_l0_norm < self.control['bounds']['L0_max'] and max_l0_norm > self.control['bounds']['L0_min']
+
+
+    def run_heuristics_in_workers(self, lowerbound_update):
+        """
+        collects the solutions produced by heuristic_pool since the last call, then sends the continuous solution
+        (if the lower bound was updated) and the solutions in polish_queue to heuristic_pool without waiting
+
+        Returns
+        -------
+        best_objval, best_solution of the feasible solutions collected from heuristic_pool
+        """
+        best_objval = float('inf')
+        best_solution = None
+        L0_min, L0_max = self.control['bounds']['L0_min'], self.control['bounds']['L0_max']
+
+        # collect results from finished tasks (bounds may have changed since the tasks were sent)
+        for result in self.heuristic_pool.collect():
+
+            for field in ('rounded', 'polished'):
+                if result[field] is None:
+                    continue
+                objval, solution = result[field]
+                if self.settings['add_cuts_at_heuristic_solutions']:
+                    self.cut_queue.add(objval, solution)
+                if objval < best_objval and self.is_feasible(solution, L0_min = L0_min, L0_max = L0_max):
+                    best_objval, best_solution = objval, solution
+
+            if result['task'] == 'round':
+                self.control['n_rounded'] += 1
+                self.control['total_round_time'] += result['round_time']
+                if result['polished'] is not None:
+                    self.control['n_rounded_then_polished'] += 1
+                    self.control['total_round_then_polish_time'] += result['polish_time']
+            else:
+                self.control['n_polished'] += 1
+                self.control['total_polish_time'] += result['polish_time']
+
+        # send continuous solution to be rounded if lower bound was updated since the last call
+        if self.round_flag and lowerbound_update:
+            rho_cts = np.array(self.get_values(self.rho_idx))
+            if self.rounded_solution_is_feasible(rho_cts):
+                rounding_cutoff = self.rounding_tolerance * self.control['upperbound']
+                if self.heuristic_pool.submit_rounding(rho_cts, rounding_cutoff, self.polish_rounded_solutions):
+                    self.control['n_heuristic_worker_tasks'] += 1
+
+        # send solutions in polish_queue to be polished
+        if self.polish_flag and len(self.polish_queue) > 0:
+            current_upperbound = min(best_objval, self.control['upperbound'])
+            self.polish_queue.filter_sort_unique(max_objval = self.polishing_tolerance * current_upperbound)
+            n_sent = 0
+            for solution in self.polish_queue.solutions:
+                if n_sent >= self.polishing_max_solutions or not self.heuristic_pool.submit_polishing(solution):
+                    break
+                n_sent += 1
+
+            # solutions that were not sent stay in polish_queue until a later call
+            unsent_objvals, unsent_solutions = self.polish_queue.objvals[n_sent:], self.polish_queue.solutions[n_sent:]
+            self.polish_queue.clear()
+            self.polish_queue.add(unsent_objvals, unsent_solutions)
+            self.control['n_heuristic_worker_tasks'] += n_sent
+
+        return best_objval, best_solution
+
+
 # DATA CONVERSION
 def is_integer(x):
     """
@@ -0,0 +1,90 @@
+import os
+import re
+from pathlib import Path
+import numpy as np
+
+# each table is stored as a .npy file containing a 2 x (s_max - s_min + 1) array
+# row 0 is the loss value table and row 1 is the probability table for the scores s_min, s_min + 1, ..., s_max
+TABLE_FILE_PREFIX = 'logistic_loss_table'
+TABLE_FILE_PATTERN = re.compile(r'^%s_(-?\d+)_(-?\d+)\.npy$' % TABLE_FILE_PREFIX)
+
+
+def get_table_file_name(s_min, s_max):
+    return '%s_%d_%d.npy' % (TABLE_FILE_PREFIX, s_min, s_max)
+
+
+def find_cached_table(cache_dir, s_min, s_max):
+    """
+    returns the smallest table in cache_dir that covers the scores s_min...s_max
+
+    Parameters
+    ----------
+    cache_dir           directory containing cached tables
+    s_min               smallest score
+    s_max               largest score
+
+    Returns
+    -------
+    (table_file, table_min, table_max) for the smallest table such that table_min <= s_min and s_max <= table_max,
+    or None if no such table exists
+    """
+    cache_dir = Path(cache_dir)
+    if not cache_dir.is_dir():
+        return None
+
+    best = None
+    for table_file in cache_dir.iterdir():
+        match = TABLE_FILE_PATTERN.match(table_file.name)
+        if match is None:
+            continue
+        table_min, table_max = int(match.group(1)), int(match.group(2))
+        if table_min <= s_min and s_max <= table_max:
+            if best is None or (table_max - table_min) < (best[2] - best[1]):
+                best = (table_file, table_min, table_max)
+
+    return best
+
+
+def get_cached_loss_value_and_prob_tables(s_min, s_max, cache_dir):
+    """
+    returns the lookup tables for the logistic loss on the scores s_min...s_max using tables stored in cache_dir
+
+    the tables are memory-mapped so that processes that use the same cache_dir share one physical copy. if cache_dir
+    contains a table for a wider range of scores, the tables are views of the wider table. otherwise, the tables are
+    computed with get_loss_value_and_prob_tables and stored in cache_dir.
+
+    Parameters
+    ----------
+    s_min               smallest score
+    s_max               largest score
+    cache_dir           directory used to store the tables (created if it does not exist)
+
+    Returns
+    -------
+    loss_value_table    numpy.array (memory-mapped) with loss values for the scores s_min...s_max
+    prob_value_table    numpy.array (memory-mapped) with probabilities for the scores s_min...s_max
+    lookup_offset       offset such that table[s + lookup_offset] corresponds to the score s
+    """
+    s_min, s_max = int(np.floor(s_min)), int(np.ceil(s_max))
+    assert s_min <= s_max
+
+    cached_table = find_cached_table(cache_dir, s_min, s_max)
+    if cached_table is None:
+        from .loss_functions.lookup_log_loss import get_loss_value_and_prob_tables
+        loss_value_table, prob_value_table, _ = get_loss_value_and_prob_tables(s_min, s_max)
+
+        # write to a temporary file first so that other processes never read a partially written table
+        cache_dir = Path(cache_dir)
+        cache_dir.mkdir(parents = True, exist_ok = True)
+        table_file = cache_dir / get_table_file_name(s_min, s_max)
+        tmp_file = cache_dir / ('%s.%d.tmp' % (table_file.name, os.getpid()))
+        with open(tmp_file, 'wb') as f:
+            np.save(f, np.vstack([loss_value_table, prob_value_table]))
+        os.replace(tmp_file, table_file)
+        cached_table = (table_file, s_min, s_max)
+
+    # copy-on-write mapping: pages are shared between processes, and the kernels require writeable buffers
+    table_file, table_min, _ = cached_table
+    tables = np.load(table_file, mmap_mode = 'c')
+    start, end = s_min - table_min, s_max - table_min + 1
+    return tables[0, start:end], tables[1, start:end], -s_min
@@ -0,0 +1,277 @@
+import sys
+import cython
+import numpy as np
+cimport numpy as np
+cimport libc.math as math
+
+DTYPE = np.float64
+ctypedef np.float64_t DTYPE_T
+ctypedef np.uint64_t WORD_T
+
+cdef extern from *:
+    int __builtin_ctzll(unsigned long long) nogil
+    int __builtin_popcountll(unsigned long long) nogil
+
+
+cdef class BinaryMatrix:
+    """
+    bit-packed representation of Z = X * Y for binary features X[i,j] in {0,1} and labels Y[i] in {-1,+1}
+
+    each column of X is stored as ceil(N/64) 64-bit words where bit b of word w is X[64*w + b, j]
+    and the labels are stored separately, so that Z[i,j] = X[i,j] * Y[i]. This uses 1 bit per entry
+    instead of the 64 bits used by a float64 array.
+
+    scores are computed by iterating over the set bits of each column, and a single-column change
+    (scores += step * Z[:, j]) only touches the rows where X[i,j] = 1.
+    """
+    cdef readonly int N
+    cdef readonly int P
+    cdef readonly int n_words
+    cdef np.ndarray bits
+    cdef np.ndarray labels
+
+    def __init__(self, X, Y):
+        """
+        Parameters
+        ----------
+        X           numpy.array of binary features with shape = (n_rows, n_cols)
+        Y           numpy.array of labels (+1/-1) with shape = (n_rows,) or (n_rows, 1)
+        """
+        assert sys.byteorder == 'little', 'BinaryMatrix requires a little-endian machine'
+        X = np.asarray(X)
+        assert X.ndim == 2
+        assert np.all((X == 0) | (X == 1)), 'X must only contain 0/1 entries'
+        Y = np.asarray(Y, dtype = DTYPE).flatten()
+        assert len(Y) == X.shape[0]
+        assert np.all((Y == 1) | (Y == -1)), 'Y must only contain -1/+1 entries'
+
+        self.N, self.P = X.shape
+        self.n_words = (self.N + 63) // 64
+
+        packed = np.packbits(np.asarray(X, dtype = np.uint8).T, axis = 1, bitorder = 'little')
+        padded = np.zeros((self.P, 8 * self.n_words), dtype = np.uint8)
+        padded[:, 0:packed.shape[1]] = packed
+        self.bits = np.ascontiguousarray(padded.view(np.dtype('<u8')))
+        self.labels = np.ascontiguousarray(Y)
+
+    @property
+    def shape(self):
+        return self.N, self.P
+
+    @property
+    def nbytes(self):
+        return self.bits.nbytes + self.labels.nbytes
+
+    @property
+    def is_integer(self):
+        return True
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    def column_nnz(self):
+        """
+        returns the # of non-zero entries in each column using popcount
+        """
+        cdef:
+            np.ndarray[WORD_T, ndim=2, mode="c"] bits = self.bits
+            np.ndarray[np.int64_t, ndim=1] nnz = np.zeros(self.P, dtype = np.int64)
+            Py_ssize_t j, w
+        for j in range(self.P):
+            for w in range(self.n_words):
+                nnz[j] += __builtin_popcountll(bits[j, w])
+        return nnz
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    @cython.nonecheck(False)
+    def dot(self, rho):
+        """
+        returns scores = Z.dot(rho)
+        """
+        cdef:
+            np.ndarray[DTYPE_T, ndim=1, mode="c"] coefs = np.require(rho, dtype = DTYPE, requirements = ['C'])
+            np.ndarray[DTYPE_T, ndim=1, mode="c"] scores = np.zeros(self.N, dtype = DTYPE)
+            np.ndarray[DTYPE_T, ndim=1, mode="c"] Y = self.labels
+            np.ndarray[WORD_T, ndim=2, mode="c"] bits = self.bits
+            Py_ssize_t i, j
+
+        assert coefs.shape[0] == self.P
+        with nogil:
+            for j in range(self.P):
+                if coefs[j] != 0.0:
+                    _add_to_set_bits(&bits[j, 0], self.n_words, &scores[0], coefs[j])
+            for i in range(self.N):
+                scores[i] *= Y[i]
+        return scores
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    @cython.nonecheck(False)
+    def tdot(self, v):
+        """
+        returns Z.T.dot(v)
+        """
+        cdef:
+            np.ndarray[DTYPE_T, ndim=1, mode="c"] yv = np.require(v, dtype = DTYPE, requirements = ['C']) * self.labels
+            np.ndarray[DTYPE_T, ndim=1, mode="c"] out = np.empty(self.P, dtype = DTYPE)
+            np.ndarray[WORD_T, ndim=2, mode="c"] bits = self.bits
+            Py_ssize_t j
+
+        assert yv.shape[0] == self.N
+        with nogil:
+            for j in range(self.P):
+                out[j] = _sum_over_set_bits(&bits[j, 0], self.n_words, &yv[0])
+        return out
+
+    @cython.boundscheck(False)
+    @cython.wraparound(False)
+    @cython.nonecheck(False)
+    def add_scaled_column(self, np.ndarray[DTYPE_T, ndim=1] scores, int dim_idx, double step):
+        """
+        updates scores in place to scores + step * Z[:, dim_idx]
+        """
+        cdef:
+            np.ndarray[DTYPE_T, ndim=1, mode="c"] Y = self.labels
+            np.ndarray[WORD_T, ndim=2, mode="c"] bits = self.bits
+            WORD_T word
+            Py_ssize_t w, i
+
+        assert scores.shape[0] == self.N and 0 <= dim_idx < self.P
+        for w in range(self.n_words):
+            word = bits[dim_idx, w]
+            while word:
+                i = 64 * w + __builtin_ctzll(word)
+                scores[i] += step * Y[i]
+                word &= word - 1
+
+    def get_columns(self, dims):
+        """
+        returns Z[:, dims] as a dense numpy.array with shape = (n_rows, len(dims))
+        """
+        dims = np.atleast_1d(dims)
+        out = np.zeros((self.N, len(dims)), dtype = DTYPE, order = 'F')
+        for k, j in enumerate(dims):
+            self.add_scaled_column(out[:, k], int(j), 1.0)
+        return out
+
+    def get_rows(self, start, end):
+        """
+        returns Z[start:end, :] as a dense numpy.array
+        """
+        end = min(end, self.N)
+        start = min(start, end)
+
+        # only unpack the words that contain rows start to end
+        w_start, w_end = start // 64, (end + 63) // 64
+        words = np.ascontiguousarray(self.bits[:, w_start:w_end])
+        offset = 64 * w_start
+        X_rows = np.unpackbits(words.view(np.uint8), axis = 1, bitorder = 'little')[:, (start - offset):(end - offset)].T
+        return X_rows * self.labels[start:end, None]
+
+    def toarray(self):
+        return self.get_rows(0, self.N)
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef void _add_to_set_bits(WORD_T* words, int n_words, DTYPE_T* values, DTYPE_T step) noexcept nogil:
+    cdef:
+        WORD_T word
+        Py_ssize_t w
+    for w in range(n_words):
+        word = words[w]
+        while word:
+            values[64 * w + __builtin_ctzll(word)] += step
+            word &= word - 1
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef DTYPE_T _sum_over_set_bits(WORD_T* words, int n_words, DTYPE_T* values) noexcept nogil:
+    cdef:
+        WORD_T word
+        Py_ssize_t w
+        DTYPE_T total = 0.0
+    for w in range(n_words):
+        word = words[w]
+        while word:
+            total += values[64 * w + __builtin_ctzll(word)]
+            word &= word - 1
+    return total
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(False)
+cdef DTYPE_T _log_loss_value_from_scores(DTYPE_T* scores, Py_ssize_t N) noexcept nogil:
+    cdef:
+        Py_ssize_t i
+        DTYPE_T total_loss = 0.0
+        int zero_score_cnt = 0
+    for i in range(N):
+        if scores[i] < 0:
+            total_loss += math.log(1.0 + math.exp(scores[i])) - scores[i]
+        elif scores[i] > 0:
+            total_loss += math.log1p(math.exp(-scores[i]))
+        else:
+            zero_score_cnt += 1
+    total_loss += zero_score_cnt * math.M_LN2
+    return total_loss/N
+
+
+def log_loss_value(BinaryMatrix Z, rho):
+    """
+    computes the value of the logistic loss when Z is a BinaryMatrix
+
+    Parameters
+    ----------
+    Z           BinaryMatrix containing training data with shape = (n_rows, n_cols)
+    rho         numpy.array of coefficients with shape = (n_cols,)
+
+    Returns
+    -------
+    loss_value  scalar = 1/n_rows * sum(log( 1 .+ exp(-Z*rho))
+    """
+    cdef np.ndarray[DTYPE_T, ndim=1, mode="c"] scores = Z.dot(rho)
+    return _log_loss_value_from_scores(&scores[0], Z.N)
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(False)
+def log_loss_value_and_slope(BinaryMatrix Z, rho):
+    """
+    computes the value and slope of the logistic loss when Z is a BinaryMatrix
+
+    Parameters
+    ----------
+    Z           BinaryMatrix containing training data with shape = (n_rows, n_cols)
+    rho         numpy.array of coefficients with shape = (n_cols,)
+
+    Returns
+    -------
+    loss_value  scalar = 1/n_rows * sum(log( 1 .+ exp(-Z*rho))
+    loss_slope: (n_cols x 1) vector = 1/n_rows * sum(-Z*rho ./ (1+exp(-Z*rho))
+    """
+    cdef:
+        np.ndarray[DTYPE_T, ndim=1, mode="c"] scores = Z.dot(rho)
+        Py_ssize_t i
+        int N = Z.N
+        DTYPE_T total_loss = 0.0
+        DTYPE_T exp_value
+        int zero_score_cnt = 0
+
+    #compute loss and overwrite scores with probs - 1.0
+    for i in range(N):
+        if scores[i] < 0:
+            exp_value = math.exp(scores[i])
+            total_loss += math.log(1.0 + exp_value) - scores[i]
+            scores[i] = (exp_value / (1.0 + exp_value)) - 1.0
+        elif scores[i] > 0:
+            exp_value = math.exp(-scores[i])
+            total_loss += math.log1p(exp_value)
+            scores[i] = (1.0 / (1.0 + exp_value)) - 1.0
+        else:
+            zero_score_cnt += 1
+            scores[i] = -0.5
+
+    total_loss += zero_score_cnt * math.M_LN2
+    return total_loss/N, Z.tdot(scores) / N
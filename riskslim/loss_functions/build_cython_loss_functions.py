@@ -26,7 +26,8 @@ ext_modules = [Extension(name = "fast_log_loss",
                          sources=["fast_log_loss.pyx"],
                          include_dirs=[numpy.get_include(), scipy.get_include()],
                          libraries=["m"],
-                         extra_compile_args = ["-ffast-math"])]
+                         extra_compile_args = ["-ffast-math", "-fopenmp"],
+                         extra_link_args = ["-fopenmp"])]
 
 setup(
     cmdclass = {'build_ext': build_ext},
@@ -47,11 +48,67 @@ setup(
     ext_modules = ext_modules,
 )
 
+#discrete coordinate descent
+ext_modules = [Extension(name = "fast_discrete_descent",
+                         sources=["fast_discrete_descent.pyx"],
+                         include_dirs=[numpy.get_include(), scipy.get_include()],
+                         libraries=["m"],
+                         extra_compile_args = ["-ffast-math"])]
 
+setup(
+    cmdclass = {'build_ext': build_ext},
+    include_dirs = [numpy.get_include(), scipy.get_include()],
+    ext_modules = ext_modules,
+)
 
+#bit-packed binary log loss
+ext_modules = [Extension(name = "binary_log_loss",
+                         sources=["binary_log_loss.pyx"],
+                         include_dirs=[numpy.get_include(), scipy.get_include()],
+                         libraries=["m"],
+                         extra_compile_args = ["-ffast-math"])]
+
+setup(
+    cmdclass = {'build_ext': build_ext},
+    include_dirs = [numpy.get_include(), scipy.get_include()],
+    ext_modules = ext_modules,
+)
 
+#integer lookup log loss
+ext_modules = [Extension(name = "integer_lookup_log_loss",
+                         sources=["integer_lookup_log_loss.pyx"],
+                         include_dirs=[numpy.get_include(), scipy.get_include()],
+                         libraries=["m"],
+                         extra_compile_args = ["-ffast-math"])]
 
+setup(
+    cmdclass = {'build_ext': build_ext},
+    include_dirs = [numpy.get_include(), scipy.get_include()],
+    ext_modules = ext_modules,
+)
 
+#mixed-precision log loss
+ext_modules = [Extension(name = "mixed_log_loss",
+                         sources=["mixed_log_loss.pyx"],
+                         include_dirs=[numpy.get_include(), scipy.get_include()],
+                         libraries=["m"],
+                         extra_compile_args = ["-ffast-math"])]
 
+setup(
+    cmdclass = {'build_ext': build_ext},
+    include_dirs = [numpy.get_include(), scipy.get_include()],
+    ext_modules = ext_modules,
+)
 
+#interpolated log loss
+ext_modules = [Extension(name = "interpolated_log_loss",
+                         sources=["interpolated_log_loss.pyx"],
+                         include_dirs=[numpy.get_include(), scipy.get_include()],
+                         libraries=["m"],
+                         extra_compile_args = ["-ffast-math"])]
 
+setup(
+    cmdclass = {'build_ext': build_ext},
+    include_dirs = [numpy.get_include(), scipy.get_include()],
+    ext_modules = ext_modules,
+)
@@ -0,0 +1,297 @@
+import cython
+import numpy as np
+cimport numpy as np
+cimport scipy.linalg.cython_blas as blas
+cimport libc.math as math
+from libc.string cimport memcpy
+
+DTYPE = np.float64
+ctypedef np.float64_t DTYPE_T
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(False)
+cdef DTYPE_T _log_loss_value_from_scores(DTYPE_T* scores, Py_ssize_t N, DTYPE_T* loss_value_table, int lookup_offset) noexcept nogil:
+
+    cdef:
+        Py_ssize_t i
+        DTYPE_T total_loss = 0.0
+        DTYPE_T s
+        int zero_score_cnt = 0
+
+    if loss_value_table != NULL:
+        for i in range(N):
+            total_loss += loss_value_table[(<int>scores[i]) + lookup_offset]
+        return total_loss/N
+
+    for i in range(N):
+        s = scores[i]
+        if s < 0:
+            total_loss += math.log(1.0 + math.exp(s)) - s
+        elif s > 0:
+            total_loss += math.log1p(math.exp(-s))
+        else:
+            zero_score_cnt += 1
+
+    total_loss += zero_score_cnt * math.M_LN2
+    return total_loss/N
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(False)
+cdef void _add_column(DTYPE_T* scores, DTYPE_T* Z_dim, DTYPE_T step, Py_ssize_t N) noexcept nogil:
+
+    cdef Py_ssize_t i
+    for i in range(N):
+        scores[i] += step * Z_dim[i]
+
+@cython.cdivision(False)
+cdef inline void _update_best(DTYPE_T objval, int coef, DTYPE_T* best_objval, int* best_coef) noexcept nogil:
+    # ties are broken in favor of the smallest coefficient (same as np.nanargmin over sorted coefficients)
+    if objval < best_objval[0] or (objval == best_objval[0] and coef < best_coef[0]):
+        best_objval[0] = objval
+        best_coef[0] = coef
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(False)
+cdef void _search_dim(DTYPE_T* Z_dim,
+                      DTYPE_T* base_scores,
+                      DTYPE_T* scores,
+                      Py_ssize_t N,
+                      DTYPE_T base_loss,
+                      int base_coef,
+                      int coef_lb,
+                      int coef_ub,
+                      DTYPE_T C_0_dim,
+                      DTYPE_T other_dim_penalty,
+                      DTYPE_T* loss_value_table,
+                      int lookup_offset,
+                      DTYPE_T* best_objval,
+                      int* best_coef) noexcept nogil:
+    """
+    finds the value of rho[j] in {coef_lb,...,coef_ub} that minimizes log_loss(rho) + C_0j
+    using the same directional search as heuristics._compute_objvals_at_dim
+    """
+
+    cdef:
+        int n_forward_steps = coef_ub - base_coef
+        int n_backward_steps = base_coef - coef_lb
+        int total_distance_from_base = 0
+        int coef
+        int i
+        bint stop_after_first_forward_step = False
+        bint zero_coef_visited = (base_coef == 0)
+        DTYPE_T best_loss = base_loss
+        DTYPE_T current_loss
+        DTYPE_T first_step
+
+    # objective value at the base coefficient
+    best_objval[0] = base_loss + other_dim_penalty + (C_0_dim if base_coef != 0 else 0.0)
+    best_coef[0] = base_coef
+
+    memcpy(scores, base_scores, N * sizeof(DTYPE_T))
+
+    # start by moving forward
+    for i in range(n_forward_steps):
+        _add_column(scores, Z_dim, 1.0, N)
+        total_distance_from_base += 1
+        current_loss = _log_loss_value_from_scores(scores, N, loss_value_table, lookup_offset)
+        if current_loss >= best_loss:
+            stop_after_first_forward_step = (i == 0)
+            break
+        coef = base_coef + i + 1
+        zero_coef_visited = zero_coef_visited or (coef == 0)
+        _update_best(current_loss + other_dim_penalty + (C_0_dim if coef != 0 else 0.0), coef, best_objval, best_coef)
+        best_loss = current_loss
+
+    # if the first step forward didn't lead to a decrease in loss, then move backwards
+    if stop_after_first_forward_step or n_forward_steps == 0:
+
+        best_loss = base_loss
+        for i in range(n_backward_steps):
+
+            # correct size of first backward step if you took 1 step forward
+            first_step = -2.0 if (i == 0 and n_forward_steps > 0) else -1.0
+            _add_column(scores, Z_dim, first_step, N)
+            total_distance_from_base += <int> first_step
+            current_loss = _log_loss_value_from_scores(scores, N, loss_value_table, lookup_offset)
+            if current_loss >= best_loss:
+                break
+            coef = base_coef - i - 1
+            zero_coef_visited = zero_coef_visited or (coef == 0)
+            _update_best(current_loss + other_dim_penalty + (C_0_dim if coef != 0 else 0.0), coef, best_objval, best_coef)
+            best_loss = current_loss
+
+    # compute value at coef[j] == 0 if needed
+    if C_0_dim > 0.0 and not zero_coef_visited and coef_lb <= 0 <= coef_ub:
+        _add_column(scores, Z_dim, -(base_coef + total_distance_from_base), N)
+        current_loss = _log_loss_value_from_scores(scores, N, loss_value_table, lookup_offset)
+        _update_best(current_loss + other_dim_penalty, 0, best_objval, best_coef)
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(False)
+def discrete_descent(rho,
+                     np.ndarray[DTYPE_T, ndim=2, mode="fortran"] Z,
+                     C_0,
+                     rho_ub,
+                     rho_lb,
+                     loss_value_table = None,
+                     int lookup_offset = 0,
+                     descent_dimensions = None,
+                     active_set_flag = True,
+                     base_scores = None,
+                     int max_iterations = 500,
+                     double min_improvement_per_step = 1e-8):
+    """
+    compiled version of heuristics.discrete_descent
+
+    Given a initial feasible solution, rho, produces an improved solution that is 1-OPT
+    (i.e. the objective value does not decrease by moving in any single dimension)
+    The coordinate descent runs in native code on preallocated buffers. The loss is computed
+    using the logistic loss, or using a lookup table if loss_value_table is not None.
+
+    Parameters
+    ----------
+    rho                         P x 1 vector of integer coefficients
+    Z                           N x P data matrix computed as X * Y (must be Fortran-aligned)
+    C_0                         P x 1 vector of L0 penalties. C_0[j] = L0 penalty for rho[j] (0.0 if rho[j] is not penalized)
+    rho_ub                      P x 1 vector of upper bounds on rho
+    rho_lb                      P x 1 vector of lower bounds on rho
+    loss_value_table            loss value table from lookup_log_loss.get_loss_value_and_prob_tables (optional)
+    lookup_offset               offset for loss_value_table
+    descent_dimensions          dimensions to search (optional; default is all dimensions)
+    active_set_flag             set to True to only search dimensions where rho[j] != 0
+    base_scores                 N x 1 vector of scores at rho, where scores = Z.dot(rho) (optional)
+
+    Returns
+    -------
+    rho                         P x 1 vector of integer coefficients that is 1-OPT
+    base_loss                   loss value at rho
+    base_objval                 objective value at rho
+
+    """
+    cdef:
+        int N = Z.shape[0]
+        int D = Z.shape[1]
+        int incx = 1
+        int incy = 1
+        double alpha = 1.0
+        double beta = 0.0
+        Py_ssize_t j, k, n_dims
+        int n_iterations = 0
+        int best_idx
+        int step
+        DTYPE_T base_loss, base_objval, L0_penalty, next_objval
+        DTYPE_T* table_ptr = NULL
+        np.ndarray[DTYPE_T, ndim=1, mode="fortran"] rho_values
+        np.ndarray[DTYPE_T, ndim=1, mode="fortran"] C_0_values = np.require(C_0, dtype = DTYPE, requirements = ['F'])
+        np.ndarray[int, ndim=1, mode="fortran"] ub_values = np.require(rho_ub, dtype = np.intc, requirements = ['F'])
+        np.ndarray[int, ndim=1, mode="fortran"] lb_values = np.require(rho_lb, dtype = np.intc, requirements = ['F'])
+        np.ndarray[DTYPE_T, ndim=1, mode="fortran"] table
+        np.ndarray[Py_ssize_t, ndim=1, mode="fortran"] dims
+        np.ndarray[DTYPE_T, ndim=1, mode="fortran"] scores_at_rho = np.empty(N, dtype = DTYPE)
+        np.ndarray[DTYPE_T, ndim=1, mode="fortran"] scores = np.empty(N, dtype = DTYPE)
+        np.ndarray[DTYPE_T, ndim=1, mode="fortran"] best_objval_by_dim = np.empty(D, dtype = DTYPE)
+        np.ndarray[int, ndim=1, mode="fortran"] best_coef_by_dim = np.empty(D, dtype = np.intc)
+        np.ndarray[np.uint8_t, ndim=1, mode="fortran"] searched = np.zeros(D, dtype = np.uint8)
+
+    # convert solution to integer
+    rho_values = np.array(np.require(rho, dtype = np.int_), dtype = DTYPE, order = 'F')
+
+    # convert descent dimensions to integer values
+    if descent_dimensions is None:
+        descent_dimensions = np.arange(D)
+    else:
+        descent_dimensions = np.require(descent_dimensions, dtype = np.int_)
+
+    if active_set_flag:
+        descent_dimensions = np.intersect1d(np.flatnonzero(rho_values), descent_dimensions)
+
+    dims = np.require(np.unique(descent_dimensions), dtype = np.intp, requirements = ['F'])
+    n_dims = dims.shape[0]
+
+    if loss_value_table is not None:
+        table = np.require(loss_value_table, dtype = DTYPE, requirements = ['F'])
+        table_ptr = &table[0]
+
+    # compute base scores / loss / objective value
+    if base_scores is not None:
+        scores_at_rho[:] = base_scores
+    elif N > 0 and D > 0:
+        blas.dgemv("N", &N, &D, &alpha, &Z[0,0], &N, &rho_values[0], &incx, &beta, &scores_at_rho[0], &incy)
+    else:
+        scores_at_rho[:] = 0.0
+
+    L0_penalty = 0.0
+    for j in range(D):
+        if rho_values[j] != 0.0:
+            L0_penalty += C_0_values[j]
+
+    base_loss = _log_loss_value_from_scores(&scores_at_rho[0], N, table_ptr, lookup_offset)
+    base_objval = base_loss + L0_penalty
+
+    # the first iteration searches all descent dimensions
+    for k in range(n_dims):
+        searched[dims[k]] = 1
+
+    while n_iterations < max_iterations and n_dims > 0:
+
+        # compute the best objective value / step size in each dimension
+        best_idx = -1
+        with nogil:
+            for k in range(n_dims):
+                j = dims[k]
+                if not searched[j]:
+                    continue
+
+                _search_dim(&Z[0, j],
+                            &scores_at_rho[0],
+                            &scores[0],
+                            N,
+                            base_loss,
+                            <int> rho_values[j],
+                            lb_values[j],
+                            ub_values[j],
+                            C_0_values[j],
+                            L0_penalty - (C_0_values[j] if rho_values[j] != 0.0 else 0.0),
+                            table_ptr,
+                            lookup_offset,
+                            &best_objval_by_dim[j],
+                            &best_coef_by_dim[j])
+
+                # dims are sorted so ties are broken in favor of the smallest index (same as np.nanargmin)
+                if best_idx < 0 or best_objval_by_dim[j] < best_objval_by_dim[best_idx]:
+                    best_idx = j
+
+        if best_idx < 0:
+            break
+
+        next_objval = best_objval_by_dim[best_idx]
+        if next_objval >= base_objval - min_improvement_per_step:
+            break
+
+        # recompute base objective value/loss/scores
+        step = best_coef_by_dim[best_idx] - <int> rho_values[best_idx]
+        if rho_values[best_idx] != 0.0:
+            L0_penalty -= C_0_values[best_idx]
+        rho_values[best_idx] += step
+        if rho_values[best_idx] != 0.0:
+            L0_penalty += C_0_values[best_idx]
+
+        base_objval = next_objval
+        base_loss = base_objval - L0_penalty
+        _add_column(&scores_at_rho[0], &Z[0, best_idx], step, N)
+
+        # remove the current best direction from the set of directions to explore
+        for k in range(n_dims):
+            searched[dims[k]] = 1
+        searched[best_idx] = 0
+        n_iterations += 1
+
+    return rho_values, base_loss, base_objval
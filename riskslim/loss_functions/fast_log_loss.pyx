@@ -3,6 +3,8 @@ import numpy as np
 cimport numpy as np
 cimport scipy.linalg.cython_blas as blas
 cimport libc.math as math
+cimport openmp
+from cython.parallel cimport prange
 
 DTYPE = np.float64
 ctypedef np.float64_t DTYPE_T
@@ -109,3 +111,509 @@ def log_loss_value_from_scores(np.ndarray[DTYPE_T, ndim=1, mode="fortran"] score
 
     total_loss += zero_score_cnt * math.M_LN2
     return total_loss/N
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(False)
+def log_loss_value_batch(np.ndarray[DTYPE_T, ndim=2, mode="fortran"] Z, np.ndarray[DTYPE_T, ndim=2, mode="fortran"] rho_batch):
+
+    cdef:
+        int N = Z.shape[0]
+        int D = Z.shape[1]
+        int K = rho_batch.shape[1]
+        int lda = N
+        int ldb = D
+        int ldc = N
+        double alpha = 1.0
+        double beta = 0.0
+        np.ndarray[DTYPE_T, ndim=2, mode = "fortran"] y = np.empty((N, K), dtype = DTYPE, order = "F")
+        np.ndarray[DTYPE_T, ndim=1, mode = "fortran"] loss_values = np.empty(K, dtype = DTYPE)
+
+    if K == 0:
+        return loss_values
+
+    #compute scores for all candidates
+    #calls dgemm from BLAS which computes y = alpha * Z * rho_batch + beta * y
+    blas.dgemm("N", "N", &N, &K, &D, &alpha, &Z[0,0], &lda, &rho_batch[0,0], &ldb, &beta, &y[0,0], &ldc)
+
+    _loss_values_from_score_matrix(y, loss_values)
+    return loss_values
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(False)
+def log_loss_value_and_slope_batch(np.ndarray[DTYPE_T, ndim=2, mode="fortran"] Z, np.ndarray[DTYPE_T, ndim=2, mode="fortran"] rho_batch):
+
+    cdef:
+        int N = Z.shape[0]
+        int D = Z.shape[1]
+        int K = rho_batch.shape[1]
+        int lda = N
+        int ldb = D
+        int ldc = N
+        double alpha = 1.0
+        double beta = 0.0
+        Py_ssize_t i, k
+        DTYPE_T total_loss
+        DTYPE_T exp_value
+        np.ndarray[DTYPE_T, ndim=2, mode = "fortran"] y = np.empty((N, K), dtype = DTYPE, order = "F")
+        np.ndarray[DTYPE_T, ndim=1, mode = "fortran"] loss_values = np.empty(K, dtype = DTYPE)
+        np.ndarray[DTYPE_T, ndim=2, mode = "fortran"] loss_slopes = np.empty((D, K), dtype = DTYPE, order = "F")
+
+    if K == 0:
+        return loss_values, loss_slopes
+
+    #compute scores for all candidates
+    #calls dgemm from BLAS which computes y = alpha * Z * rho_batch + beta * y
+    blas.dgemm("N", "N", &N, &K, &D, &alpha, &Z[0,0], &lda, &rho_batch[0,0], &ldb, &beta, &y[0,0], &ldc)
+
+    #single pass over scores: accumulate loss values and overwrite scores with probabilities
+    for k in range(K):
+        total_loss = 0.0
+        for i in range(N):
+            if y[i, k] < 0:
+                exp_value = math.exp(y[i, k])
+                total_loss += math.log(1.0 + exp_value) - y[i, k]
+                y[i, k] = (exp_value / (1.0 + exp_value)) - 1.0
+            else:
+                exp_value = math.exp(-y[i, k])
+                total_loss += math.log1p(exp_value)
+                y[i, k] = (1.0 / (1.0 + exp_value)) - 1.0
+        loss_values[k] = total_loss / N
+
+    #compute loss slopes as loss_slopes = 1/N * trans(Z) * y
+    alpha = 1.0/N
+    blas.dgemm("T", "N", &D, &K, &N, &alpha, &Z[0,0], &lda, &y[0,0], &ldc, &beta, &loss_slopes[0,0], &ldb)
+    return loss_values, loss_slopes
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(False)
+def log_loss_value_from_scores_batch(np.ndarray[DTYPE_T, ndim=2, mode="fortran"] scores):
+
+    cdef:
+        np.ndarray[DTYPE_T, ndim=1, mode = "fortran"] loss_values = np.empty(scores.shape[1], dtype = DTYPE)
+
+    _loss_values_from_score_matrix(scores, loss_values)
+    return loss_values
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(False)
+cdef void _loss_values_from_score_matrix(np.ndarray[DTYPE_T, ndim=2, mode="fortran"] scores, np.ndarray[DTYPE_T, ndim=1, mode="fortran"] loss_values):
+
+    cdef:
+        Py_ssize_t N = scores.shape[0]
+        Py_ssize_t K = scores.shape[1]
+        Py_ssize_t i, k
+        DTYPE_T total_loss
+        DTYPE_T s
+        int zero_score_cnt
+
+    #compute loss for each column of the score matrix
+    for k in range(K):
+        total_loss = 0.0
+        zero_score_cnt = 0
+        for i in range(N):
+            s = scores[i, k]
+            if s < 0:
+                total_loss += math.log(1.0 + math.exp(s)) - s
+            elif s > 0:
+                total_loss += math.log1p(math.exp(-s))
+            else:
+                zero_score_cnt += 1
+        total_loss += zero_score_cnt * math.M_LN2
+        loss_values[k] = total_loss / N
+
+##############################################################################################################
+# multi-threaded kernels
+#
+# the per-row exp/log computations are split across n_threads OpenMP threads (n_threads <= 0 uses all cores).
+# if deterministic is True, the rows are split into chunks of DETERMINISTIC_CHUNK_SIZE rows, the loss of each chunk
+# is summed in row order by one thread, and the chunk losses are summed in chunk order. the results do not depend
+# on the number of threads, and match the serial kernels up to rounding error. otherwise, the sum is computed with
+# an OpenMP reduction, which is faster but whose rounding error depends on the number of threads.
+##############################################################################################################
+
+cdef enum:
+    DETERMINISTIC_CHUNK_SIZE = 4096
+
+cdef int _get_num_threads(int n_threads):
+    if n_threads <= 0:
+        return openmp.omp_get_max_threads()
+    return n_threads
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(False)
+cdef DTYPE_T _chunk_loss(DTYPE_T* scores, Py_ssize_t n) noexcept nogil:
+    cdef:
+        Py_ssize_t i
+        DTYPE_T total_loss = 0.0
+    for i in range(n):
+        if scores[i] < 0:
+            total_loss += math.log(1.0 + math.exp(scores[i])) - scores[i]
+        elif scores[i] > 0:
+            total_loss += math.log1p(math.exp(-scores[i]))
+        else:
+            total_loss += math.M_LN2
+    return total_loss
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(False)
+cdef DTYPE_T _chunk_loss_and_probs(DTYPE_T* scores, Py_ssize_t n) noexcept nogil:
+    # overwrites scores with probs - 1.0
+    cdef:
+        Py_ssize_t i
+        DTYPE_T total_loss = 0.0
+        DTYPE_T exp_value
+    for i in range(n):
+        if scores[i] < 0:
+            exp_value = math.exp(scores[i])
+            total_loss += math.log(1.0 + exp_value) - scores[i]
+            scores[i] = (exp_value / (1.0 + exp_value)) - 1.0
+        else:
+            exp_value = math.exp(-scores[i])
+            total_loss += math.log1p(exp_value)
+            scores[i] = (1.0 / (1.0 + exp_value)) - 1.0
+    return total_loss
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(False)
+cdef DTYPE_T _chunked_loss_parallel(DTYPE_T* scores, Py_ssize_t N, int n_threads, bint overwrite_with_probs):
+
+    cdef:
+        Py_ssize_t c, start
+        Py_ssize_t n_chunks = (N + DETERMINISTIC_CHUNK_SIZE - 1) // DETERMINISTIC_CHUNK_SIZE
+        DTYPE_T total_loss = 0.0
+        np.ndarray[DTYPE_T, ndim=1, mode = "fortran"] chunk_loss = np.empty(max(n_chunks, 1), dtype = DTYPE)
+        DTYPE_T* chunk_loss_ptr = &chunk_loss[0]
+
+    for c in prange(n_chunks, nogil = True, num_threads = n_threads, schedule = 'static'):
+        start = c * DETERMINISTIC_CHUNK_SIZE
+        if overwrite_with_probs:
+            chunk_loss_ptr[c] = _chunk_loss_and_probs(scores + start, min(DETERMINISTIC_CHUNK_SIZE, N - start))
+        else:
+            chunk_loss_ptr[c] = _chunk_loss(scores + start, min(DETERMINISTIC_CHUNK_SIZE, N - start))
+
+    for c in range(n_chunks):
+        total_loss += chunk_loss_ptr[c]
+    return total_loss
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(False)
+cdef DTYPE_T _loss_from_scores_parallel(DTYPE_T* scores, Py_ssize_t N, int n_threads, bint deterministic):
+
+    cdef:
+        Py_ssize_t i
+        DTYPE_T total_loss = 0.0
+        DTYPE_T s
+        int zero_score_cnt = 0
+
+    if deterministic:
+        return _chunked_loss_parallel(scores, N, n_threads, False)/N
+
+    for i in prange(N, nogil = True, num_threads = n_threads, schedule = 'static'):
+        s = scores[i]
+        if s < 0:
+            total_loss += math.log(1.0 + math.exp(s)) - s
+        elif s > 0:
+            total_loss += math.log1p(math.exp(-s))
+        else:
+            zero_score_cnt += 1
+
+    total_loss += zero_score_cnt * math.M_LN2
+    return total_loss/N
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(False)
+def log_loss_value_parallel(np.ndarray[DTYPE_T, ndim=2, mode="fortran"] Z, np.ndarray[DTYPE_T, ndim=1, mode="fortran"] rho, int n_threads = 0, bint deterministic = True):
+
+    cdef:
+        int N = Z.shape[0]
+        int D = Z.shape[1]
+        int lda = N
+        int incx = 1 #increments of rho
+        int incy = 1 #increments of y
+        double alpha = 1.0
+        double beta = 0.0
+        np.ndarray[DTYPE_T, ndim=1, mode = "fortran"] y = np.empty(N, dtype = DTYPE)
+
+    #compute scores
+    blas.dgemv("N", &N, &D, &alpha, &Z[0,0], &lda, &rho[0], &incx, &beta, &y[0], &incy)
+
+    #compute loss
+    return _loss_from_scores_parallel(&y[0], N, _get_num_threads(n_threads), deterministic)
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(False)
+def log_loss_value_and_slope_parallel(np.ndarray[DTYPE_T, ndim=2, mode="fortran"] Z, np.ndarray[DTYPE_T, ndim=1, mode="fortran"] rho, int n_threads = 0, bint deterministic = True):
+
+    cdef:
+        int N = Z.shape[0]
+        int D = Z.shape[1]
+        int lda = N
+        int incx = 1 #increments of rho
+        int incy = 1 #increments of y
+        int num_threads = _get_num_threads(n_threads)
+        double alpha = 1.0
+        double beta = 0.0
+        Py_ssize_t i
+        DTYPE_T total_loss = 0.0
+        DTYPE_T exp_value
+        DTYPE_T s
+        np.ndarray[DTYPE_T, ndim=1, mode = "fortran"] y = np.empty(N, dtype = DTYPE)
+        np.ndarray[DTYPE_T, ndim=1, mode = "fortran"] loss_slope = np.empty(D, dtype = DTYPE)
+        DTYPE_T* y_ptr = &y[0]
+
+    #compute scores
+    blas.dgemv("N", &N, &D, &alpha, &Z[0,0], &lda, &rho[0], &incx, &beta, &y[0], &incy)
+
+    #exponentiate scores, compute mean scores and probabilities
+    if deterministic:
+        total_loss = _chunked_loss_parallel(y_ptr, N, num_threads, True)
+    else:
+        for i in prange(N, nogil = True, num_threads = num_threads, schedule = 'static'):
+            s = y_ptr[i]
+            if s < 0:
+                exp_value = math.exp(s)
+                total_loss += math.log(1.0 + exp_value) - s
+                y_ptr[i] = (exp_value / (1.0 + exp_value)) - 1.0
+            else:
+                exp_value = math.exp(-s)
+                total_loss += math.log1p(exp_value)
+                y_ptr[i] = (1.0 / (1.0 + exp_value)) - 1.0
+
+    #compute loss slope
+    alpha = 1.0/N
+    blas.dgemv("T", &N, &D, &alpha, &Z[0,0], &lda, &y[0], &incx, &beta, &loss_slope[0], &incy)
+    return (total_loss/N), loss_slope
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(False)
+def log_loss_value_from_scores_parallel(np.ndarray[DTYPE_T, ndim=1, mode="fortran"] scores, int n_threads = 0, bint deterministic = True):
+    return _loss_from_scores_parallel(&scores[0], scores.shape[0], _get_num_threads(n_threads), deterministic)
+
+##############################################################################################################
+#### blocked loss functions
+##############################################################################################################
+
+def get_scratch_buffer(int N, int block_size):
+    """
+    allocates the scratch buffer used by the blocked loss functions
+
+    Parameters
+    ----------
+    N           # of rows in Z
+    block_size  # of rows in each block
+
+    Returns
+    -------
+    scratch     numpy.array with shape = (min(N, block_size),)
+    """
+    return np.empty(max(1, min(N, block_size)), dtype = DTYPE)
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(False)
+def log_loss_value_blocked(np.ndarray[DTYPE_T, ndim=2, mode="fortran"] Z, np.ndarray[DTYPE_T, ndim=1, mode="fortran"] rho, int block_size, np.ndarray[DTYPE_T, ndim=1, mode="fortran"] scratch = None):
+    """
+    computes the value of the logistic loss over blocks of block_size rows of Z, so that the scores are stored
+    in a buffer with block_size elements rather than N elements. the losses are summed in row order, so the
+    value matches log_loss_value.
+
+    Parameters
+    ----------
+    Z           numpy.array (Fortran-aligned) containing training data with shape = (n_rows, n_cols)
+    rho         numpy.array of coefficients with shape = (n_cols,)
+    block_size  # of rows in each block
+    scratch     buffer with at least min(n_rows, block_size) elements (see get_scratch_buffer)
+                if None, a new buffer is allocated on each call
+
+    Returns
+    -------
+    loss_value  scalar = 1/n_rows * sum(log( 1 .+ exp(-Z*rho))
+    """
+    if scratch is None:
+        scratch = get_scratch_buffer(Z.shape[0], block_size)
+    assert block_size > 0
+    assert scratch.shape[0] >= min(Z.shape[0], block_size)
+
+    cdef:
+        int N = Z.shape[0]
+        int D = Z.shape[1]
+        int lda = N
+        int incx = 1 #increments of rho
+        int incy = 1 #increments of y
+        double alpha = 1.0
+        double beta = 0.0
+        int start, m
+        Py_ssize_t i
+        DTYPE_T* y = &scratch[0]
+        DTYPE_T total_loss = 0.0
+        int zero_score_cnt = 0
+
+    for start in range(0, N, block_size):
+        m = min(block_size, N - start)
+
+        #compute scores for rows start...start + m - 1
+        blas.dgemv("N", &m, &D, &alpha, &Z[start,0], &lda, &rho[0], &incx, &beta, y, &incy)
+
+        #compute loss
+        for i in range(m):
+            if (y[i] < 0):
+                total_loss += math.log(1.0 + math.exp(y[i])) - y[i]
+            elif (y[i] > 0):
+                total_loss += math.log1p(math.exp(-y[i]))
+            else:
+                zero_score_cnt += 1
+
+    total_loss += zero_score_cnt * math.M_LN2
+    return total_loss/N
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(False)
+def log_loss_value_and_slope_blocked(np.ndarray[DTYPE_T, ndim=2, mode="fortran"] Z, np.ndarray[DTYPE_T, ndim=1, mode="fortran"] rho, int block_size, np.ndarray[DTYPE_T, ndim=1, mode="fortran"] scratch = None, np.ndarray[DTYPE_T, ndim=1, mode="fortran"] loss_slope = None):
+    """
+    computes the value and slope of the logistic loss over blocks of block_size rows of Z, so that the scores
+    are stored in a buffer with block_size elements rather than N elements. the slope of each block is added to
+    loss_slope using dgemv, so it can differ from log_loss_value_and_slope due to rounding.
+
+    Parameters
+    ----------
+    Z           numpy.array (Fortran-aligned) containing training data with shape = (n_rows, n_cols)
+    rho         numpy.array of coefficients with shape = (n_cols,)
+    block_size  # of rows in each block
+    scratch     buffer with at least min(n_rows, block_size) elements (see get_scratch_buffer)
+                if None, a new buffer is allocated on each call
+    loss_slope  buffer with n_cols elements that is overwritten with the slope
+                if None, a new array is allocated on each call
+
+    Returns
+    -------
+    loss_value  scalar = 1/n_rows * sum(log( 1 .+ exp(-Z*rho))
+    loss_slope: (n_cols x 1) vector = 1/n_rows * sum(-Z*rho ./ (1+exp(-Z*rho))
+    """
+    if scratch is None:
+        scratch = get_scratch_buffer(Z.shape[0], block_size)
+    if loss_slope is None:
+        loss_slope = np.zeros(Z.shape[1], dtype = DTYPE)
+    else:
+        loss_slope.fill(0.0)
+    assert block_size > 0
+    assert scratch.shape[0] >= min(Z.shape[0], block_size)
+    assert loss_slope.shape[0] == Z.shape[1]
+
+    cdef:
+        int N = Z.shape[0]
+        int D = Z.shape[1]
+        int lda = N
+        int incx = 1 #increments of rho
+        int incy = 1 #increments of y
+        double alpha = 1.0
+        double alpha_slope = 1.0 / N if N > 0 else 0.0
+        double beta = 0.0
+        double beta_slope = 1.0
+        int start, m
+        Py_ssize_t i
+        DTYPE_T* y = &scratch[0]
+        DTYPE_T total_loss = 0.0
+        DTYPE_T exp_value
+
+    for start in range(0, N, block_size):
+        m = min(block_size, N - start)
+
+        #compute scores for rows start...start + m - 1
+        blas.dgemv("N", &m, &D, &alpha, &Z[start,0], &lda, &rho[0], &incx, &beta, y, &incy)
+
+        #exponentiate scores, compute mean scores and probabilities
+        for i in range(m):
+            if y[i] < 0:
+                exp_value = math.exp(y[i])
+                total_loss += math.log(1.0 + exp_value) - y[i]
+                y[i] = (exp_value / (1.0 + exp_value)) - 1.0
+            else:
+                exp_value = math.exp(-y[i])
+                total_loss += math.log1p(exp_value)
+                y[i] = (1.0 / (1.0 + exp_value)) - 1.0
+
+        #add the slope of this block: loss_slope <- 1/N * trans(Z[start:start + m]) * y + loss_slope
+        blas.dgemv("T", &m, &D, &alpha_slope, &Z[start,0], &lda, y, &incx, &beta_slope, &loss_slope[0], &incy)
+
+    return (total_loss/N), loss_slope
+
+##############################################################################################################
+#### loss workspace
+##############################################################################################################
+
+cdef class LossWorkspace:
+    """
+    Preallocated buffers for computing the value and slope of the logistic loss on a fixed data matrix Z.
+
+    The workspace calls the blocked loss functions with buffers that are created once, so loss_value_and_slope does
+    not allocate any arrays. The loss slope is returned as a view of the workspace buffer and is overwritten by the
+    next call (copy it to keep it).
+    """
+    cdef readonly np.ndarray Z
+    cdef readonly int block_size
+    cdef readonly np.ndarray scores
+    cdef readonly np.ndarray loss_slope
+
+    def __init__(self, np.ndarray[DTYPE_T, ndim=2, mode="fortran"] Z, int block_size = 0):
+        """
+        Parameters
+        ----------
+        Z           numpy.array (Fortran-aligned) containing training data with shape = (n_rows, n_cols)
+        block_size  # of rows of Z processed at a time (0 = all rows at once)
+        """
+        self.Z = Z
+        self.block_size = block_size if 0 < block_size < Z.shape[0] else max(1, Z.shape[0])
+        self.scores = np.empty(self.block_size, dtype = DTYPE)
+        self.loss_slope = np.empty(Z.shape[1], dtype = DTYPE)
+
+    @property
+    def nbytes(self):
+        return self.scores.nbytes + self.loss_slope.nbytes
+
+    def loss_value(self, rho):
+        """
+        Parameters
+        ----------
+        rho         numpy.array of coefficients with shape = (n_cols,)
+
+        Returns
+        -------
+        loss_value  scalar = 1/n_rows * sum(log( 1 .+ exp(-Z*rho))
+        """
+        return log_loss_value_blocked(self.Z, np.require(rho, dtype = DTYPE, requirements = ['F']), self.block_size, self.scores)
+
+    def loss_value_and_slope(self, rho):
+        """
+        Parameters
+        ----------
+        rho         numpy.array of coefficients with shape = (n_cols,)
+
+        Returns
+        -------
+        loss_value  scalar = 1/n_rows * sum(log( 1 .+ exp(-Z*rho))
+        loss_slope: (n_cols x 1) vector = 1/n_rows * sum(-Z*rho ./ (1+exp(-Z*rho)) (stored in the workspace)
+        """
+        return log_loss_value_and_slope_blocked(self.Z, np.require(rho, dtype = DTYPE, requirements = ['F']), self.block_size, self.scores, self.loss_slope)
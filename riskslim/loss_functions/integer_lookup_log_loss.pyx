@@ -0,0 +1,305 @@
+import cython
+import numpy as np
+cimport numpy as np
+cimport libc.math as math
+
+DTYPE = np.float64
+ctypedef np.float64_t DTYPE_t
+
+ctypedef fused ZINT_t:
+    np.int8_t
+    np.int16_t
+
+
+def get_integer_dtype(Z):
+    """
+    returns the narrowest integer type (numpy.int8 or numpy.int16) that can store Z exactly, or None if there is no such type
+
+    Parameters
+    ----------
+    Z           numpy.array containing training data with shape = (n_rows, n_cols)
+    """
+    if not np.array_equal(Z, np.round(Z)):
+        return None
+    Z_min, Z_max = np.min(Z), np.max(Z)
+    for int_type in (np.int8, np.int16):
+        info = np.iinfo(int_type)
+        if info.min <= Z_min and Z_max <= info.max:
+            return int_type
+    return None
+
+
+cdef class IntegerMatrix:
+    """
+    Fortran-aligned int8/int16 representation of an integer data matrix Z = X * Y
+
+    IntegerMatrix is used by the integer lookup engine: scores for integer coefficients are computed in int32
+    arithmetic and used to index the loss/prob tables directly. It also exposes the methods used by the heuristics
+    (dot, add_scaled_column, get_columns, get_rows), which work with floating point coefficients.
+    """
+    cdef readonly int N
+    cdef readonly int P
+    cdef np.ndarray values
+
+    def __init__(self, Z, dtype = None):
+        """
+        Parameters
+        ----------
+        Z           numpy.array containing integer training data with shape = (n_rows, n_cols)
+        dtype       numpy.int8 or numpy.int16 (default: narrowest type that can store Z)
+        """
+        if dtype is None:
+            dtype = get_integer_dtype(Z)
+            if dtype is None:
+                raise ValueError('Z cannot be stored exactly as int8 or int16')
+        assert dtype in (np.int8, np.int16)
+        self.N, self.P = Z.shape
+        self.values = np.require(Z, dtype = dtype, requirements = ['F'])
+
+    @property
+    def shape(self):
+        return self.N, self.P
+
+    @property
+    def dtype(self):
+        return self.values.dtype
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes
+
+    @property
+    def is_integer(self):
+        return True
+
+    def int_scores(self, rho):
+        """
+        returns scores = Z.dot(rho) as an int32 array for integer coefficients rho
+        """
+        cdef np.ndarray[np.int32_t, ndim=1, mode="c"] coefs = np.require(np.rint(rho), dtype = np.int32, requirements = ['C'])
+        cdef np.ndarray[np.int32_t, ndim=1, mode="c"] scores = np.zeros(self.N, dtype = np.int32)
+        assert coefs.shape[0] == self.P
+        if self.values.dtype == np.int8:
+            _int_scores(<np.int8_t*> np.PyArray_DATA(self.values), self.N, self.P, &coefs[0], &scores[0])
+        else:
+            _int_scores(<np.int16_t*> np.PyArray_DATA(self.values), self.N, self.P, &coefs[0], &scores[0])
+        return scores
+
+    def dot(self, rho):
+        """
+        returns scores = Z.dot(rho) as a float64 array
+        """
+        cdef np.ndarray[DTYPE_t, ndim=1, mode="c"] coefs = np.require(rho, dtype = DTYPE, requirements = ['C'])
+        cdef np.ndarray[DTYPE_t, ndim=1, mode="c"] scores = np.zeros(self.N, dtype = DTYPE)
+        assert coefs.shape[0] == self.P
+        if self.values.dtype == np.int8:
+            _float_scores(<np.int8_t*> np.PyArray_DATA(self.values), self.N, self.P, &coefs[0], &scores[0])
+        else:
+            _float_scores(<np.int16_t*> np.PyArray_DATA(self.values), self.N, self.P, &coefs[0], &scores[0])
+        return scores
+
+    def tdot(self, v):
+        """
+        returns Z.T.dot(v) as a float64 array
+        """
+        cdef np.ndarray[DTYPE_t, ndim=1, mode="c"] values = np.require(v, dtype = DTYPE, requirements = ['C'])
+        cdef np.ndarray[DTYPE_t, ndim=1, mode="c"] out = np.empty(self.P, dtype = DTYPE)
+        assert values.shape[0] == self.N
+        if self.values.dtype == np.int8:
+            _transpose_dot(<np.int8_t*> np.PyArray_DATA(self.values), self.N, self.P, &values[0], &out[0])
+        else:
+            _transpose_dot(<np.int16_t*> np.PyArray_DATA(self.values), self.N, self.P, &values[0], &out[0])
+        return out
+
+    def add_scaled_column(self, np.ndarray[DTYPE_t, ndim=1, mode="c"] scores, int dim_idx, double step):
+        """
+        updates scores in place to scores + step * Z[:, dim_idx]
+        """
+        assert scores.shape[0] == self.N and 0 <= dim_idx < self.P
+        if self.values.dtype == np.int8:
+            _add_scaled_column(<np.int8_t*> np.PyArray_DATA(self.values) + dim_idx * self.N, self.N, step, &scores[0])
+        else:
+            _add_scaled_column(<np.int16_t*> np.PyArray_DATA(self.values) + dim_idx * self.N, self.N, step, &scores[0])
+
+    def get_columns(self, dims):
+        """
+        returns Z[:, dims] as a dense float64 numpy.array
+        """
+        return np.require(self.values[:, dims], dtype = DTYPE, requirements = ['F'])
+
+    def get_rows(self, start, end):
+        """
+        returns Z[start:end, :] as a dense float64 numpy.array
+        """
+        return np.array(self.values[start:end, :], dtype = DTYPE)
+
+    def toarray(self):
+        return self.get_rows(0, self.N)
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef void _int_scores(ZINT_t* Z, int N, int P, np.int32_t* rho, np.int32_t* scores) noexcept nogil:
+    cdef:
+        Py_ssize_t i, j
+        np.int32_t c
+        ZINT_t* Z_col
+    for j in range(P):
+        c = rho[j]
+        if c != 0:
+            Z_col = Z + j * N
+            for i in range(N):
+                scores[i] += c * Z_col[i]
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef void _float_scores(ZINT_t* Z, int N, int P, DTYPE_t* rho, DTYPE_t* scores) noexcept nogil:
+    cdef:
+        Py_ssize_t i, j
+        DTYPE_t c
+        ZINT_t* Z_col
+    for j in range(P):
+        c = rho[j]
+        if c != 0.0:
+            Z_col = Z + j * N
+            for i in range(N):
+                scores[i] += c * Z_col[i]
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef void _add_scaled_column(ZINT_t* Z_col, int N, DTYPE_t step, DTYPE_t* scores) noexcept nogil:
+    cdef Py_ssize_t i
+    for i in range(N):
+        scores[i] += step * Z_col[i]
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef void _transpose_dot(ZINT_t* Z, int N, int P, DTYPE_t* v, DTYPE_t* out) noexcept nogil:
+    cdef:
+        Py_ssize_t i, j
+        DTYPE_t total
+        ZINT_t* Z_col
+    for j in range(P):
+        Z_col = Z + j * N
+        total = 0.0
+        for i in range(N):
+            total += Z_col[i] * v[i]
+        out[j] = total
+
+##############################################################################################################
+##############################################################################################################
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(False)
+def log_loss_value(IntegerMatrix Z,
+                   rho,
+                   np.ndarray[DTYPE_t, ndim=1, mode="fortran"] loss_value_table,
+                   int lookup_offset):
+    """
+    computes the value of the logistic loss for integer coefficients using integer scores and a lookup table
+
+    Parameters
+    ----------
+    Z                   IntegerMatrix containing training data with shape = (n_rows, n_cols)
+    rho                 numpy.array of integer coefficients with shape = (n_cols,)
+    loss_value_table    loss value table from lookup_log_loss.get_loss_value_and_prob_tables
+    lookup_offset       offset for loss_value_table
+
+    Returns
+    -------
+    loss_value  scalar = 1/n_rows * sum(log( 1 .+ exp(-Z*rho))
+    """
+    cdef:
+        np.ndarray[np.int32_t, ndim=1, mode="c"] scores = Z.int_scores(rho)
+        int N = Z.N
+        Py_ssize_t i
+        DTYPE_t total_loss = 0.0
+
+    for i in range(N):
+        total_loss += loss_value_table[scores[i] + lookup_offset]
+    return total_loss / N
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(False)
+def log_loss_value_and_slope(IntegerMatrix Z,
+                             rho,
+                             np.ndarray[DTYPE_t, ndim=1, mode="fortran"] loss_value_table,
+                             np.ndarray[DTYPE_t, ndim=1, mode="fortran"] prob_value_table,
+                             int lookup_offset):
+    """
+    computes the value and slope of the logistic loss for integer coefficients using integer scores and lookup tables
+
+    Parameters
+    ----------
+    Z                   IntegerMatrix containing training data with shape = (n_rows, n_cols)
+    rho                 numpy.array of integer coefficients with shape = (n_cols,)
+    loss_value_table    loss value table from lookup_log_loss.get_loss_value_and_prob_tables
+    prob_value_table    prob value table from lookup_log_loss.get_loss_value_and_prob_tables
+    lookup_offset       offset for loss_value_table and prob_value_table
+
+    Returns
+    -------
+    loss_value  scalar = 1/n_rows * sum(log( 1 .+ exp(-Z*rho))
+    loss_slope: (n_cols x 1) vector = 1/n_rows * sum(-Z*rho ./ (1+exp(-Z*rho))
+    """
+    cdef:
+        np.ndarray[np.int32_t, ndim=1, mode="c"] scores = Z.int_scores(rho)
+        np.ndarray[DTYPE_t, ndim=1, mode="c"] probs = np.empty(Z.N, dtype = DTYPE)
+        int N = Z.N
+        Py_ssize_t i
+        int idx
+        DTYPE_t total_loss = 0.0
+
+    for i in range(N):
+        idx = scores[i] + lookup_offset
+        total_loss += loss_value_table[idx]
+        probs[i] = prob_value_table[idx]
+
+    return total_loss / N, Z.tdot(probs) / N
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(False)
+def log_loss_value_and_slope_real(IntegerMatrix Z, rho):
+    """
+    computes the value and slope of the logistic loss for real-valued coefficients
+
+    Parameters
+    ----------
+    Z           IntegerMatrix containing training data with shape = (n_rows, n_cols)
+    rho         numpy.array of coefficients with shape = (n_cols,)
+
+    Returns
+    -------
+    loss_value  scalar = 1/n_rows * sum(log( 1 .+ exp(-Z*rho))
+    loss_slope: (n_cols x 1) vector = 1/n_rows * sum(-Z*rho ./ (1+exp(-Z*rho))
+    """
+    cdef:
+        np.ndarray[DTYPE_t, ndim=1, mode="c"] scores = Z.dot(rho)
+        int N = Z.N
+        Py_ssize_t i
+        DTYPE_t total_loss = 0.0
+        DTYPE_t exp_value
+
+    #compute loss and overwrite scores with probs - 1.0
+    for i in range(N):
+        if scores[i] < 0:
+            exp_value = math.exp(scores[i])
+            total_loss += math.log(1.0 + exp_value) - scores[i]
+            scores[i] = (exp_value / (1.0 + exp_value)) - 1.0
+        elif scores[i] > 0:
+            exp_value = math.exp(-scores[i])
+            total_loss += math.log1p(exp_value)
+            scores[i] = (1.0 / (1.0 + exp_value)) - 1.0
+        else:
+            total_loss += math.M_LN2
+            scores[i] = -0.5
+
+    return total_loss / N, Z.tdot(scores) / N
@@ -0,0 +1,112 @@
+"""
+interpolated logistic loss functions for real-valued scores
+
+The logistic loss f(s) = log(1 + exp(-s)) is tabulated on a uniform grid s_k = min_score + k * step and evaluated
+by linear interpolation between grid points. Since 0 < f''(s) = p(s) * (1 - p(s)) <= 1/4, where p(s) = 1/(1 + exp(-s)),
+the interpolation error on each interval is at most
+
+    |f_interp(s) - f(s)| <= step^2 / 8 * max |f''(s)| = step^2 / 32
+
+so a grid with step = sqrt(32 * max_error) guarantees that each loss value has an absolute error of at most max_error.
+The loss value is an average over rows, so the same bound holds for the loss value. Scores outside of the grid are
+evaluated exactly.
+"""
+import cython
+import numpy as np
+cimport numpy as np
+cimport libc.math as math
+
+DTYPE = np.float64
+ctypedef np.float64_t DTYPE_t
+
+
+def get_interpolation_step(double max_error):
+    """
+    returns the largest grid step such that the interpolated loss has an absolute error of at most max_error
+    """
+    assert max_error > 0.0
+    return math.sqrt(32.0 * max_error)
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(False)
+def get_interpolation_table(double min_score, double max_score, double max_error):
+    """
+    tabulates the logistic loss on a uniform grid that covers [min_score, max_score]
+
+    Parameters
+    ----------
+    min_score           smallest score (see get_score_bounds)
+    max_score           largest score (see get_score_bounds)
+    max_error           max absolute error of the interpolated loss
+
+    Returns
+    -------
+    loss_value_table    numpy.array of loss values at min_score, min_score + step, ..., min_score + (n - 1) * step
+    step                distance between grid points
+    """
+    assert min_score <= max_score
+    cdef:
+        double step = get_interpolation_step(max_error)
+        Py_ssize_t n = <Py_ssize_t> math.ceil((max_score - min_score) / step) + 2
+        np.ndarray[DTYPE_t, ndim=1, mode = "fortran"] loss_value_table = np.empty(n, dtype = DTYPE)
+        Py_ssize_t k
+        double s
+
+    for k in range(n):
+        s = min_score + k * step
+        if s < 0:
+            loss_value_table[k] = math.log(1.0 + math.exp(s)) - s
+        elif s > 0:
+            loss_value_table[k] = math.log1p(math.exp(-s))
+        else:
+            loss_value_table[k] = math.M_LN2
+
+    return loss_value_table, step
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(True)
+def log_loss_value_from_scores(
+    np.ndarray[DTYPE_t, ndim=1, mode="fortran"] scores,
+    np.ndarray[DTYPE_t, ndim=1, mode="fortran"] loss_value_table,
+    double min_score,
+    double step):
+    """
+    computes the logistic loss value from a vector of scores using linear interpolation
+
+    Parameters
+    ----------
+    scores              numpy.array of scores = Z.dot(rho)
+    loss_value_table    table of loss values (see get_interpolation_table)
+    min_score           score of the first grid point
+    step                distance between grid points
+
+    Returns
+    -------
+    loss_value          scalar = 1/n_rows * sum(log( 1 .+ exp(-scores))
+    """
+    cdef:
+        Py_ssize_t N = scores.shape[0]
+        Py_ssize_t n_grid = loss_value_table.shape[0]
+        Py_ssize_t i, k
+        double s, t
+        DTYPE_t total_loss = 0.0
+
+    for i in range(N):
+        s = scores[i]
+        t = (s - min_score) / step
+        k = <Py_ssize_t> math.floor(t)
+        if 0 <= k < n_grid - 1:
+            t -= k
+            total_loss += loss_value_table[k] + t * (loss_value_table[k + 1] - loss_value_table[k])
+        elif s < 0:
+            total_loss += math.log(1.0 + math.exp(s)) - s
+        else:
+            total_loss += math.log1p(math.exp(-s))
+
+    return total_loss / N
@@ -7,7 +7,7 @@ def log_loss_value(Z, rho):
 
     Parameters
     ----------
-    Z           numpy.array containing training data with shape = (n_rows, n_cols)
+    Z           numpy.array or scipy.sparse matrix containing training data with shape = (n_rows, n_cols)
     rho         numpy.array of coefficients with shape = (n_cols,)
 
     Returns
@@ -33,7 +33,7 @@ def log_loss_value_and_slope(Z, rho):
 
     Parameters
     ----------
-    Z           numpy.array containing training data with shape = (n_rows, n_cols)
+    Z           numpy.array or scipy.sparse matrix containing training data with shape = (n_rows, n_cols)
     rho         numpy.array of coefficients with shape = (n_cols,)
 
     Returns
@@ -97,7 +97,7 @@ def log_probs(Z, rho):
     see also: http://stackoverflow.com/questions/20085768/
     Parameters
     ----------
-    Z           numpy.array containing training data with shape = (n_rows, n_cols)
+    Z           numpy.array or scipy.sparse matrix containing training data with shape = (n_rows, n_cols)
     rho         numpy.array of coefficients with shape = (n_cols,)
 
     Returns
@@ -111,3 +111,131 @@ def log_probs(Z, rho):
     log_probs[pos_idx]  = 1.0 / (1.0 + np.exp(-scores[pos_idx]))
     log_probs[~pos_idx] = np.exp(scores[~pos_idx]) / (1.0 + np.exp(scores[~pos_idx]))
     return log_probs
+
+def log_loss_value_batch(Z, rho_batch):
+    """
+    computes the value of the logistic loss for a batch of coefficient vectors
+    in a numerically stable way
+
+    this function is used to evaluate many candidate solutions at once (e.g., all
+    ceil/floor moves in sequential_rounding) using a single matrix-matrix product
+
+    Parameters
+    ----------
+    Z           numpy.array or scipy.sparse matrix containing training data with shape = (n_rows, n_cols)
+    rho_batch   numpy.array of coefficients with shape = (n_cols, n_candidates)
+
+    Returns
+    -------
+    loss_values numpy.array with shape = (n_candidates,)
+                loss_values[k] = 1/n_rows * sum(log( 1 .+ exp(-Z*rho_batch[:, k]))
+
+    """
+    scores = Z.dot(rho_batch)
+    return log_loss_value_from_scores_batch(scores)
+
+def log_loss_value_and_slope_batch(Z, rho_batch):
+    """
+    computes the value and slope of the logistic loss for a batch of coefficient vectors
+    in a numerically stable way
+
+    Parameters
+    ----------
+    Z           numpy.array or scipy.sparse matrix containing training data with shape = (n_rows, n_cols)
+    rho_batch   numpy.array of coefficients with shape = (n_cols, n_candidates)
+
+    Returns
+    -------
+    loss_values numpy.array with shape = (n_candidates,)
+    loss_slopes numpy.array with shape = (n_cols, n_candidates)
+                loss_slopes[:, k] is the slope of the loss at rho_batch[:, k]
+
+    """
+    scores = Z.dot(rho_batch)
+    pos_idx = scores > 0
+    exp_scores_pos = np.exp(-scores[pos_idx])
+    exp_scores_neg = np.exp(scores[~pos_idx])
+
+    #compute loss values
+    loss_values = np.empty_like(scores)
+    loss_values[pos_idx] = np.log1p(exp_scores_pos)
+    loss_values[~pos_idx] = -scores[~pos_idx] + np.log1p(exp_scores_neg)
+    loss_values = loss_values.mean(axis = 0)
+
+    #compute loss slopes
+    log_probs = np.empty_like(scores)
+    log_probs[pos_idx] = 1.0 / (1.0 + exp_scores_pos)
+    log_probs[~pos_idx] = exp_scores_neg / (1.0 + exp_scores_neg)
+    loss_slopes = Z.T.dot(log_probs - 1.0) / Z.shape[0]
+
+    return loss_values, loss_slopes
+
+def log_loss_value_from_scores_batch(scores):
+    """
+    computes the logistic loss value for a batch of score vectors in a numerically stable way
+    where scores[:, k] = Z.dot(rho_k)
+
+    Parameters
+    ----------
+    scores      numpy.array of scores with shape = (n_rows, n_candidates)
+
+    Returns
+    -------
+    loss_values numpy.array with shape = (n_candidates,)
+
+    """
+    pos_idx = scores > 0
+    loss_values = np.empty_like(scores)
+    loss_values[pos_idx] = np.log1p(np.exp(-scores[pos_idx]))
+    loss_values[~pos_idx] = -scores[~pos_idx] + np.log1p(np.exp(scores[~pos_idx]))
+    return loss_values.mean(axis = 0)
+
+def log_loss_value_blocked(Z, rho, block_size):
+    """
+    computes the value of the logistic loss over blocks of block_size rows of Z
+    so that temporary arrays have block_size elements rather than n_rows elements
+
+    Parameters
+    ----------
+    Z           numpy.array or scipy.sparse matrix containing training data with shape = (n_rows, n_cols)
+    rho         numpy.array of coefficients with shape = (n_cols,)
+    block_size  # of rows in each block
+
+    Returns
+    -------
+    loss_value  scalar = 1/n_rows * sum(log( 1 .+ exp(-Z*rho))
+
+    """
+    N = Z.shape[0]
+    total_loss = 0.0
+    for start in range(0, N, block_size):
+        end = min(start + block_size, N)
+        total_loss += (end - start) * log_loss_value(Z[start:end], rho)
+    return total_loss / N
+
+def log_loss_value_and_slope_blocked(Z, rho, block_size):
+    """
+    computes the value and slope of the logistic loss over blocks of block_size rows of Z
+    so that temporary arrays have block_size elements rather than n_rows elements
+
+    Parameters
+    ----------
+    Z           numpy.array or scipy.sparse matrix containing training data with shape = (n_rows, n_cols)
+    rho         numpy.array of coefficients with shape = (n_cols,)
+    block_size  # of rows in each block
+
+    Returns
+    -------
+    loss_value  scalar = 1/n_rows * sum(log( 1 .+ exp(-Z*rho))
+    loss_slope: (n_cols x 1) vector = 1/n_rows * sum(-Z*rho ./ (1+exp(-Z*rho))
+
+    """
+    N = Z.shape[0]
+    total_loss = 0.0
+    total_slope = np.zeros(Z.shape[1])
+    for start in range(0, N, block_size):
+        end = min(start + block_size, N)
+        block_loss, block_slope = log_loss_value_and_slope(Z[start:end], rho)
+        total_loss += (end - start) * block_loss
+        total_slope += (end - start) * block_slope
+    return total_loss / N, total_slope / N
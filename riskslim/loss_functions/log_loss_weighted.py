@@ -8,7 +8,7 @@ def log_loss_value(Z, weights, total_weights, rho):
 
     Parameters
     ----------
-    Z               numpy.array containing training data with shape = (n_rows, n_cols)
+    Z               numpy.array or scipy.sparse matrix containing training data with shape = (n_rows, n_cols)
     rho             numpy.array of coefficients with shape = (n_cols,)
     total_weights   numpy.sum(total_weights) (only included to reduce computation)
     weights         numpy.array of sample weights with shape (n_rows,)
@@ -37,7 +37,7 @@ def log_loss_value_and_slope(Z, weights, total_weights, rho):
 
     Parameters
     ----------
-    Z               numpy.array containing training data with shape = (n_rows, n_cols)
+    Z               numpy.array or scipy.sparse matrix containing training data with shape = (n_rows, n_cols)
     rho             numpy.array of coefficients with shape = (n_cols,)
     total_weights   numpy.sum(total_weights) (only included to reduce computation)
     weights         numpy.array of sample weights with shape (n_rows,)
@@ -98,4 +98,85 @@ def log_loss_value_from_scores(weights, total_weights, scores):
     loss_value[~pos_idx] = -scores[~pos_idx] + np.log1p(np.exp(scores[~pos_idx]))
     loss_value = loss_value.dot(weights) / total_weights
 
-    return loss_value
\ No newline at end of file
+    return loss_value
+
+def log_loss_value_batch(Z, weights, total_weights, rho_batch):
+    """
+    computes the value of the logistic loss for a batch of coefficient vectors
+    supports sample non-negative weights for each example in the training data
+
+    Parameters
+    ----------
+    Z               numpy.array or scipy.sparse matrix containing training data with shape = (n_rows, n_cols)
+    weights         numpy.array of sample weights with shape (n_rows,)
+    total_weights   numpy.sum(total_weights) (only included to reduce computation)
+    rho_batch       numpy.array of coefficients with shape = (n_cols, n_candidates)
+
+    Returns
+    -------
+    loss_values     numpy.array with shape = (n_candidates,)
+
+    """
+    scores = Z.dot(rho_batch)
+    return log_loss_value_from_scores_batch(weights, total_weights, scores)
+
+def log_loss_value_and_slope_batch(Z, weights, total_weights, rho_batch):
+    """
+    computes the value and slope of the logistic loss for a batch of coefficient vectors
+    supports sample non-negative weights for each example in the training data
+
+    Parameters
+    ----------
+    Z               numpy.array or scipy.sparse matrix containing training data with shape = (n_rows, n_cols)
+    weights         numpy.array of sample weights with shape (n_rows,)
+    total_weights   numpy.sum(total_weights) (only included to reduce computation)
+    rho_batch       numpy.array of coefficients with shape = (n_cols, n_candidates)
+
+    Returns
+    -------
+    loss_values     numpy.array with shape = (n_candidates,)
+    loss_slopes     numpy.array with shape = (n_cols, n_candidates)
+
+    """
+    scores = Z.dot(rho_batch)
+    pos_idx = scores > 0
+    exp_scores_pos = np.exp(-scores[pos_idx])
+    exp_scores_neg = np.exp(scores[~pos_idx])
+
+    #compute loss values
+    loss_values = np.empty_like(scores)
+    loss_values[pos_idx] = np.log1p(exp_scores_pos)
+    loss_values[~pos_idx] = -scores[~pos_idx] + np.log1p(exp_scores_neg)
+    loss_values = weights.dot(loss_values) / total_weights
+
+    #compute loss slopes
+    log_probs = np.empty_like(scores)
+    log_probs[pos_idx] = 1.0 / (1.0 + exp_scores_pos)
+    log_probs[~pos_idx] = (exp_scores_neg / (1.0 + exp_scores_neg))
+    log_probs -= 1.0
+    log_probs *= weights[:, None]
+    loss_slopes = Z.T.dot(log_probs) / total_weights
+
+    return loss_values, loss_slopes
+
+def log_loss_value_from_scores_batch(weights, total_weights, scores):
+    """
+    computes the logistic loss value for a batch of score vectors in a numerically stable way
+    where scores[:, k] = Z.dot(rho_k)
+
+    Parameters
+    ----------
+    weights         numpy.array of sample weights with shape (n_rows,)
+    total_weights   numpy.sum(total_weights) (only included to reduce computation)
+    scores          numpy.array of scores with shape = (n_rows, n_candidates)
+
+    Returns
+    -------
+    loss_values     numpy.array with shape = (n_candidates,)
+
+    """
+    pos_idx = scores > 0
+    loss_values = np.empty_like(scores)
+    loss_values[pos_idx] = np.log1p(np.exp(-scores[pos_idx]))
+    loss_values[~pos_idx] = -scores[~pos_idx] + np.log1p(np.exp(scores[~pos_idx]))
+    return weights.dot(loss_values) / total_weights
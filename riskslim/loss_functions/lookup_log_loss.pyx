@@ -200,3 +200,291 @@ def log_loss_value_and_slope(
     blas.dgemv("T", &N, &D, &alpha, &Z[0,0], &lda, &y[0], &incx, &beta, &loss_slope[0], &incy)
 
     return (total_loss/N), loss_slope
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(False)
+def log_loss_value_batch(
+    np.ndarray[DTYPE_t, ndim=2, mode="fortran"] Z,
+    np.ndarray[DTYPE_t, ndim=2, mode="fortran"] rho_batch,
+    np.ndarray[DTYPE_t, ndim=1, mode="fortran"] loss_value_table,
+    int lookup_offset):
+
+    cdef:
+        int N = Z.shape[0]
+        int D = Z.shape[1]
+        int K = rho_batch.shape[1]
+        double alpha = 1.0
+        double beta = 0.0
+        np.ndarray[DTYPE_t, ndim=2, mode = "fortran"] y = np.empty((N, K), dtype = DTYPE, order = "F")
+        np.ndarray[DTYPE_t, ndim=1, mode = "fortran"] loss_values = np.empty(K, dtype = DTYPE)
+
+    if K == 0:
+        return loss_values
+
+    #get scores for all candidates using dgemm, which computes: y <- alpha * Z * rho_batch + beta * y
+    blas.dgemm("N", "N", &N, &K, &D, &alpha, &Z[0,0], &N, &rho_batch[0,0], &D, &beta, &y[0,0], &N)
+
+    _loss_values_from_score_matrix(y, loss_value_table, lookup_offset, loss_values)
+    return loss_values
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(False)
+def log_loss_value_from_scores_batch(
+    np.ndarray[DTYPE_t, ndim=2, mode="fortran"] scores,
+    np.ndarray[DTYPE_t, ndim=1, mode="fortran"] loss_value_table,
+    int lookup_offset):
+
+    cdef:
+        np.ndarray[DTYPE_t, ndim=1, mode = "fortran"] loss_values = np.empty(scores.shape[1], dtype = DTYPE)
+
+    _loss_values_from_score_matrix(scores, loss_value_table, lookup_offset, loss_values)
+    return loss_values
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(False)
+def log_loss_value_and_slope_batch(
+    np.ndarray[DTYPE_t, ndim=2, mode="fortran"] Z,
+    np.ndarray[DTYPE_t, ndim=2, mode="fortran"] rho_batch,
+    np.ndarray[DTYPE_t, ndim=1, mode="fortran"] loss_value_table,
+    np.ndarray[DTYPE_t, ndim=1, mode="fortran"] prob_value_table,
+    int lookup_offset):
+
+    cdef:
+        int N = Z.shape[0]
+        int D = Z.shape[1]
+        int K = rho_batch.shape[1]
+        double alpha = 1.0
+        double beta = 0.0
+        Py_ssize_t i, k
+        int lookup_index
+        DTYPE_t total_loss
+        np.ndarray[DTYPE_t, ndim=2, mode = "fortran"] y = np.empty((N, K), dtype = DTYPE, order = "F")
+        np.ndarray[DTYPE_t, ndim=1, mode = "fortran"] loss_values = np.empty(K, dtype = DTYPE)
+        np.ndarray[DTYPE_t, ndim=2, mode = "fortran"] loss_slopes = np.empty((D, K), dtype = DTYPE, order = "F")
+
+    if K == 0:
+        return loss_values, loss_slopes
+
+    #get scores for all candidates using dgemm, which computes: y <- alpha * Z * rho_batch + beta * y
+    blas.dgemm("N", "N", &N, &K, &D, &alpha, &Z[0,0], &N, &rho_batch[0,0], &D, &beta, &y[0,0], &N)
+
+    #single pass over scores: look up loss values and overwrite scores with probabilities
+    for k in range(K):
+        total_loss = 0.0
+        for i in range(N):
+            lookup_index = (<int> y[i, k]) + lookup_offset
+            total_loss += loss_value_table[lookup_index]
+            y[i, k] = prob_value_table[lookup_index]
+        loss_values[k] = total_loss / N
+
+    #compute loss slopes as loss_slopes = 1/N * trans(Z) * y
+    alpha = 1.0/N
+    blas.dgemm("T", "N", &D, &K, &N, &alpha, &Z[0,0], &N, &y[0,0], &N, &beta, &loss_slopes[0,0], &D)
+    return loss_values, loss_slopes
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(False)
+cdef void _loss_values_from_score_matrix(
+    np.ndarray[DTYPE_t, ndim=2, mode="fortran"] scores,
+    np.ndarray[DTYPE_t, ndim=1, mode="fortran"] loss_value_table,
+    int lookup_offset,
+    np.ndarray[DTYPE_t, ndim=1, mode="fortran"] loss_values):
+
+    cdef:
+        Py_ssize_t N = scores.shape[0]
+        Py_ssize_t K = scores.shape[1]
+        Py_ssize_t i, k
+        DTYPE_t total_loss
+
+    #look up loss for each column of the score matrix
+    for k in range(K):
+        total_loss = 0.0
+        for i in range(N):
+            total_loss += loss_value_table[(<int>scores[i, k]) + lookup_offset]
+        loss_values[k] = total_loss / N
+
+##############################################################################################################
+#### blocked loss functions
+##############################################################################################################
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(False)
+def log_loss_value_blocked(
+    np.ndarray[DTYPE_t, ndim=2, mode="fortran"] Z,
+    np.ndarray[DTYPE_t, ndim=1, mode="fortran"] rho,
+    np.ndarray[DTYPE_t, ndim=1, mode="fortran"] loss_value_table,
+    int lookup_offset,
+    int block_size,
+    np.ndarray[DTYPE_t, ndim=1, mode="fortran"] scratch = None):
+
+    if scratch is None:
+        scratch = np.empty(max(1, min(Z.shape[0], block_size)), dtype = DTYPE)
+    assert block_size > 0
+    assert scratch.shape[0] >= min(Z.shape[0], block_size)
+
+    cdef:
+        int N = Z.shape[0]
+        int D = Z.shape[1]
+        int lda = N
+        int incx = 1 #increments of rho
+        int incy = 1 #increments of y
+        double alpha = 1.0
+        double beta = 0.0
+        int start, m
+        Py_ssize_t i
+        DTYPE_t* y = &scratch[0]
+        DTYPE_t total_loss = 0.0
+
+    for start in range(0, N, block_size):
+        m = min(block_size, N - start)
+
+        #get scores for rows start...start + m - 1
+        blas.dgemv("N", &m, &D, &alpha, &Z[start,0], &lda, &rho[0], &incx, &beta, y, &incy)
+
+        #compute loss
+        for i in range(m):
+            total_loss += loss_value_table[(<int>y[i]) + lookup_offset]
+
+    return total_loss/N
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(False)
+def log_loss_value_and_slope_blocked(
+    np.ndarray[DTYPE_t, ndim=2, mode="fortran"] Z,
+    np.ndarray[DTYPE_t, ndim=1, mode="fortran"] rho,
+    np.ndarray[DTYPE_t, ndim=1, mode="fortran"] loss_value_table,
+    np.ndarray[DTYPE_t, ndim=1, mode="fortran"] prob_value_table,
+    int lookup_offset,
+    int block_size,
+    np.ndarray[DTYPE_t, ndim=1, mode="fortran"] scratch = None,
+    np.ndarray[DTYPE_t, ndim=1, mode="fortran"] loss_slope = None):
+
+    if scratch is None:
+        scratch = np.empty(max(1, min(Z.shape[0], block_size)), dtype = DTYPE)
+    if loss_slope is None:
+        loss_slope = np.zeros(Z.shape[1], dtype = DTYPE)
+    else:
+        loss_slope.fill(0.0)
+    assert block_size > 0
+    assert scratch.shape[0] >= min(Z.shape[0], block_size)
+    assert loss_slope.shape[0] == Z.shape[1]
+
+    cdef:
+        int N = Z.shape[0]
+        int D = Z.shape[1]
+        int lda = N
+        int incx = 1 #increments of rho
+        int incy = 1 #increments of y
+        double alpha = 1.0
+        double alpha_slope = 1.0 / N if N > 0 else 0.0
+        double beta = 0.0
+        double beta_slope = 1.0
+        int start, m
+        Py_ssize_t i
+        int lookup_index
+        DTYPE_t* y = &scratch[0]
+        DTYPE_t total_loss = 0.0
+
+    for start in range(0, N, block_size):
+        m = min(block_size, N - start)
+
+        #get scores for rows start...start + m - 1
+        blas.dgemv("N", &m, &D, &alpha, &Z[start,0], &lda, &rho[0], &incx, &beta, y, &incy)
+
+        #compute loss and probabilities
+        for i in range(m):
+            lookup_index = (<int> y[i]) + lookup_offset
+            total_loss += loss_value_table[lookup_index]
+            y[i] = prob_value_table[lookup_index]
+
+        #add the slope of this block: loss_slope <- 1/N * trans(Z[start:start + m]) * y + loss_slope
+        blas.dgemv("T", &m, &D, &alpha_slope, &Z[start,0], &lda, y, &incx, &beta_slope, &loss_slope[0], &incy)
+
+    return (total_loss/N), loss_slope
+
+##############################################################################################################
+#### loss workspace
+##############################################################################################################
+
+cdef class LossWorkspace:
+    """
+    Preallocated buffers for computing the value and slope of the logistic loss on a fixed data matrix Z using
+    lookup tables.
+
+    The workspace calls the blocked loss functions with buffers that are created once, so loss_value_and_slope does
+    not allocate any arrays. The loss slope is returned as a view of the workspace buffer and is overwritten by the
+    next call (copy it to keep it).
+    """
+    cdef readonly np.ndarray Z
+    cdef readonly np.ndarray loss_value_table
+    cdef readonly np.ndarray prob_value_table
+    cdef readonly int lookup_offset
+    cdef readonly int block_size
+    cdef readonly np.ndarray scores
+    cdef readonly np.ndarray loss_slope
+
+    def __init__(self,
+                 np.ndarray[DTYPE_t, ndim=2, mode="fortran"] Z,
+                 np.ndarray[DTYPE_t, ndim=1, mode="fortran"] loss_value_table,
+                 np.ndarray[DTYPE_t, ndim=1, mode="fortran"] prob_value_table,
+                 int lookup_offset,
+                 int block_size = 0):
+        """
+        Parameters
+        ----------
+        Z                   numpy.array (Fortran-aligned) containing training data with shape = (n_rows, n_cols)
+        loss_value_table    lookup table of loss values (see get_loss_value_and_prob_tables)
+        prob_value_table    lookup table of probabilities (see get_loss_value_and_prob_tables)
+        lookup_offset       offset of the lookup tables
+        block_size          # of rows of Z processed at a time (0 = all rows at once)
+        """
+        self.Z = Z
+        self.loss_value_table = loss_value_table
+        self.prob_value_table = prob_value_table
+        self.lookup_offset = lookup_offset
+        self.block_size = block_size if 0 < block_size < Z.shape[0] else max(1, Z.shape[0])
+        self.scores = np.empty(self.block_size, dtype = DTYPE)
+        self.loss_slope = np.empty(Z.shape[1], dtype = DTYPE)
+
+    @property
+    def nbytes(self):
+        return self.scores.nbytes + self.loss_slope.nbytes
+
+    def loss_value(self, rho):
+        """
+        Parameters
+        ----------
+        rho         numpy.array of coefficients with shape = (n_cols,)
+
+        Returns
+        -------
+        loss_value  scalar = 1/n_rows * sum(log( 1 .+ exp(-Z*rho))
+        """
+        return log_loss_value_blocked(self.Z, np.require(rho, dtype = DTYPE, requirements = ['F']), self.loss_value_table,
+                                      self.lookup_offset, self.block_size, self.scores)
+
+    def loss_value_and_slope(self, rho):
+        """
+        Parameters
+        ----------
+        rho         numpy.array of coefficients with shape = (n_cols,)
+
+        Returns
+        -------
+        loss_value  scalar = 1/n_rows * sum(log( 1 .+ exp(-Z*rho))
+        loss_slope: (n_cols x 1) vector = 1/n_rows * sum(-Z*rho ./ (1+exp(-Z*rho)) (stored in the workspace)
+        """
+        return log_loss_value_and_slope_blocked(self.Z, np.require(rho, dtype = DTYPE, requirements = ['F']), self.loss_value_table,
+                                                self.prob_value_table, self.lookup_offset, self.block_size, self.scores, self.loss_slope)
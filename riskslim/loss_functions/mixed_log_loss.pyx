@@ -0,0 +1,169 @@
+"""
+mixed-precision logistic loss functions
+
+Z is stored as a float32 array and the scores are computed in float32 using sgemv. The loss value and loss slope are
+accumulated in float64. Since the logistic loss is 1-Lipschitz in the score, the error of the loss value is bounded by
+
+    |loss_mixed(rho) - loss(rho)| <= gamma * 1/N * sum_i sum_j |Z[i,j] * rho[j]|
+
+where gamma = k * u / (1 - k * u), u = 2^-24 is the unit roundoff of float32, and k = P + 2 accounts for rounding
+Z and rho to float32 and for the P - 1 additions in each score. The error from the float64 accumulation is
+O(N * 2^-53) and is not included. The bound is computed by get_loss_error_bound.
+"""
+import cython
+import numpy as np
+cimport numpy as np
+cimport scipy.linalg.cython_blas as blas
+cimport libc.math as math
+
+DTYPE = np.float64
+ctypedef np.float64_t DTYPE_T
+ctypedef np.float32_t ZTYPE_T
+
+FLOAT32_UNIT_ROUNDOFF = 2.0 ** -24
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+cdef np.ndarray _scores(np.ndarray[ZTYPE_T, ndim=2, mode="fortran"] Z, rho):
+
+    cdef:
+        int N = Z.shape[0]
+        int D = Z.shape[1]
+        int lda = N
+        int incx = 1
+        int incy = 1
+        float alpha = 1.0
+        float beta = 0.0
+        np.ndarray[ZTYPE_T, ndim=1, mode = "fortran"] coefs = np.require(rho, dtype = np.float32, requirements = ['F'])
+        np.ndarray[ZTYPE_T, ndim=1, mode = "fortran"] y = np.empty(N, dtype = np.float32)
+
+    #compute scores in float32
+    blas.sgemv("N", &N, &D, &alpha, &Z[0,0], &lda, &coefs[0], &incx, &beta, &y[0], &incy)
+    return y
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(False)
+def log_loss_value(np.ndarray[ZTYPE_T, ndim=2, mode="fortran"] Z, rho):
+    """
+    computes the value of the logistic loss using float32 scores and a float64 sum
+
+    Parameters
+    ----------
+    Z           numpy.array (float32, Fortran-aligned) containing training data with shape = (n_rows, n_cols)
+    rho         numpy.array of coefficients with shape = (n_cols,)
+
+    Returns
+    -------
+    loss_value  scalar = 1/n_rows * sum(log( 1 .+ exp(-Z*rho))
+    """
+    cdef:
+        np.ndarray[ZTYPE_T, ndim=1, mode = "fortran"] y = _scores(Z, rho)
+        Py_ssize_t N = Z.shape[0]
+        Py_ssize_t i
+        DTYPE_T s
+        DTYPE_T total_loss = 0.0
+        int zero_score_cnt = 0
+
+    for i in range(N):
+        s = <DTYPE_T> y[i]
+        if s < 0:
+            total_loss += math.log(1.0 + math.exp(s)) - s
+        elif s > 0:
+            total_loss += math.log1p(math.exp(-s))
+        else:
+            zero_score_cnt += 1
+
+    total_loss += zero_score_cnt * math.M_LN2
+    return total_loss/N
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(False)
+def log_loss_value_and_slope(np.ndarray[ZTYPE_T, ndim=2, mode="fortran"] Z, rho):
+    """
+    computes the value and slope of the logistic loss using float32 scores and float64 sums
+
+    Parameters
+    ----------
+    Z           numpy.array (float32, Fortran-aligned) containing training data with shape = (n_rows, n_cols)
+    rho         numpy.array of coefficients with shape = (n_cols,)
+
+    Returns
+    -------
+    loss_value  scalar = 1/n_rows * sum(log( 1 .+ exp(-Z*rho))
+    loss_slope: (n_cols x 1) vector = 1/n_rows * sum(-Z*rho ./ (1+exp(-Z*rho))
+    """
+    cdef:
+        np.ndarray[ZTYPE_T, ndim=1, mode = "fortran"] y = _scores(Z, rho)
+        Py_ssize_t N = Z.shape[0]
+        Py_ssize_t D = Z.shape[1]
+        Py_ssize_t i, j
+        DTYPE_T s
+        DTYPE_T exp_value
+        DTYPE_T total_loss = 0.0
+        DTYPE_T total_slope
+        np.ndarray[DTYPE_T, ndim=1, mode = "fortran"] probs = np.empty(N, dtype = DTYPE)
+        np.ndarray[DTYPE_T, ndim=1, mode = "fortran"] loss_slope = np.empty(D, dtype = DTYPE)
+
+    #compute loss and probabilities in float64
+    for i in range(N):
+        s = <DTYPE_T> y[i]
+        if s < 0:
+            exp_value = math.exp(s)
+            total_loss += math.log(1.0 + exp_value) - s
+            probs[i] = (exp_value / (1.0 + exp_value)) - 1.0
+        else:
+            exp_value = math.exp(-s)
+            total_loss += math.log1p(exp_value)
+            probs[i] = (1.0 / (1.0 + exp_value)) - 1.0
+
+    #compute loss slope = 1/N * trans(Z) * probs in float64
+    for j in range(D):
+        total_slope = 0.0
+        for i in range(N):
+            total_slope += (<DTYPE_T> Z[i, j]) * probs[i]
+        loss_slope[j] = total_slope / N
+
+    return (total_loss/N), loss_slope
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.nonecheck(False)
+@cython.cdivision(False)
+def get_loss_error_bound(np.ndarray[ZTYPE_T, ndim=2, mode="fortran"] Z, rho):
+    """
+    computes an upper bound on |log_loss_value(Z, rho) - loss(rho)|, where loss(rho) is the logistic loss
+    computed in exact arithmetic using the float64 data that was used to create Z
+
+    Parameters
+    ----------
+    Z           numpy.array (float32, Fortran-aligned) containing training data with shape = (n_rows, n_cols)
+    rho         numpy.array of coefficients with shape = (n_cols,)
+
+    Returns
+    -------
+    error_bound scalar = gamma * 1/n_rows * sum_i sum_j |Z[i,j] * rho[j]|
+    """
+    cdef:
+        np.ndarray[DTYPE_T, ndim=1, mode = "fortran"] abs_coefs = np.abs(np.require(rho, dtype = DTYPE, requirements = ['F']))
+        Py_ssize_t N = Z.shape[0]
+        Py_ssize_t D = Z.shape[1]
+        Py_ssize_t i, j
+        DTYPE_T total = 0.0
+        DTYPE_T k = D + 2
+        DTYPE_T gamma = k * FLOAT32_UNIT_ROUNDOFF / (1.0 - k * FLOAT32_UNIT_ROUNDOFF)
+
+    for j in range(D):
+        if abs_coefs[j] != 0.0:
+            for i in range(N):
+                total += math.fabs(<DTYPE_T> Z[i, j]) * abs_coefs[j]
+
+    return gamma * total / N
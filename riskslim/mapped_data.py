@@ -0,0 +1,265 @@
+import json
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from .defaults import INTERCEPT_NAME
+from .utils import check_data
+
+# binary file layout
+#
+# [header][data]
+#
+# header:   MMAP_MAGIC, the offset of the data as a 16-digit integer, and a JSON object with N, P, dtype, variable_names,
+#           outcome_name and has_sample_weights. the header is padded with spaces to a multiple of MMAP_ALIGNMENT bytes.
+# data:     N x (P + 1) or N x (P + 2) array stored in column-major order, where columns 0...P-1 are X (with the
+#           column of 1s for INTERCEPT_NAME), column P is Y, and column P + 1 contains the sample weights (optional)
+MMAP_MAGIC = b'RISKSLIM_MMAP\n'
+MMAP_OFFSET_DIGITS = 16
+MMAP_ALIGNMENT = 4096
+
+
+def convert_csv_to_mmap(dataset_csv_file, mmap_file, sample_weights_csv_file = None, chunk_size = 100000, dtype = np.float64):
+    """
+    converts a csv file of training data into a memory-mapped binary file that can be read with load_data_from_mmap
+    the csv file is read in chunks of rows so that the dataset never needs to fit in memory
+
+    Parameters
+    ----------
+    dataset_csv_file                csv file containing the training data (see load_data_from_csv for the format)
+    mmap_file                       path of the binary file to create
+    sample_weights_csv_file         csv file containing sample weights for the training data (optional)
+    chunk_size                      # of rows of the csv file to read at a time
+    dtype                           type used to store X, Y and the sample weights
+
+    Returns
+    -------
+    Path of the binary file
+    """
+    dataset_csv_file = Path(dataset_csv_file)
+    if not dataset_csv_file.exists():
+        raise IOError('could not find dataset_csv_file: %s' % dataset_csv_file)
+
+    if sample_weights_csv_file is not None:
+        sample_weights_csv_file = Path(sample_weights_csv_file)
+        if not sample_weights_csv_file.exists():
+            raise IOError('could not find sample_weights_csv_file: %s' % sample_weights_csv_file)
+
+    # first pass: get the variable names and the number of rows
+    data_headers = list(pd.read_csv(dataset_csv_file, sep = ',', nrows = 0).columns.values)
+    N = sum(len(chunk) for chunk in pd.read_csv(dataset_csv_file, sep = ',', chunksize = chunk_size))
+    P = len(data_headers)
+    variable_names = [INTERCEPT_NAME] + data_headers[1:]
+    n_cols = P + 1 + int(sample_weights_csv_file is not None)
+
+    header = {
+        'N': int(N),
+        'P': int(P),
+        'dtype': np.dtype(dtype).str,
+        'variable_names': variable_names,
+        'outcome_name': data_headers[0],
+        'has_sample_weights': sample_weights_csv_file is not None,
+        }
+
+    # the data starts at the first aligned offset after the header
+    header_json = json.dumps(header).encode('utf-8')
+    header_size = len(MMAP_MAGIC) + MMAP_OFFSET_DIGITS + len(header_json)
+    data_offset = MMAP_ALIGNMENT * int(np.ceil(header_size / MMAP_ALIGNMENT))
+    header_bytes = MMAP_MAGIC + (b'%0*d' % (MMAP_OFFSET_DIGITS, data_offset)) + header_json
+    header_bytes += b' ' * (data_offset - len(header_bytes))
+
+    mmap_file = Path(mmap_file)
+    with open(mmap_file, 'wb') as f:
+        f.write(header_bytes)
+
+    # second pass: write the data one chunk of rows at a time
+    values = np.memmap(mmap_file, dtype = dtype, mode = 'r+', offset = data_offset, shape = (N, n_cols), order = 'F')
+    start = 0
+    for chunk in pd.read_csv(dataset_csv_file, sep = ',', chunksize = chunk_size):
+        raw_data = chunk.to_numpy(dtype = dtype)
+        end = start + raw_data.shape[0]
+        Y = raw_data[:, 0]
+        Y[Y == 0] = -1
+        values[start:end, 0] = 1.0
+        values[start:end, 1:P] = raw_data[:, 1:]
+        values[start:end, P] = Y
+        start = end
+
+    if sample_weights_csv_file is not None:
+        start = 0
+        for chunk in pd.read_csv(sample_weights_csv_file, sep = ',', header = None, chunksize = chunk_size):
+            end = start + len(chunk)
+            values[start:end, P + 1] = chunk.to_numpy(dtype = dtype)[:, 0]
+            start = end
+        assert start == N, "dimension mismatch: read %r sample weights (expected N = %r)" % (start, N)
+
+    values.flush()
+    del values
+    return mmap_file
+
+
+def load_data_from_mmap(mmap_file):
+    """
+    loads training data from a binary file created with convert_csv_to_mmap
+    X and Y are memory-mapped so that the data is read from disk as needed
+
+    Parameters
+    ----------
+    mmap_file                       binary file created with convert_csv_to_mmap
+
+    Returns
+    -------
+    dictionary containing training data for a binary classification problem with the fields:
+
+     - 'X' N x P matrix of features (numpy.memmap) with a column of 1s for the INTERCEPT_NAME
+     - 'Y' N x 1 vector of labels (+1/-1) (numpy.memmap)
+     - 'variable_names' list of strings containing the names of each feature (list)
+     - 'outcome_name' string containing the name of the output
+     - 'sample_weights' N x 1 vector of sample weights (only if the file contains sample weights)
+    """
+    mmap_file = Path(mmap_file)
+    if not mmap_file.exists():
+        raise IOError('could not find mmap_file: %s' % mmap_file)
+
+    with open(mmap_file, 'rb') as f:
+        magic = f.read(len(MMAP_MAGIC))
+        if magic != MMAP_MAGIC:
+            raise IOError('%s is not a file created with convert_csv_to_mmap' % mmap_file)
+        data_offset = int(f.read(MMAP_OFFSET_DIGITS))
+        header = json.loads(f.read(data_offset - len(MMAP_MAGIC) - MMAP_OFFSET_DIGITS).decode('utf-8'))
+
+    N, P = header['N'], header['P']
+    n_cols = P + 1 + int(header['has_sample_weights'])
+    values = np.memmap(mmap_file, dtype = np.dtype(header['dtype']), mode = 'r', offset = data_offset, shape = (N, n_cols), order = 'F')
+
+    data = {
+        'X': values[:, 0:P],
+        'Y': values[:, P:P + 1],
+        'variable_names': header['variable_names'],
+        'outcome_name': header['outcome_name'],
+        }
+
+    if header['has_sample_weights']:
+        data['sample_weights'] = values[:, P + 1]
+
+    assert check_data(data)
+    return data
+
+
+def get_row_blocks(N, block_size):
+    """
+    returns a list of (start, end) indices that split N rows into blocks with at most block_size rows
+    """
+    block_size = max(1, int(block_size))
+    return [(start, min(start + block_size, N)) for start in range(0, N, block_size)]
+
+
+class MappedMatrix(object):
+    """
+    Out-of-core representation of Z = X * Y for a memory-mapped feature matrix X (see load_data_from_mmap).
+
+    Z is never stored in memory. All operations stream over blocks of rows (or over a single column of X, which is
+    contiguous on disk since X is stored in column-major order), so the resident memory is bounded by the size of a
+    block and the N x 1 vectors used by the loss functions and heuristics.
+    """
+
+    def __init__(self, X, Y, block_size = None):
+        """
+        Parameters
+        ----------
+        X:                      N x P matrix of features (numpy.memmap)
+        Y:                      N x 1 vector of labels (+1/-1)
+        block_size:             # of rows in each block (default is 2**20 // P)
+        """
+        N, P = X.shape
+        assert len(Y) == N
+        self._X = X
+        self._Y = np.asarray(Y, dtype = np.float_).flatten()
+        self._N = int(N)
+        self._P = int(P)
+        self._block_size = max(1, 2**20 // self._P) if block_size is None else int(block_size)
+        self._is_integer = None
+
+
+    @property
+    def shape(self):
+        return self._N, self._P
+
+
+    @property
+    def dtype(self):
+        return self._X.dtype
+
+
+    @property
+    def nbytes(self):
+        # memory used in RAM (the feature matrix stays on disk)
+        return self._Y.nbytes
+
+
+    @property
+    def row_blocks(self):
+        return get_row_blocks(self._N, self._block_size)
+
+
+    @property
+    def is_integer(self):
+        if self._is_integer is None:
+            self._is_integer = all(np.array_equal(Z_block, np.round(Z_block)) for Z_block in self.iter_row_blocks())
+        return self._is_integer
+
+
+    def iter_row_blocks(self):
+        for start, end in self.row_blocks:
+            yield self.get_rows(start, end)
+
+
+    def dot(self, rho):
+        """
+        returns scores = Z.dot(rho)
+        """
+        rho = np.asarray(rho, dtype = np.float_)
+        scores = np.empty(self._N)
+        for start, end in self.row_blocks:
+            scores[start:end] = self._X[start:end].dot(rho) * self._Y[start:end]
+        return scores
+
+
+    def tdot(self, v):
+        """
+        returns Z.T.dot(v)
+        """
+        out = np.zeros(self._P)
+        for start, end in self.row_blocks:
+            out += self._X[start:end].T.dot(v[start:end] * self._Y[start:end])
+        return out
+
+
+    def add_scaled_column(self, scores, dim_idx, step):
+        """
+        updates scores in place to scores + step * Z[:, dim_idx]
+        """
+        column_block_size = self._block_size * self._P
+        for start, end in get_row_blocks(self._N, column_block_size):
+            scores[start:end] += step * self._X[start:end, dim_idx] * self._Y[start:end]
+
+
+    def get_columns(self, dims):
+        """
+        returns Z[:, dims] as a dense numpy.array with shape = (n_rows, len(dims))
+        """
+        dims = np.atleast_1d(dims)
+        out = np.empty((self._N, len(dims)), order = 'F')
+        for k, j in enumerate(dims):
+            out[:, k] = self._X[:, j] * self._Y
+        return out
+
+
+    def get_rows(self, start, end):
+        """
+        returns Z[start:end, :] as a dense numpy.array
+        """
+        return np.asarray(self._X[start:end], dtype = np.float_) * self._Y[start:end, None]
+
+
+    def toarray(self):
+        return self.get_rows(0, self._N)
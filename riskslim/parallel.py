@@ -0,0 +1,95 @@
+import os
+from multiprocessing import shared_memory
+import numpy as np
+import scipy.sparse as sp
+
+# arrays in data that are shared with worker processes
+SHARED_DATA_FIELDS = ('X', 'Y', 'sample_weights')
+
+
+def share_data(data):
+    """
+    copies the arrays in data to shared memory so that worker processes can use them without copying
+
+    Parameters
+    ----------
+    data                dict containing training data (X must be a dense numpy.ndarray)
+
+    Returns
+    -------
+    blocks              list of SharedMemory objects (must be closed and unlinked with release_shared_data)
+    specs               dict that can be passed to attach_shared_data in a worker process
+    """
+    assert isinstance(data['X'], np.ndarray) and not isinstance(data['X'], np.memmap) and not sp.issparse(data['X']), \
+        'shared data requires a dense numpy.ndarray X'
+
+    N = data['X'].shape[0]
+    arrays = dict(data)
+    if arrays.get('sample_weights') is None:
+        arrays['sample_weights'] = np.ones(N)
+
+    blocks = []
+    specs = {'data_info': {k: v for k, v in data.items() if k not in SHARED_DATA_FIELDS}}
+    for field in SHARED_DATA_FIELDS:
+        values = np.ascontiguousarray(arrays[field], dtype = np.float64)
+        block = shared_memory.SharedMemory(create = True, size = max(values.nbytes, 1))
+        np.ndarray(values.shape, dtype = values.dtype, buffer = block.buf)[:] = values
+        blocks.append(block)
+        specs[field] = (block.name, values.shape, values.dtype.str)
+
+    return blocks, specs
+
+
+def attach_shared_data(specs):
+    """
+    returns the data stored in shared memory by share_data
+
+    Parameters
+    ----------
+    specs               dict from share_data
+
+    Returns
+    -------
+    blocks              list of SharedMemory objects (must stay open while data is used)
+    data                dict containing training data, where X, Y, and sample_weights are views of shared memory
+    """
+    data = dict(specs['data_info'])
+    blocks = []
+    for field in SHARED_DATA_FIELDS:
+        name, shape, dtype = specs[field]
+        block = shared_memory.SharedMemory(name = name)
+        data[field] = np.ndarray(shape, dtype = np.dtype(dtype), buffer = block.buf)
+        blocks.append(block)
+    return blocks, data
+
+
+def release_shared_data(blocks):
+    for block in blocks:
+        block.close()
+        block.unlink()
+
+
+def split_core_budget(settings, n_tasks, n_cores = None, n_workers = None):
+    """
+    splits a budget of cores between worker processes that each run LCPA
+
+    Parameters
+    ----------
+    settings            LCPA settings (updated in place)
+    n_tasks             # of tasks that can run in parallel
+    n_cores             max # of cores used by all workers (None = all cores)
+    n_workers           # of worker processes (None = min(n_tasks, n_cores))
+
+    Returns
+    -------
+    n_workers, n_cores_per_worker
+    settings['cplex_n_cores'] is set to n_cores_per_worker, and settings['loss_n_threads'] is at most n_cores_per_worker
+    """
+    n_cores = os.cpu_count() if n_cores is None else int(n_cores)
+    n_workers = min(n_tasks, n_cores) if n_workers is None else min(int(n_workers), n_tasks)
+    assert n_cores >= 1 and n_workers >= 1
+    n_cores_per_worker = max(1, n_cores // n_workers)
+    settings['cplex_n_cores'] = n_cores_per_worker
+    if settings['loss_n_threads'] == 0 or settings['loss_n_threads'] > n_cores_per_worker:
+        settings['loss_n_threads'] = n_cores_per_worker
+    return n_workers, n_cores_per_worker
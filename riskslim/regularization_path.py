@@ -0,0 +1,284 @@
+import time
+import numpy as np
+import pandas as pd
+from cplex import infinity as CPX_INFINITY
+from .defaults import DEFAULT_LCPA_SETTINGS
+from .lattice_cpa import setup_lattice_cpa, finish_lattice_cpa
+from .mip import add_mip_starts
+from .setup_functions import setup_penalty_parameters
+from .utils import print_log, validate_settings
+
+
+def get_warm_start_pool(initial_pool, loss_values, solutions, coef_set, c0_value):
+    """
+    adds solutions from previous runs to the initial pool of a run with a different c0_value
+
+    Parameters
+    ----------
+    initial_pool        SolutionPool from setup_lattice_cpa
+    loss_values         loss values of the solutions
+    solutions           M x P array of solutions that are feasible for the current constraints
+    coef_set            CoefficientSet
+    c0_value            L0 penalty of the current run
+
+    Returns
+    -------
+    SolutionPool with objective values computed for c0_value, sorted by objective value
+    """
+    if len(loss_values) == 0:
+        return initial_pool
+    _, C_0, L0_reg_ind, C_0_nnz = setup_penalty_parameters(c0_value = c0_value, coef_set = coef_set)
+    solutions = np.array(solutions, dtype = np.float_)
+    objvals = np.array(loss_values) + (solutions[:, L0_reg_ind] != 0.0).dot(C_0_nnz)
+    return initial_pool.add(objvals, solutions).distinct().sort()
+
+
+def add_warm_start_cuts(mip_objects, cuts):
+    """
+    adds loss cuts from previous runs on the same data to the initial cuts of a run
+
+    Parameters
+    ----------
+    mip_objects         output of setup_lattice_cpa (updated in place)
+    cuts                dict with fields 'coefs' (K x (P + 1) array of coefficients for the loss and rho variables) and
+                        'lhs' (K x 1 vector), e.g. mip_info['loss_cuts'] from a run with settings['record_loss_cuts'] = True
+
+    Returns
+    -------
+    number of cuts added
+    """
+    if cuts is None or len(cuts['lhs']) == 0:
+        return 0
+    indices = mip_objects['indices']
+    cut_idx = indices['loss'] + indices['rho']
+    initial_cuts = mip_objects['initial_cuts'] or {'coefs': [], 'lhs': []}
+    mip_objects['initial_cuts'] = {
+        'coefs': list(initial_cuts['coefs']) + [[cut_idx, coefs.tolist()] for coefs in cuts['coefs']],
+        'lhs': list(initial_cuts['lhs']) + np.asarray(cuts['lhs']).tolist(),
+        }
+    return len(cuts['lhs'])
+
+
+def run_c0_path(data, constraints, c0_values, settings = DEFAULT_LCPA_SETTINGS):
+    """
+    trains RiskSLIM models for a sequence of c0_values in decreasing order
+
+    each run is warm started with the results of the previous runs:
+
+    - the loss cuts from all previous runs (cuts do not depend on c0_value)
+    - the models from all previous runs (their objective values are recomputed for the current c0_value)
+    - bounds on the loss and the L0 norm, which are valid when the previous run was solved to optimality since
+      decreasing c0_value cannot increase the loss or decrease the model size of an optimal model
+
+    bounds are only carried over when CPLEX returns the status 'integer optimal solution', which requires the run to
+    close the optimality gap to zero. runs that stop with a nonzero gap (e.g. 'integer optimal, tolerance' when
+    settings['max_tolerance'] > 0, or the time limit) do not update the bounds. models from previous runs that violate
+    the carried bounds are not used as warm starts, since CPLEX rejects infeasible MIP starts.
+
+    the initialization procedure is only run for the first (largest) c0_value.
+
+    Parameters
+    ----------
+    data, dict containing training data should pass check_data
+    constraints, dict containing 'L0_min, L0_max, CoefficientSet'
+    c0_values, list of L0 penalties
+    settings, LCPA settings (settings['c0_value'] is ignored)
+
+    Returns
+    -------
+    path, list of model_info dicts sorted by decreasing c0_value (see get_path_table). each model_info also contains:
+
+     - 'setup_time' time to setup the MIP
+     - 'total_time' time to setup the MIP and run LCPA
+     - 'n_warm_start_cuts' number of cuts from previous runs
+     - 'n_warm_start_solutions' number of models from previous runs
+     - 'lcpa_info' output of finish_lattice_cpa
+    """
+    settings = validate_settings(settings, default_settings = DEFAULT_LCPA_SETTINGS)
+    c0_values = np.sort(np.unique(np.array(c0_values, dtype = np.float_)))[::-1]
+    assert len(c0_values) > 0 and np.all(c0_values > 0.0)
+
+    # bounds that carry over to smaller c0_values require that every coefficient is penalized by c0_value
+    coef_set = constraints['coef_set']
+    _, C_0, L0_reg_ind, _ = setup_penalty_parameters(c0_value = c0_values[0], coef_set = coef_set)
+    carry_bounds = np.all(C_0[~L0_reg_ind] == 0.0)
+
+    cuts = None
+    loss_values, solutions = [], []
+    bounds = {}
+    path = []
+
+    for k, c0_value in enumerate(c0_values):
+
+        print_log('-' * 60)
+        print_log('c0_value = %1.2e (%d of %d)' % (c0_value, k + 1, len(c0_values)))
+        print_log('-' * 60)
+
+        run_settings = dict(settings)
+        run_settings['c0_value'] = float(c0_value)
+        run_settings['record_loss_cuts'] = True
+        if k > 0:
+            run_settings['initialization_flag'] = False
+
+        start_time = time.time()
+        mip_objects = setup_lattice_cpa(data, constraints, run_settings, initial_bounds = bounds)
+
+        # add cuts and models from previous runs that satisfy the carried bounds
+        warm_start = [(v, rho) for v, rho in zip(loss_values, solutions)
+                      if v <= bounds.get('loss_max', float('inf')) and np.count_nonzero(rho[L0_reg_ind]) >= bounds.get('L0_min', 0)]
+        n_warm_start_cuts = add_warm_start_cuts(mip_objects, cuts)
+        mip_objects['initial_pool'] = get_warm_start_pool(mip_objects['initial_pool'], [v for v, _ in warm_start], [rho for _, rho in warm_start], coef_set, c0_value)
+        setup_time = time.time() - start_time
+
+        model_info, mip_info, lcpa_info = finish_lattice_cpa(data, constraints, mip_objects, run_settings)
+
+        model_info['setup_time'] = setup_time
+        model_info['total_time'] = time.time() - start_time
+        model_info['n_warm_start_cuts'] = n_warm_start_cuts
+        model_info['n_warm_start_solutions'] = len(warm_start)
+        model_info['lcpa_info'] = lcpa_info
+        path.append(model_info)
+
+        # collect cuts and models for the next run
+        # the recorded cuts include the initial cuts, so they replace the cuts from previous runs
+        cuts = mip_info['loss_cuts']
+        if lcpa_info['found_solution']:
+            loss_values.append(model_info['loss_value'])
+            solutions.append(model_info['solution'])
+
+            if carry_bounds and lcpa_info['cplex_status'] == 'integer optimal solution':
+                L0_norm = np.count_nonzero(model_info['solution'][L0_reg_ind])
+                bounds = {
+                    'loss_max': min(bounds.get('loss_max', float('inf')), model_info['loss_value']),
+                    'L0_min': max(bounds.get('L0_min', 0), L0_norm),
+                    }
+
+    return path
+
+
+def run_L0_path(data, constraints, L0_max_values, settings = DEFAULT_LCPA_SETTINGS):
+    """
+    trains RiskSLIM models for a sequence of model sizes in increasing order using one MIP
+
+    the MIP is built once with an auxiliary variable for the L0 norm. each run changes the bounds of the L0 norm, loss,
+    and objective value variables in place, and is warm started with:
+
+    - the loss cuts from all previous runs (cuts do not depend on L0_max)
+    - the models from all previous runs (models with L0 norm <= L0_max are feasible for larger values of L0_max)
+
+    the initialization procedure is only run once, for the largest model size.
+
+    Parameters
+    ----------
+    data, dict containing training data should pass check_data
+    constraints, dict containing 'L0_min, L0_max, CoefficientSet' (constraints['L0_max'] is ignored)
+    L0_max_values, list of model sizes
+    settings, LCPA settings
+
+    Returns
+    -------
+    path, list of model_info dicts sorted by increasing L0_max (see run_c0_path and get_path_table)
+    """
+    settings = validate_settings(settings, default_settings = DEFAULT_LCPA_SETTINGS)
+    settings['include_auxillary_variable_for_L0_norm'] = True
+    settings['include_auxillary_variable_for_objval'] = True
+    settings['record_loss_cuts'] = True
+
+    L0_max_values = np.sort(np.unique(np.array(L0_max_values, dtype = int)))
+    assert len(L0_max_values) > 0 and L0_max_values[0] >= constraints['L0_min']
+
+    _, _, L0_reg_ind, _ = setup_penalty_parameters(c0_value = settings['c0_value'], coef_set = constraints['coef_set'])
+    get_L0_norm = lambda rho: np.count_nonzero(rho[L0_reg_ind])
+
+    # build the MIP for the largest model size
+    # lower bounds on the loss and objective value for the largest model size are also valid for smaller sizes
+    start_time = time.time()
+    mip_constraints = dict(constraints)
+    mip_constraints['L0_max'] = int(L0_max_values[-1])
+    mip_objects = setup_lattice_cpa(data, mip_constraints, settings)
+    setup_time = time.time() - start_time
+
+    mip = mip_objects['mip']
+    indices = mip_objects['indices']
+    cut_idx = indices['loss'] + indices['rho']
+    base_bounds = dict(mip_objects['bounds'])
+    warm_start_pool = mip_objects['initial_pool'].copy()
+    initial_cuts = mip_objects['initial_cuts']
+
+    path = []
+    for k, L0_max in enumerate(L0_max_values):
+
+        print_log('-' * 60)
+        print_log('L0_max = %d (%d of %d)' % (L0_max, k + 1, len(L0_max_values)))
+        print_log('-' * 60)
+
+        start_time = time.time()
+        run_constraints = dict(constraints)
+        run_constraints['L0_max'] = int(L0_max)
+
+        # models from previous runs
+        initial_pool = warm_start_pool.copy().remove_infeasible(lambda rho: get_L0_norm(rho) <= L0_max).distinct().sort()
+
+        # bounds for this model size
+        # bounds on the L0 norm and upper bounds for the largest model size may not hold for smaller sizes
+        bounds = dict(base_bounds)
+        bounds['L0_min'] = constraints['L0_min']
+        bounds['L0_max'] = int(L0_max)
+        bounds['objval_max'] = float(initial_pool.objvals[0]) if len(initial_pool) > 0 else float('inf')
+        bounds['loss_max'] = bounds['objval_max']
+
+        mip.variables.set_lower_bounds(indices['L0_norm'], bounds['L0_min'])
+        mip.variables.set_upper_bounds(indices['L0_norm'], bounds['L0_max'])
+        mip.variables.set_upper_bounds(indices['objval'], min(bounds['objval_max'], CPX_INFINITY))
+        mip.variables.set_upper_bounds(indices['loss'][0], min(bounds['loss_max'], CPX_INFINITY))
+
+        # models from previous runs are passed to CPLEX as MIP starts
+        # finish_lattice_cpa only adds MIP starts when polishing is off, and otherwise polishes the best model
+        mip.MIP_starts.delete()
+        if settings['polish_flag'] and len(initial_pool) > 0:
+            add_mip_starts(mip, indices, initial_pool, mip_start_effort_level = mip.MIP_starts.effort_level.repair)
+
+        mip_objects['bounds'] = bounds
+        mip_objects['initial_pool'] = initial_pool
+        mip_objects['initial_cuts'] = initial_cuts
+        n_warm_start_cuts = 0 if initial_cuts is None else len(initial_cuts['lhs'])
+        run_setup_time = time.time() - start_time + (setup_time if k == 0 else 0.0)
+
+        model_info, mip_info, lcpa_info = finish_lattice_cpa(data, run_constraints, mip_objects, settings)
+
+        model_info['setup_time'] = run_setup_time
+        model_info['total_time'] = time.time() - start_time + (setup_time if k == 0 else 0.0)
+        model_info['n_warm_start_cuts'] = n_warm_start_cuts
+        model_info['n_warm_start_solutions'] = len(initial_pool)
+        model_info['lcpa_info'] = lcpa_info
+        path.append(model_info)
+
+        # collect cuts and models for the next run
+        # the recorded cuts include the initial cuts, so they replace the cuts from previous runs
+        loss_cuts = mip_info['loss_cuts']
+        if len(loss_cuts['lhs']) > 0:
+            initial_cuts = {
+                'coefs': [[cut_idx, coefs.tolist()] for coefs in loss_cuts['coefs']],
+                'lhs': loss_cuts['lhs'].tolist(),
+                }
+
+        if lcpa_info['found_solution']:
+            warm_start_pool.add(model_info['objective_value'], model_info['solution'])
+
+    return path
+
+
+def get_path_table(path, fields = ('c0_value', 'L0_max', 'objective_value', 'loss_value', 'optimality_gap', 'run_time', 'total_time', 'n_warm_start_cuts', 'n_warm_start_solutions')):
+    """
+    returns a table with one row for each model in the output of run_c0_path or run_L0_path
+
+    Parameters
+    ----------
+    path                list of model_info dicts
+    fields              fields of model_info to include in the table
+
+    Returns
+    -------
+    pandas.DataFrame
+    """
+    return pd.DataFrame([{f: model_info[f] for f in fields} for model_info in path], columns = list(fields))
@@ -1,9 +1,10 @@
 import numpy as np
+import scipy.sparse as sp
 from .coefficient_set import CoefficientSet, get_score_bounds
 from .utils import print_log
 
 
-def setup_loss_functions(data, coef_set, L0_max = None, loss_computation = None, w_pos = 1.0):
+def setup_loss_functions(data, coef_set, L0_max = None, loss_computation = None, w_pos = 1.0, compress_rows = False, n_threads = 1, deterministic = True, block_size = 0, interpolation_error = 1e-6, integer_lookup = False, table_cache_dir = None):
     """
 
     Parameters
@@ -13,15 +14,20 @@ def setup_loss_functions(data, coef_set, L0_max = None, loss_computation = None,
     L0_max
     loss_computation
     w_pos
+    compress_rows       set to True to collapse duplicate rows of Z into unique rows weighted by their multiplicity
+    n_threads           # of threads used by the fast loss functions (1 = serial, 0 = all cores)
+    deterministic       set to True so that multi-threaded loss functions do not depend on the number of threads
+    block_size          # of rows of Z processed at a time by the loss functions (0 = all rows at once)
+    interpolation_error max absolute error of the loss values computed from scores in the 'interpolated' loss computation
+    integer_lookup      set to True to store integer data as int8/int16 in the 'lookup' loss computation
+    table_cache_dir     directory used to share lookup tables between runs and processes (None = tables are not cached)
 
     Returns
     -------
 
     """
     #todo check if fast/lookup loss is installed
-    assert loss_computation in [None, 'weighted', 'normal', 'fast', 'lookup']
-
-    Z = data['X'] * data['Y']
+    assert loss_computation in [None, 'weighted', 'normal', 'fast', 'lookup', 'binary', 'mixed', 'interpolated']
 
     if 'sample_weights' in data:
         sample_weights = _setup_training_weights(Y = data['Y'], sample_weights = data['sample_weights'], w_pos = w_pos)
@@ -29,63 +35,236 @@ def setup_loss_functions(data, coef_set, L0_max = None, loss_computation = None,
     else:
         use_weighted = False
 
-    integer_data_flag = np.all(Z == np.require(Z, dtype = np.int_))
+    # memory-mapped data is never loaded into memory: losses, cuts and heuristics stream over blocks of rows
+    use_mmap = isinstance(data['X'], np.memmap)
+
+    # duplicate rows of dense data are collapsed into unique rows and handled by the weighted loss
+    if compress_rows and not (sp.issparse(data['X']) or use_mmap):
+        Z_unique, row_weights = _compress_rows(Z = data['X'] * data['Y'], sample_weights = sample_weights if use_weighted else None)
+        if Z_unique.shape[0] < data['X'].shape[0]:
+            print_log("compressed %d rows into %d unique rows" % (data['X'].shape[0], Z_unique.shape[0]))
+            sample_weights = row_weights
+            use_weighted = True
+        else:
+            compress_rows = False
+    else:
+        compress_rows = False
+
+    # sparse data is stored in CSC format so that heuristics can update scores one column at a time
+    # note: Z.T is a CSR matrix, which is used to compute the slope of the loss
+    use_sparse = sp.issparse(data['X'])
+
+    # binary data is stored as a bit-packed matrix when requested
+    use_binary = (loss_computation == 'binary') and not (use_sparse or use_mmap or use_weighted) and np.all((data['X'] == 0) | (data['X'] == 1))
+
+    if use_sparse:
+        Z = sp.csc_matrix(data['X'].multiply(data['Y']), dtype = np.float_)
+        Z.sum_duplicates()
+        Z.eliminate_zeros()
+        # sparse data always uses the 'normal' loss computation (see below)
+        integer_data_flag = False
+    elif use_mmap:
+        from riskslim.mapped_data import MappedMatrix
+        Z = MappedMatrix(data['X'], data['Y'])
+        integer_data_flag = False
+    elif use_binary:
+        from riskslim.loss_functions.binary_log_loss import BinaryMatrix
+        Z = BinaryMatrix(data['X'], data['Y'])
+        integer_data_flag = True
+    elif compress_rows:
+        Z = Z_unique
+        integer_data_flag = np.all(Z == np.require(Z, dtype = np.int_))
+    else:
+        Z = data['X'] * data['Y']
+        integer_data_flag = np.all(Z == np.require(Z, dtype = np.int_))
+
     use_lookup_table = isinstance(coef_set, CoefficientSet) and integer_data_flag
     if use_weighted:
         final_loss_computation = 'weighted'
+    elif use_sparse or use_mmap:
+        final_loss_computation = 'normal'
+    elif use_binary:
+        final_loss_computation = 'binary'
+    elif loss_computation == 'mixed':
+        final_loss_computation = 'mixed'
     elif use_lookup_table:
         final_loss_computation = 'lookup'
+    elif loss_computation == 'interpolated' and isinstance(coef_set, CoefficientSet):
+        final_loss_computation = 'interpolated'
     else:
         final_loss_computation = 'fast'
 
-    if final_loss_computation != loss_computation:
+    if final_loss_computation == 'normal' and loss_computation not in (None, 'normal'):
+        print_log("switching loss computation from %s to normal (%s data only supports the normal loss computation)" % (loss_computation, 'sparse' if use_sparse else 'memory-mapped'))
+    elif final_loss_computation != loss_computation:
         print_log("switching loss computation from %s to %s" % (loss_computation, final_loss_computation))
 
+    # preallocated buffers used to compute loss cuts inside the LossCallback
+    # note: there is no workspace for multi-threaded, sparse, memory-mapped, binary, mixed or IntegerMatrix data,
+    # and the LossCutCache in the LossCallback stores a copy of the slope of each new cut
+    loss_workspace = None
+
     if final_loss_computation == 'weighted':
 
         from riskslim.loss_functions.log_loss_weighted import \
             log_loss_value, \
             log_loss_value_and_slope, \
-            log_loss_value_from_scores
+            log_loss_value_from_scores, \
+            log_loss_value_from_scores_batch
 
-        Z = np.require(Z, requirements = ['C'])
         total_sample_weights = np.sum(sample_weights)
-
-        compute_loss = lambda rho: log_loss_value(Z, sample_weights, total_sample_weights, rho)
-        compute_loss_cut = lambda rho: log_loss_value_and_slope(Z, sample_weights, total_sample_weights, rho)
+        if use_mmap:
+            compute_loss, compute_loss_cut = _setup_blockwise_loss_functions(X = data['X'], Y = data['Y'], sample_weights = sample_weights)
+        else:
+            if not use_sparse:
+                Z = np.require(Z, requirements = ['C'])
+            compute_loss = lambda rho: log_loss_value(Z, sample_weights, total_sample_weights, rho)
+            compute_loss_cut = lambda rho: log_loss_value_and_slope(Z, sample_weights, total_sample_weights, rho)
         compute_loss_from_scores = lambda scores: log_loss_value_from_scores(sample_weights, total_sample_weights, scores)
+        compute_loss_from_scores_batch = lambda scores: log_loss_value_from_scores_batch(sample_weights, total_sample_weights, scores)
 
     elif final_loss_computation == 'normal':
 
         from riskslim.loss_functions.log_loss import \
             log_loss_value, \
             log_loss_value_and_slope, \
-            log_loss_value_from_scores
-
-        Z = np.require(Z, requirements=['C'])
-        compute_loss = lambda rho: log_loss_value(Z, rho)
-        compute_loss_cut = lambda rho: log_loss_value_and_slope(Z, rho)
+            log_loss_value_from_scores, \
+            log_loss_value_from_scores_batch
+
+        if use_mmap:
+            compute_loss, compute_loss_cut = _setup_blockwise_loss_functions(X = data['X'], Y = data['Y'])
+        else:
+            if not use_sparse:
+                Z = np.require(Z, requirements=['C'])
+            if block_size > 0:
+                from riskslim.loss_functions.log_loss import log_loss_value_blocked, log_loss_value_and_slope_blocked
+                compute_loss = lambda rho: log_loss_value_blocked(Z, rho, block_size)
+                compute_loss_cut = lambda rho: log_loss_value_and_slope_blocked(Z, rho, block_size)
+            else:
+                compute_loss = lambda rho: log_loss_value(Z, rho)
+                compute_loss_cut = lambda rho: log_loss_value_and_slope(Z, rho)
         compute_loss_from_scores = lambda scores: log_loss_value_from_scores(scores)
+        compute_loss_from_scores_batch = lambda scores: log_loss_value_from_scores_batch(scores)
 
     elif final_loss_computation == 'fast':
 
         from riskslim.loss_functions.fast_log_loss import \
             log_loss_value, \
             log_loss_value_and_slope, \
-            log_loss_value_from_scores
+            log_loss_value_from_scores, \
+            log_loss_value_from_scores_batch
 
         Z = np.require(Z, requirements=['F'])
+        if n_threads == 1:
+            from riskslim.loss_functions.fast_log_loss import LossWorkspace
+            loss_workspace = LossWorkspace(Z, block_size = block_size)
+
+        if n_threads == 1 and block_size > 0:
+            from riskslim.loss_functions.fast_log_loss import \
+                get_scratch_buffer, \
+                log_loss_value_blocked, \
+                log_loss_value_and_slope_blocked
+
+            # each handle reuses its own buffer of block_size scores
+            loss_scratch = get_scratch_buffer(Z.shape[0], block_size)
+            cut_scratch = get_scratch_buffer(Z.shape[0], block_size)
+            compute_loss = lambda rho: log_loss_value_blocked(Z, rho, block_size, loss_scratch)
+            compute_loss_cut = lambda rho: log_loss_value_and_slope_blocked(Z, rho, block_size, cut_scratch)
+            compute_loss_from_scores = lambda scores: log_loss_value_from_scores(scores)
+        elif n_threads == 1:
+            compute_loss = lambda rho: log_loss_value(Z, rho)
+            compute_loss_cut = lambda rho: log_loss_value_and_slope(Z, rho)
+            compute_loss_from_scores = lambda scores: log_loss_value_from_scores(scores)
+        else:
+            from riskslim.loss_functions.fast_log_loss import \
+                log_loss_value_parallel, \
+                log_loss_value_and_slope_parallel, \
+                log_loss_value_from_scores_parallel
+
+            print_log("using %s threads for loss computation" % ('all' if n_threads <= 0 else n_threads))
+            compute_loss = lambda rho: log_loss_value_parallel(Z, rho, n_threads, deterministic)
+            compute_loss_cut = lambda rho: log_loss_value_and_slope_parallel(Z, rho, n_threads, deterministic)
+            compute_loss_from_scores = lambda scores: log_loss_value_from_scores_parallel(scores, n_threads, deterministic)
+        compute_loss_from_scores_batch = lambda scores: log_loss_value_from_scores_batch(scores)
+
+    elif final_loss_computation == 'interpolated':
+
+        from riskslim.loss_functions.fast_log_loss import \
+            LossWorkspace, \
+            log_loss_value, \
+            log_loss_value_and_slope, \
+            log_loss_value_from_scores_batch
+
+        import riskslim.loss_functions.interpolated_log_loss as interpolated
+
+        # loss values and cuts are exact; loss values computed from scores (used by the heuristics) are interpolated
+        s_min, s_max = get_score_bounds(Z_min = np.min(Z, axis=0),
+                                        Z_max = np.max(Z, axis=0),
+                                        rho_lb = coef_set.lb,
+                                        rho_ub = coef_set.ub,
+                                        L0_reg_ind = np.array(coef_set.c0) == 0.0,
+                                        L0_max = L0_max)
+
+        loss_value_tbl, tbl_step = interpolated.get_interpolation_table(s_min, s_max, interpolation_error)
+        print_log("%d rows in interpolation table (max error = %1.2e)" % (len(loss_value_tbl), interpolation_error))
+
+        Z = np.require(Z, requirements=['F'])
+        loss_workspace = LossWorkspace(Z, block_size = block_size)
+        compute_loss = lambda rho: log_loss_value(Z, rho)
+        compute_loss_cut = lambda rho: log_loss_value_and_slope(Z, rho)
+        compute_loss_from_scores = lambda scores: interpolated.log_loss_value_from_scores(scores, loss_value_tbl, s_min, tbl_step)
+        compute_loss_from_scores_batch = lambda scores: log_loss_value_from_scores_batch(scores)
+
+    elif final_loss_computation == 'binary':
+
+        from riskslim.loss_functions.binary_log_loss import \
+            log_loss_value, \
+            log_loss_value_and_slope
+
+        from riskslim.loss_functions.fast_log_loss import \
+            log_loss_value_from_scores, \
+            log_loss_value_from_scores_batch
+
+        print_log("storing %d x %d binary data matrix in %d bytes" % (Z.N, Z.P, Z.nbytes))
         compute_loss = lambda rho: log_loss_value(Z, rho)
         compute_loss_cut = lambda rho: log_loss_value_and_slope(Z, rho)
         compute_loss_from_scores = lambda scores: log_loss_value_from_scores(scores)
+        compute_loss_from_scores_batch = lambda scores: log_loss_value_from_scores_batch(scores)
+
+    elif final_loss_computation == 'mixed':
+
+        from riskslim.loss_functions.fast_log_loss import \
+            log_loss_value_from_scores, \
+            log_loss_value_from_scores_batch
+
+        # integer data is stored exactly as int8/int16; other data is stored as float32
+        import riskslim.loss_functions.integer_lookup_log_loss as integer_lookup
+        int_type = integer_lookup.get_integer_dtype(Z) if integer_data_flag else None
+        if int_type is not None:
+            Z = integer_lookup.IntegerMatrix(Z, dtype = int_type)
+            compute_loss = lambda rho: log_loss_value_from_scores(Z.dot(rho))
+            compute_loss_cut = lambda rho: integer_lookup.log_loss_value_and_slope_real(Z, rho)
+            get_loss_error_bound = lambda rho: 0.0
+        else:
+            import riskslim.loss_functions.mixed_log_loss as mixed
+            Z = np.require(Z, requirements = ['F'], dtype = np.float32)
+            compute_loss = lambda rho: mixed.log_loss_value(Z, rho)
+            compute_loss_cut = lambda rho: mixed.log_loss_value_and_slope(Z, rho)
+            get_loss_error_bound = lambda rho: mixed.get_loss_error_bound(Z, rho)
+
+        print_log("storing %d x %d data matrix as %s in %d bytes" % (Z.shape[0], Z.shape[1], Z.dtype, Z.nbytes))
+        compute_loss_from_scores = lambda scores: log_loss_value_from_scores(scores)
+        compute_loss_from_scores_batch = lambda scores: log_loss_value_from_scores_batch(scores)
 
     elif final_loss_computation == 'lookup':
 
         from riskslim.loss_functions.lookup_log_loss import \
+            LossWorkspace, \
             get_loss_value_and_prob_tables, \
             log_loss_value, \
             log_loss_value_and_slope, \
-            log_loss_value_from_scores
+            log_loss_value_from_scores, \
+            log_loss_value_from_scores_batch
 
         s_min, s_max = get_score_bounds(Z_min = np.min(Z, axis=0),
                                         Z_max = np.max(Z, axis=0),
@@ -95,13 +274,39 @@ def setup_loss_functions(data, coef_set, L0_max = None, loss_computation = None,
                                         L0_max = L0_max)
 
 
-        Z = np.require(Z, requirements=['F'], dtype = np.float)
+        # store Z as int8/int16 and compute integer scores when requested and the data and scores fit in narrow types
+        # note: polishing and the LossCallback use dense float64 kernels, so this trades speed for memory
+        int_type = _get_integer_lookup_type(Z, coef_set, s_min, s_max) if integer_lookup else None
+        use_integer_lookup = int_type is not None
         print_log("%d rows in lookup table" % (s_max - s_min + 1))
 
-        loss_value_tbl, prob_value_tbl, tbl_offset = get_loss_value_and_prob_tables(s_min, s_max)
-        compute_loss = lambda rho: log_loss_value(Z, rho, loss_value_tbl, tbl_offset)
-        compute_loss_cut = lambda rho: log_loss_value_and_slope(Z, rho, loss_value_tbl, prob_value_tbl, tbl_offset)
+        if table_cache_dir is None:
+            loss_value_tbl, prob_value_tbl, tbl_offset = get_loss_value_and_prob_tables(s_min, s_max)
+        else:
+            from riskslim.lookup_table_cache import get_cached_loss_value_and_prob_tables
+            loss_value_tbl, prob_value_tbl, tbl_offset = get_cached_loss_value_and_prob_tables(s_min, s_max, table_cache_dir)
+        if use_integer_lookup:
+            import riskslim.loss_functions.integer_lookup_log_loss as integer_lookup
+            Z = integer_lookup.IntegerMatrix(Z, dtype = int_type)
+            print_log("storing %d x %d data matrix as %s in %d bytes" % (Z.N, Z.P, Z.dtype, Z.nbytes))
+            compute_loss = lambda rho: integer_lookup.log_loss_value(Z, rho, loss_value_tbl, tbl_offset)
+            compute_loss_cut = lambda rho: integer_lookup.log_loss_value_and_slope(Z, rho, loss_value_tbl, prob_value_tbl, tbl_offset)
+        elif block_size > 0:
+            from riskslim.loss_functions.lookup_log_loss import log_loss_value_blocked, log_loss_value_and_slope_blocked
+            from riskslim.loss_functions.fast_log_loss import get_scratch_buffer
+            Z = np.require(Z, requirements=['F'], dtype = np.float)
+            loss_workspace = LossWorkspace(Z, loss_value_tbl, prob_value_tbl, tbl_offset, block_size = block_size)
+            loss_scratch = get_scratch_buffer(Z.shape[0], block_size)
+            cut_scratch = get_scratch_buffer(Z.shape[0], block_size)
+            compute_loss = lambda rho: log_loss_value_blocked(Z, rho, loss_value_tbl, tbl_offset, block_size, loss_scratch)
+            compute_loss_cut = lambda rho: log_loss_value_and_slope_blocked(Z, rho, loss_value_tbl, prob_value_tbl, tbl_offset, block_size, cut_scratch)
+        else:
+            Z = np.require(Z, requirements=['F'], dtype = np.float)
+            loss_workspace = LossWorkspace(Z, loss_value_tbl, prob_value_tbl, tbl_offset)
+            compute_loss = lambda rho: log_loss_value(Z, rho, loss_value_tbl, tbl_offset)
+            compute_loss_cut = lambda rho: log_loss_value_and_slope(Z, rho, loss_value_tbl, prob_value_tbl, tbl_offset)
         compute_loss_from_scores = lambda scores: log_loss_value_from_scores(scores, loss_value_tbl, tbl_offset)
+        compute_loss_from_scores_batch = lambda scores: log_loss_value_from_scores_batch(scores, loss_value_tbl, tbl_offset)
 
     # real loss functions
     if final_loss_computation == 'lookup':
@@ -109,17 +314,65 @@ def setup_loss_functions(data, coef_set, L0_max = None, loss_computation = None,
         from riskslim.loss_functions.fast_log_loss import \
             log_loss_value as loss_value_real, \
             log_loss_value_and_slope as loss_value_and_slope_real,\
-            log_loss_value_from_scores as loss_value_from_scores_real
+            log_loss_value_from_scores as loss_value_from_scores_real, \
+            log_loss_value_from_scores_batch as loss_value_from_scores_real_batch
+
+        if use_integer_lookup:
+            compute_loss_real = lambda rho: loss_value_from_scores_real(Z.dot(rho))
+            compute_loss_cut_real = lambda rho: integer_lookup.log_loss_value_and_slope_real(Z, rho)
+        elif block_size > 0:
+            from riskslim.loss_functions.fast_log_loss import \
+                log_loss_value_blocked as loss_value_real_blocked, \
+                log_loss_value_and_slope_blocked as loss_value_and_slope_real_blocked
+
+            loss_real_scratch = get_scratch_buffer(Z.shape[0], block_size)
+            cut_real_scratch = get_scratch_buffer(Z.shape[0], block_size)
+            compute_loss_real = lambda rho: loss_value_real_blocked(Z, rho, block_size, loss_real_scratch)
+            compute_loss_cut_real = lambda rho: loss_value_and_slope_real_blocked(Z, rho, block_size, cut_real_scratch)
+        else:
+            compute_loss_real = lambda rho: loss_value_real(Z, rho)
+            compute_loss_cut_real = lambda rho: loss_value_and_slope_real(Z, rho)
+        compute_loss_from_scores_real = lambda scores: loss_value_from_scores_real(scores)
+        compute_loss_from_scores_real_batch = lambda scores: loss_value_from_scores_real_batch(scores)
 
-        compute_loss_real = lambda rho: loss_value_real(Z, rho)
-        compute_loss_cut_real = lambda rho: loss_value_and_slope_real(Z, rho)
+    elif final_loss_computation == 'interpolated':
+
+        from riskslim.loss_functions.fast_log_loss import log_loss_value_from_scores as loss_value_from_scores_real
+
+        compute_loss_real = compute_loss
+        compute_loss_cut_real = compute_loss_cut
         compute_loss_from_scores_real = lambda scores: loss_value_from_scores_real(scores)
+        compute_loss_from_scores_real_batch = compute_loss_from_scores_batch
+
+    elif final_loss_computation == 'mixed':
+
+        # loss values and cuts are computed in float64 over blocks of rows so that Z is never stored in float64
+        compute_loss_real, compute_loss_cut_real = _setup_blockwise_loss_functions(X = data['X'], Y = data['Y'])
+        compute_loss_from_scores_real = compute_loss_from_scores
+        compute_loss_from_scores_real_batch = compute_loss_from_scores_batch
 
     else:
 
         compute_loss_real = compute_loss
         compute_loss_cut_real = compute_loss_cut
         compute_loss_from_scores_real = compute_loss_from_scores
+        compute_loss_from_scores_real_batch = compute_loss_from_scores_batch
+
+    # information needed by compiled heuristics
+    loss_info = {'loss_computation': final_loss_computation}
+    if final_loss_computation == 'lookup':
+        loss_info['loss_value_tbl'] = loss_value_tbl
+        loss_info['prob_value_tbl'] = prob_value_tbl
+        loss_info['tbl_offset'] = int(tbl_offset)
+    elif final_loss_computation == 'weighted':
+        loss_info['sample_weights'] = sample_weights
+    elif final_loss_computation == 'mixed':
+        loss_info['get_loss_error_bound'] = get_loss_error_bound
+    elif final_loss_computation == 'interpolated':
+        loss_info['interpolation_error'] = interpolation_error
+
+    if loss_workspace is not None:
+        loss_info['loss_workspace'] = loss_workspace
 
     return (Z,
             compute_loss,
@@ -127,7 +380,138 @@ def setup_loss_functions(data, coef_set, L0_max = None, loss_computation = None,
             compute_loss_from_scores,
             compute_loss_real,
             compute_loss_cut_real,
-            compute_loss_from_scores_real)
+            compute_loss_from_scores_real,
+            compute_loss_from_scores_real_batch,
+            loss_info)
+
+
+def _setup_blockwise_loss_functions(X, Y, sample_weights = None, block_size = None):
+    """
+    returns handles that compute the value and slope of the logistic loss in float64 over blocks of rows of Z = X * Y
+
+    Parameters
+    ----------
+    X                   N x P matrix of features (numpy.ndarray or numpy.memmap)
+    Y                   N x 1 vector of labels (+1/-1)
+    sample_weights      N x 1 vector of training weights (optional; computes the weighted loss if provided)
+    block_size          # of rows in each block (default: 2**20 // P)
+
+    Returns
+    -------
+    compute_loss        function handle such that compute_loss(rho) returns loss_value
+    compute_loss_cut    function handle such that compute_loss_cut(rho) returns (loss_value, loss_slope)
+    """
+    N, P = X.shape
+    block_size = max(1, 2**20 // P) if block_size is None else int(block_size)
+    blocks = [(start, min(start + block_size, N)) for start in range(0, N, block_size)]
+    get_block = lambda start, end: np.require(X[start:end] * Y[start:end], dtype = np.float_, requirements = ['C'])
+
+    # block_loss / block_loss_cut return the contribution of the rows in each block to the loss value and slope
+    if sample_weights is None:
+        from riskslim.loss_functions.log_loss import log_loss_value, log_loss_value_and_slope
+        block_loss = lambda start, end, rho: log_loss_value(get_block(start, end), rho) * ((end - start) / N)
+        block_loss_cut = lambda start, end, rho: tuple(v * ((end - start) / N) for v in log_loss_value_and_slope(get_block(start, end), rho))
+    else:
+        from riskslim.loss_functions.log_loss_weighted import log_loss_value, log_loss_value_and_slope
+        sample_weights = np.asarray(sample_weights, dtype = np.float_).flatten()
+        total_sample_weights = np.sum(sample_weights)
+        block_loss = lambda start, end, rho: log_loss_value(get_block(start, end), sample_weights[start:end], total_sample_weights, rho)
+        block_loss_cut = lambda start, end, rho: log_loss_value_and_slope(get_block(start, end), sample_weights[start:end], total_sample_weights, rho)
+
+    def compute_loss(rho):
+        rho = np.asarray(rho, dtype = np.float_)
+        return sum(block_loss(start, end, rho) for start, end in blocks)
+
+    def compute_loss_cut(rho):
+        rho = np.asarray(rho, dtype = np.float_)
+        loss_value = 0.0
+        loss_slope = np.zeros(P)
+        for start, end in blocks:
+            block_value, block_slope = block_loss_cut(start, end, rho)
+            loss_value += block_value
+            loss_slope += block_slope
+        return loss_value, loss_slope
+
+    return compute_loss, compute_loss_cut
+
+
+def check_loss_precision(compute_loss, compute_loss_real, rho, max_error, rtol = 1e-12):
+    """
+    compares the loss computed by compute_loss with the loss computed by compute_loss_real at rho
+
+    Parameters
+    ----------
+    compute_loss        function handle to compute the loss (e.g. in mixed precision)
+    compute_loss_real   function handle to compute the loss in float64
+    rho                 P x 1 vector of coefficients
+    max_error           bound on the error of compute_loss (e.g. from mixed_log_loss.get_loss_error_bound)
+    rtol                relative tolerance for roundoff error in the float64 sums
+
+    Returns
+    -------
+    error               |compute_loss(rho) - compute_loss_real(rho)|
+    """
+    loss_value_real = compute_loss_real(rho)
+    error = abs(compute_loss(rho) - loss_value_real)
+    if error > max_error + rtol * abs(loss_value_real):
+        print_log("warning: loss error = %1.4e exceeds the error bound = %1.4e" % (error, max_error))
+    return error
+
+
+def _compress_rows(Z, sample_weights = None):
+    """
+    collapses duplicate rows of Z into unique rows. the weight of each unique row is the total weight of its copies,
+    so that the weighted loss over the unique rows is equal to the (weighted) loss over all rows of Z
+
+    Parameters
+    ----------
+    Z                   N x P data matrix computed as X * Y (numpy.ndarray)
+    sample_weights      N x 1 vector of sample weights (optional; default is 1.0 for every row)
+
+    Returns
+    -------
+    Z_unique            M x P matrix of the unique rows of Z
+    row_weights         M x 1 vector of weights for each unique row
+    """
+    Z = np.asarray(Z)
+    if sample_weights is None:
+        sample_weights = np.ones(Z.shape[0])
+
+    Z_unique, row_idx = np.unique(Z, axis = 0, return_inverse = True)
+    row_weights = np.bincount(row_idx.flatten(), weights = np.asarray(sample_weights, dtype = np.float_).flatten(), minlength = Z_unique.shape[0])
+    return Z_unique, row_weights
+
+
+def _get_integer_lookup_type(Z, coef_set, s_min, s_max):
+    """
+    returns the integer type (numpy.int8 or numpy.int16) used to store Z for the integer lookup engine,
+    or None if Z cannot be stored exactly or if the coefficients/scores do not fit in int32
+
+    Parameters
+    ----------
+    Z           N x P data matrix computed as X * Y (numpy.ndarray with integer values)
+    coef_set    CoefficientSet
+    s_min       smallest score that can be attained by any point
+    s_max       largest score that can be attained by any point
+
+    Returns
+    -------
+    int_type
+    """
+    try:
+        from riskslim.loss_functions.integer_lookup_log_loss import get_integer_dtype
+    except ImportError:
+        return None
+
+    int32_info = np.iinfo(np.int32)
+    coef_bounds = np.concatenate((np.array(coef_set.lb, dtype = np.float_), np.array(coef_set.ub, dtype = np.float_)))
+    if not np.all((int32_info.min <= coef_bounds) & (coef_bounds <= int32_info.max)):
+        return None
+
+    if not (int32_info.min <= s_min and s_max <= int32_info.max):
+        return None
+
+    return get_integer_dtype(Z)
 
 
 def _setup_training_weights(Y, sample_weights = None, w_pos = 1.0, w_neg = 1.0, w_total_target = 2.0):
@@ -215,62 +599,179 @@ def setup_objective_functions(compute_loss, L0_reg_ind, C_0_nnz):
     return (get_objval, get_L0_norm, get_L0_penalty, get_alpha, get_L0_penalty_from_alpha)
 
 
-def get_loss_bounds(Z, rho_ub, rho_lb, L0_reg_ind, L0_max = float('nan')):
+def get_loss_bounds(Z, rho_ub, rho_lb, L0_reg_ind, L0_max = float('nan'), sample_weights = None, block_size = None):
     # min value of loss = log(1+exp(-score)) occurs at max score for each point
     # max value of loss = loss(1+exp(-score)) occurs at min score for each point
+    # if sample_weights are provided, the bounds are weighted averages over the points (as in log_loss_weighted)
+    # points are processed in blocks of rows so that we never store a dense N x P matrix
 
     rho_lb = np.array(rho_lb)
     rho_ub = np.array(rho_ub)
+    L0_reg_ind = np.array(L0_reg_ind, dtype = np.bool_)
 
     # get maximum number of regularized coefficients
     L0_max = Z.shape[0] if np.isnan(L0_max) else L0_max
-    num_max_reg_coefs = min(L0_max, sum(L0_reg_ind))
+    num_max_reg_coefs = int(min(L0_max, sum(L0_reg_ind)))
+
+    if block_size is None:
+        block_size = max(1, 2**20 // Z.shape[1])
+
+    min_loss, max_loss = _get_mean_loss_bounds(Z, rho_ub, rho_lb, L0_reg_ind, num_max_reg_coefs, sample_weights, block_size)
+    return min_loss, max_loss
+
+
+def get_loss_bounds_by_L0(Z, rho_ub, rho_lb, L0_reg_ind, L0_max = float('nan'), sample_weights = None, block_size = None):
+    """
+    computes the bounds on the loss returned by get_loss_bounds for every L0_max = 0, 1, ..., L0_max
+
+    the bounds are computed in a single pass over blocks of rows. once computed, the bounds for a smaller L0_max can be
+    looked up in O(1), which lets us tighten loss_min and loss_max whenever L0_max is reduced during B&B.
+
+    Parameters
+    ----------
+    Z                   N x P data matrix computed as X * Y
+    rho_ub              P x 1 vector of upper bounds on the coefficients
+    rho_lb              P x 1 vector of lower bounds on the coefficients
+    L0_reg_ind          P x 1 boolean vector with L0_reg_ind[j] = True if rho[j] is regularized
+    L0_max              max # of non-zero regularized coefficients
+    sample_weights      N x 1 vector of sample weights (optional)
+    block_size          # of rows in each block (default: 2**20 // P)
+
+    Returns
+    -------
+    loss_min_by_L0      vector such that loss_min_by_L0[k] is the smallest loss when at most k coefficients are non-zero
+    loss_max_by_L0      vector such that loss_max_by_L0[k] is the largest loss when at most k coefficients are non-zero
+    """
+    rho_lb = np.array(rho_lb)
+    rho_ub = np.array(rho_ub)
+    L0_reg_ind = np.array(L0_reg_ind, dtype = np.bool_)
+
+    L0_max = Z.shape[0] if np.isnan(L0_max) else L0_max
+    num_max_reg_coefs = int(min(L0_max, sum(L0_reg_ind)))
 
-    # calculate the smallest and largest score that can be attained by each point
+    if block_size is None:
+        block_size = max(1, 2**20 // max(Z.shape[1], num_max_reg_coefs + 1))
+
+    loss_min_by_L0, loss_max_by_L0 = _get_mean_loss_bounds(Z, rho_ub, rho_lb, L0_reg_ind, num_max_reg_coefs, sample_weights, block_size, by_L0 = True)
+    return loss_min_by_L0, loss_max_by_L0
+
+
+def _get_mean_loss_bounds(Z, rho_ub, rho_lb, L0_reg_ind, num_max_reg_coefs, sample_weights, block_size, by_L0 = False):
+    """
+    computes the (weighted) average of the smallest and largest loss of each point over blocks of block_size rows
+    if by_L0 = True, returns vectors whose entry k is the bound when at most k reg coefficients are non-zero
+    """
+    N = Z.shape[0]
+    get_rows = _get_dense_row_handle(Z)
+    total_min_loss = np.zeros(num_max_reg_coefs + 1) if by_L0 else 0.0
+    total_max_loss = np.zeros(num_max_reg_coefs + 1) if by_L0 else 0.0
+    for start in range(0, N, block_size):
+        end = min(start + block_size, N)
+        min_score, max_score = _get_score_bounds_by_row(get_rows(start, end), rho_ub, rho_lb, L0_reg_ind, num_max_reg_coefs, by_L0)
+        if sample_weights is None:
+            total_min_loss += np.sum(_get_loss_values(max_score), axis = 0)
+            total_max_loss += np.sum(_get_loss_values(min_score), axis = 0)
+        else:
+            total_min_loss += np.dot(sample_weights[start:end], _get_loss_values(max_score))
+            total_max_loss += np.dot(sample_weights[start:end], _get_loss_values(min_score))
+
+    total_weight = N if sample_weights is None else np.sum(sample_weights)
+    return total_min_loss / total_weight, total_max_loss / total_weight
+
+
+def _get_dense_row_handle(Z):
+    """
+    returns a function handle such that get_rows(start, end) returns Z[start:end, :] as a dense numpy.array
+    """
+    if isinstance(Z, np.ndarray):
+        return lambda start, end: np.asarray(Z[start:end], dtype = np.float_)
+    elif sp.issparse(Z):
+        Z_rows = sp.csr_matrix(Z)
+        return lambda start, end: Z_rows[start:end].toarray()
+    return Z.get_rows
+
+
+def _get_loss_values(scores):
+    """
+    computes log(1 + exp(-scores)) for each score in a numerically stable way
+    """
+    idx = scores > 0
+    loss_values = np.empty_like(scores)
+    loss_values[idx] = np.log1p(np.exp(-scores[idx]))
+    loss_values[~idx] = np.log1p(np.exp(scores[~idx])) - scores[~idx]
+    return loss_values
+
+
+def _get_score_bounds_by_row(Z, rho_ub, rho_lb, L0_reg_ind, num_max_reg_coefs, by_L0 = False):
+    """
+    computes the smallest and largest score that can be attained by each point
+
+    Parameters
+    ----------
+    Z                   N x P data matrix computed as X * Y (numpy.ndarray)
+    rho_ub              P x 1 vector of upper bounds on the coefficients
+    rho_lb              P x 1 vector of lower bounds on the coefficients
+    L0_reg_ind          P x 1 boolean vector with L0_reg_ind[j] = True if rho[j] is regularized
+    num_max_reg_coefs   max # of non-zero regularized coefficients
+    by_L0               set to True to compute the scores for every # of non-zero regularized coefficients
+
+    Returns
+    -------
+    min_score           N x 1 vector of the smallest score for each point
+    max_score           N x 1 vector of the largest score for each point
+    if by_L0 = True, min_score and max_score are N x (num_max_reg_coefs + 1) matrices whose column k contains the
+    smallest and largest score of each point when at most k regularized coefficients are non-zero
+    """
     scores_at_lb = Z * rho_lb
     scores_at_ub = Z * rho_ub
     max_scores_matrix = np.maximum(scores_at_ub, scores_at_lb)
-    min_scores_matrix = np.minimum(scores_at_ub, scores_at_lb)
-    assert (np.all(max_scores_matrix >= min_scores_matrix))
+    min_scores_matrix = np.minimum(scores_at_ub, scores_at_lb, out = scores_at_lb)
+    del scores_at_ub
 
-    # for each example, compute max sum of scores from top reg coefficients
-    max_scores_reg = max_scores_matrix[:, L0_reg_ind]
-    max_scores_reg = -np.sort(-max_scores_reg, axis=1)
-    max_scores_reg = max_scores_reg[:, 0:num_max_reg_coefs]
-    max_score_reg = np.sum(max_scores_reg, axis=1)
+    # for each example, compute the max/min sum of scores from the top reg coefficients
+    if by_L0:
+        max_score_reg = _cumsum_top_k(max_scores_matrix[:, L0_reg_ind], num_max_reg_coefs)
+        min_score_reg = -_cumsum_top_k(-min_scores_matrix[:, L0_reg_ind], num_max_reg_coefs)
+    else:
+        max_score_reg = _sum_top_k(max_scores_matrix[:, L0_reg_ind], num_max_reg_coefs)
+        min_score_reg = -_sum_top_k(-min_scores_matrix[:, L0_reg_ind], num_max_reg_coefs)
 
-    # for each example, compute max sum of scores from no reg coefficients
-    max_scores_no_reg = max_scores_matrix[:, ~L0_reg_ind]
-    max_score_no_reg = np.sum(max_scores_no_reg, axis=1)
+    # for each example, compute the max/min sum of scores from no reg coefficients
+    max_score_no_reg = np.sum(max_scores_matrix[:, ~L0_reg_ind], axis=1)
+    min_score_no_reg = np.sum(min_scores_matrix[:, ~L0_reg_ind], axis=1)
+    if by_L0:
+        max_score_no_reg = max_score_no_reg[:, None]
+        min_score_no_reg = min_score_no_reg[:, None]
 
-    # max score for each example
     max_score = max_score_reg + max_score_no_reg
-
-    # for each example, compute min sum of scores from top reg coefficients
-    min_scores_reg = min_scores_matrix[:, L0_reg_ind]
-    min_scores_reg = np.sort(min_scores_reg, axis=1)
-    min_scores_reg = min_scores_reg[:, 0:num_max_reg_coefs]
-    min_score_reg = np.sum(min_scores_reg, axis=1)
-
-    # for each example, compute min sum of scores from no reg coefficients
-    min_scores_no_reg = min_scores_matrix[:, ~L0_reg_ind]
-    min_score_no_reg = np.sum(min_scores_no_reg, axis=1)
-
     min_score = min_score_reg + min_score_no_reg
     assert (np.all(max_score >= min_score))
 
-    # compute min loss
-    idx = max_score > 0
-    min_loss = np.empty_like(max_score)
-    min_loss[idx] = np.log1p(np.exp(-max_score[idx]))
-    min_loss[~idx] = np.log1p(np.exp(max_score[~idx])) - max_score[~idx]
-    min_loss = min_loss.mean()
+    return min_score, max_score
 
-    # compute max loss
-    idx = min_score > 0
-    max_loss = np.empty_like(min_score)
-    max_loss[idx] = np.log1p(np.exp(-min_score[idx]))
-    max_loss[~idx] = np.log1p(np.exp(min_score[~idx])) - min_score[~idx]
-    max_loss = max_loss.mean()
 
-    return min_loss, max_loss
+def _sum_top_k(values, k):
+    """
+    returns the sum of the k largest entries in each row of values using a partial sort
+    """
+    n_cols = values.shape[1]
+    if k <= 0:
+        return np.zeros(values.shape[0])
+    if k >= n_cols:
+        return np.sum(values, axis=1)
+    return np.sum(np.partition(values, n_cols - k, axis=1)[:, n_cols - k:], axis=1)
+
+
+def _cumsum_top_k(values, k):
+    """
+    returns an N x (k + 1) matrix whose column j is the sum of the j largest entries in each row of values
+    """
+    n_cols = values.shape[1]
+    top_values = np.zeros((values.shape[0], k + 1))
+    if k > 0:
+        # only the k largest entries of each row are sorted
+        if k < n_cols:
+            values = np.partition(values, n_cols - k, axis=1)[:, n_cols - k:]
+        top_values[:, 1:] = np.sort(values, axis=1)[:, ::-1]
+        np.cumsum(top_values, axis=1, out = top_values)
+    return top_values
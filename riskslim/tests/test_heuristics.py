@@ -0,0 +1,123 @@
+#noinspection
+import numpy as np
+import scipy.sparse as sp
+
+import riskslim.loss_functions.fast_log_loss as fast
+import riskslim.loss_functions.lookup_log_loss as lookup
+from riskslim.loss_functions.binary_log_loss import BinaryMatrix
+from riskslim.loss_functions.fast_discrete_descent import discrete_descent as fast_discrete_descent
+from riskslim.cache import ScoreCache
+from riskslim.heuristics import discrete_descent, sequential_rounding, sequential_rounding_batch
+
+np.random.seed(seed = 0)
+
+#initialize data matrix X and label vector Y
+n_rows = 10000
+n_cols = 20
+rho_ub = 10
+rho_lb = -10
+
+X = np.random.randint(low=0, high=2, size=(n_rows, n_cols))
+X[:, 0] = 1
+Y = np.random.randint(low=0, high=2, size=(n_rows, 1))
+Y[Y == 0] = -1
+Z = np.require(X * Y, requirements=['F'], dtype=np.float64)
+
+C_0 = np.repeat(1e-3, n_cols)
+C_0[0] = 0.0
+L0_reg_ind = C_0 > 0.0
+get_L0_penalty = lambda rho: np.sum(C_0[L0_reg_ind] * (rho[L0_reg_ind] != 0.0))
+compute_loss_from_scores = lambda scores: fast.log_loss_value_from_scores(scores)
+compute_loss_from_scores_batch = lambda scores: fast.log_loss_value_from_scores_batch(scores)
+
+#continuous solutions to round
+n_solutions = 5
+rho_cts = np.random.uniform(low = rho_lb, high = rho_ub, size = (n_solutions, n_cols))
+rho_cts[:, -5:] = np.random.uniform(low = -0.9, high = 0.9, size = (n_solutions, 5))
+rho_cts[:, -1] = 0.0
+
+#batched sequential rounding should match sequential rounding
+for rho in rho_cts:
+    rho_standard, objval_standard, early_stop_standard = sequential_rounding(np.copy(rho), Z, C_0, compute_loss_from_scores, get_L0_penalty)
+    for max_batch_size in [2**22, 5 * n_rows]:
+        rho_batch, objval_batch, early_stop_batch = sequential_rounding_batch(np.copy(rho), Z, C_0, compute_loss_from_scores_batch, get_L0_penalty, max_batch_size = max_batch_size)
+        assert(np.array_equal(rho_standard, rho_batch))
+        assert(np.isclose(objval_standard, objval_batch))
+        assert(early_stop_standard == early_stop_batch)
+
+    #check early stopping
+    _, _, early_stop_batch = sequential_rounding_batch(np.copy(rho), Z, C_0, compute_loss_from_scores_batch, get_L0_penalty, objval_cutoff = 0.0)
+    assert(early_stop_batch)
+
+print("passed sequential rounding tests")
+
+#compiled discrete descent should match discrete descent
+rho_ub_vec = np.repeat(rho_ub, n_cols)
+rho_lb_vec = np.repeat(rho_lb, n_cols)
+loss_value_tbl, _, tbl_offset = lookup.get_loss_value_and_prob_tables(rho_lb * n_cols, rho_ub * n_cols)
+tbl_offset = int(tbl_offset)
+compute_loss_from_scores_lookup = lambda scores: lookup.log_loss_value_from_scores(scores, loss_value_tbl, tbl_offset)
+
+for rho in rho_cts:
+    rho_int, _, _ = sequential_rounding(np.copy(rho), Z, C_0, compute_loss_from_scores, get_L0_penalty)
+    rho_int[1:4] = [3.0, -2.0, 0.0]
+    for active_set_flag in [True, False]:
+        for table, compute_loss_handle in [(None, compute_loss_from_scores), (loss_value_tbl, compute_loss_from_scores_lookup)]:
+            rho_standard, loss_standard, objval_standard = discrete_descent(np.copy(rho_int), Z, C_0, rho_ub_vec, rho_lb_vec, get_L0_penalty, compute_loss_handle, active_set_flag = active_set_flag)
+            rho_compiled, loss_compiled, objval_compiled = fast_discrete_descent(np.copy(rho_int), Z, C_0, rho_ub_vec, rho_lb_vec, table, tbl_offset, active_set_flag = active_set_flag)
+            assert(np.array_equal(rho_standard, rho_compiled))
+            assert(np.isclose(loss_standard, loss_compiled))
+            assert(np.isclose(objval_standard, objval_compiled))
+
+print("passed discrete descent tests")
+
+#score cache should produce the same scores as Z.dot(rho)
+score_cache = ScoreCache(Z, max_size = 3)
+for rho in rho_cts:
+    rho_int, _, _ = sequential_rounding_batch(np.copy(rho), Z, C_0, compute_loss_from_scores_batch, get_L0_penalty, score_cache = score_cache)
+    assert(np.array_equal(score_cache.get_scores(rho_int), Z.dot(rho_int)))
+    rho_int[1] = rho_int[1] + 1.0
+    assert(np.array_equal(score_cache.get_scores(rho_int), Z.dot(rho_int)))
+    rho_standard, _, objval_standard = discrete_descent(np.copy(rho_int), Z, C_0, rho_ub_vec, rho_lb_vec, get_L0_penalty, compute_loss_from_scores)
+    rho_cached, _, objval_cached = fast_discrete_descent(np.copy(rho_int), Z, C_0, rho_ub_vec, rho_lb_vec, base_scores = score_cache.get_scores(rho_int))
+    assert(np.array_equal(rho_standard, rho_cached))
+    assert(np.isclose(objval_standard, objval_cached))
+
+assert(len(score_cache) == score_cache.max_size)
+assert(score_cache.n_hits == 2 * len(rho_cts))
+assert(score_cache.n_updates > 0)
+
+#scores are only rounded for matrix types that report integer entries
+class RealMatrix(object):
+    shape = Z.shape
+
+real_scores = Z.dot(rho_cts[0]) + 0.25
+real_cache = ScoreCache(RealMatrix())
+real_cache.put(rho_int, real_scores)
+assert(np.array_equal(real_cache.get_scores(rho_int), real_scores))
+assert(ScoreCache(BinaryMatrix(X, Y))._integer_data)
+print("passed score cache tests")
+
+#heuristics should produce the same solutions when Z is a sparse matrix or a bit-packed matrix
+Z_sparse = sp.csc_matrix(Z)
+Z_binary = BinaryMatrix(X, Y)
+assert(np.array_equal(Z_binary.toarray(), Z))
+for rho in rho_cts:
+    rho_dense, objval_dense, _ = sequential_rounding(np.copy(rho), Z, C_0, compute_loss_from_scores, get_L0_penalty)
+    rho_sparse, objval_sparse, _ = sequential_rounding(np.copy(rho), Z_sparse, C_0, compute_loss_from_scores, get_L0_penalty)
+    rho_sparse_batch, _, _ = sequential_rounding_batch(np.copy(rho), Z_sparse, C_0, compute_loss_from_scores_batch, get_L0_penalty)
+    assert(np.array_equal(rho_dense, rho_sparse))
+    assert(np.array_equal(rho_dense, rho_sparse_batch))
+    assert(np.isclose(objval_dense, objval_sparse))
+    rho_binary, _, _ = sequential_rounding_batch(np.copy(rho), Z_binary, C_0, compute_loss_from_scores_batch, get_L0_penalty)
+    assert(np.array_equal(rho_dense, rho_binary))
+
+    rho_dense, _, objval_dense = discrete_descent(rho_dense, Z, C_0, rho_ub_vec, rho_lb_vec, get_L0_penalty, compute_loss_from_scores)
+    rho_sparse, _, objval_sparse = discrete_descent(rho_sparse, Z_sparse, C_0, rho_ub_vec, rho_lb_vec, get_L0_penalty, compute_loss_from_scores)
+    rho_binary, _, objval_binary = discrete_descent(rho_binary, Z_binary, C_0, rho_ub_vec, rho_lb_vec, get_L0_penalty, compute_loss_from_scores)
+    assert(np.array_equal(rho_dense, rho_sparse))
+    assert(np.array_equal(rho_dense, rho_binary))
+    assert(np.isclose(objval_dense, objval_sparse))
+    assert(np.isclose(objval_dense, objval_binary))
+
+print("passed sparse and bit-packed heuristics tests")
@@ -1,11 +1,23 @@
 #noinspection
+import os
+import tempfile
 import numpy as np
+import pandas as pd
+import scipy.sparse as sp
 
 import riskslim.loss_functions.fast_log_loss as fast
 import riskslim.loss_functions.log_loss as normal
 import riskslim.loss_functions.log_loss_weighted as weighted
 import riskslim.loss_functions.lookup_log_loss as lookup
-from riskslim.setup_functions import _setup_training_weights
+import riskslim.loss_functions.binary_log_loss as binary
+import riskslim.loss_functions.integer_lookup_log_loss as integer_lookup
+import riskslim.loss_functions.mixed_log_loss as mixed
+import riskslim.loss_functions.interpolated_log_loss as interpolated
+from riskslim.bound_tightening import chained_updates
+from riskslim.coefficient_set import CoefficientSet
+from riskslim.lookup_table_cache import find_cached_table, get_cached_loss_value_and_prob_tables
+from riskslim.mapped_data import MappedMatrix, convert_csv_to_mmap, load_data_from_mmap
+from riskslim.setup_functions import _setup_training_weights, _setup_blockwise_loss_functions, check_loss_precision, get_loss_bounds, get_loss_bounds_by_L0, setup_loss_functions
 
 np.random.seed(seed = 0)
 
@@ -131,6 +143,101 @@ assert(all(np.isclose(lookup_cut[1], cython_cut[1])))
 print("passed cut tests")
 
 
+#batched tests
+n_candidates = 5
+rho_batch = np.column_stack([generate_integer_model(n_cols, rho_ub, rho_lb) for _ in range(n_candidates)])
+rho_batch = np.require(rho_batch, requirements = ['F'])
+rho_batch_py = np.require(rho_batch, requirements = ['C'])
+scores_batch = np.require(Z.dot(rho_batch), requirements = ['F'])
+
+normal_batch_values = normal.log_loss_value_batch(Z_py, rho_batch_py)
+normal_batch_cut = normal.log_loss_value_and_slope_batch(Z_py, rho_batch_py)
+fast_batch_values = fast.log_loss_value_batch(Z, rho_batch)
+fast_batch_cut = fast.log_loss_value_and_slope_batch(Z, rho_batch)
+lookup_batch_values = lookup.log_loss_value_batch(Z, rho_batch, loss_value_tbl, loss_tbl_offset)
+lookup_batch_cut = lookup.log_loss_value_and_slope_batch(Z, rho_batch, loss_value_tbl, prob_value_tbl, loss_tbl_offset)
+
+assert(normal_batch_values.shape == (n_candidates,))
+assert(fast_batch_cut[1].shape == (n_cols, n_candidates))
+assert(all(np.isclose(normal_batch_values, normal.log_loss_value_from_scores_batch(scores_batch))))
+assert(all(np.isclose(fast_batch_values, fast.log_loss_value_from_scores_batch(scores_batch))))
+assert(all(np.isclose(lookup_batch_values, lookup.log_loss_value_from_scores_batch(scores_batch, loss_value_tbl, loss_tbl_offset))))
+for k in range(n_candidates):
+    rho_k = np.require(rho_batch[:, k], requirements = ['F'])
+    fast_cut_k = fast.log_loss_value_and_slope(Z, rho_k)
+    assert(np.isclose(normal_batch_values[k], fast_cut_k[0]))
+    assert(np.isclose(fast_batch_values[k], fast_cut_k[0]))
+    assert(np.isclose(lookup_batch_values[k], fast_cut_k[0]))
+    assert(np.isclose(normal_batch_cut[0][k], fast_cut_k[0]))
+    assert(np.isclose(fast_batch_cut[0][k], fast_cut_k[0]))
+    assert(np.isclose(lookup_batch_cut[0][k], fast_cut_k[0]))
+    assert(all(np.isclose(normal_batch_cut[1][:, k], fast_cut_k[1])))
+    assert(all(np.isclose(fast_batch_cut[1][:, k], fast_cut_k[1])))
+    assert(all(np.isclose(lookup_batch_cut[1][:, k], fast_cut_k[1])))
+print("passed batched loss tests")
+
+#multi-threaded tests
+# deterministic results do not depend on the number of threads and match the serial kernels up to rounding error
+long_scores = np.require(np.random.RandomState(0).normal(scale = 5.0, size = 3 * 4096 + 17), requirements = ['F'])
+long_scores[::11] = 0.0
+serial_cut = fast.log_loss_value_and_slope_parallel(Z, rho, 1, True)
+serial_long_loss = fast.log_loss_value_from_scores_parallel(long_scores, 1, True)
+for n_threads in [0, 2]:
+    parallel_cut = fast.log_loss_value_and_slope_parallel(Z, rho, n_threads, True)
+    assert(fast.log_loss_value_parallel(Z, rho, n_threads, True) == fast.log_loss_value_parallel(Z, rho, 1, True))
+    assert(fast.log_loss_value_from_scores_parallel(long_scores, n_threads, True) == serial_long_loss)
+    assert(parallel_cut[0] == serial_cut[0])
+    assert(np.array_equal(parallel_cut[1], serial_cut[1]))
+    assert(np.isclose(fast.log_loss_value_parallel(Z, rho, n_threads, True), fast_value_test()))
+    assert(np.isclose(fast.log_loss_value_from_scores_parallel(long_scores, n_threads, True), fast.log_loss_value_from_scores(long_scores)))
+    assert(np.isclose(parallel_cut[0], cython_cut[0]))
+    assert(all(np.isclose(parallel_cut[1], cython_cut[1])))
+    assert(np.isclose(fast.log_loss_value_parallel(Z, rho, n_threads, False), fast_value_test()))
+    assert(np.isclose(fast.log_loss_value_and_slope_parallel(Z, rho, n_threads, False)[0], cython_cut[0]))
+print("passed multi-threaded loss tests")
+
+#blocked tests
+n_rows = Z.shape[0]
+for block_size in [1, 7, n_rows, 2 * n_rows]:
+    scratch = fast.get_scratch_buffer(n_rows, block_size)
+    assert(scratch.shape[0] == min(n_rows, block_size))
+    fast_blocked_cut = fast.log_loss_value_and_slope_blocked(Z, rho, block_size, scratch)
+    lookup_blocked_cut = lookup.log_loss_value_and_slope_blocked(Z, rho, loss_value_tbl, prob_value_tbl, loss_tbl_offset, block_size, scratch)
+    normal_blocked_cut = normal.log_loss_value_and_slope_blocked(Z_py, rho_py, block_size)
+    assert(np.isclose(fast.log_loss_value_blocked(Z, rho, block_size, scratch), fast_value_test()))
+    assert(np.isclose(fast.log_loss_value_blocked(Z, rho, block_size), fast_value_test()))
+    assert(np.isclose(lookup.log_loss_value_blocked(Z, rho, loss_value_tbl, loss_tbl_offset, block_size, scratch), lookup_value_test()))
+    assert(np.isclose(normal.log_loss_value_blocked(Z_py, rho_py, block_size), normal_value_test()))
+    assert(np.isclose(fast_blocked_cut[0], cython_cut[0]))
+    assert(np.isclose(lookup_blocked_cut[0], lookup_cut[0]))
+    assert(np.isclose(normal_blocked_cut[0], normal_cut[0]))
+    assert(all(np.isclose(fast_blocked_cut[1], cython_cut[1])))
+    assert(all(np.isclose(lookup_blocked_cut[1], lookup_cut[1])))
+    assert(all(np.isclose(normal_blocked_cut[1], normal_cut[1])))
+print("passed blocked loss tests")
+
+#workspace tests
+for block_size in [0, 7, 2 * n_rows]:
+    fast_workspace = fast.LossWorkspace(Z, block_size)
+    lookup_workspace = lookup.LossWorkspace(Z, loss_value_tbl, prob_value_tbl, loss_tbl_offset, block_size)
+    fast_slope_buffer = fast_workspace.loss_slope
+    for _ in range(2):
+        fast_workspace_cut = fast_workspace.loss_value_and_slope(rho)
+        lookup_workspace_cut = lookup_workspace.loss_value_and_slope(rho)
+        assert(fast_workspace_cut[1] is fast_slope_buffer)
+        assert(np.isclose(fast_workspace.loss_value(rho), fast_value_test()))
+        assert(np.isclose(lookup_workspace.loss_value(rho), lookup_value_test()))
+        assert(np.isclose(fast_workspace_cut[0], cython_cut[0]))
+        assert(np.isclose(lookup_workspace_cut[0], lookup_cut[0]))
+        assert(all(np.isclose(fast_workspace_cut[1], cython_cut[1])))
+        assert(all(np.isclose(lookup_workspace_cut[1], lookup_cut[1])))
+    if block_size == 0:
+        assert(fast_workspace_cut[0] == cython_cut[0])
+        assert(np.array_equal(fast_workspace_cut[1], cython_cut[1]))
+        assert(np.array_equal(lookup_workspace_cut[1], lookup_cut[1]))
+print("passed loss workspace tests")
+
+
 #weighted tests
 def weighted_value_test(weights): return weighted.log_loss_value(Z_py, weights, np.sum(weights), rho_py)
 def weighted_cut_test(weights): return weighted.log_loss_value_and_slope(Z_py, weights, np.sum(weights),  rho_py)
@@ -169,6 +276,226 @@ assert(np.isclose(weighted_value, weighted_value_from_scores))
 assert(np.isclose(weighted_value, weighted_cut[0]))
 print("passed all tests for weighted loss functions when w_pos = %1.2f and w_neg = %1.2f" % (w_pos, w_neg))
 
+#weighted batched tests
+weighted_batch_values = weighted.log_loss_value_batch(Z_py, weights, np.sum(weights), rho_batch_py)
+weighted_batch_cut = weighted.log_loss_value_and_slope_batch(Z_py, weights, np.sum(weights), rho_batch_py)
+assert(all(np.isclose(weighted_batch_values, weighted.log_loss_value_from_scores_batch(weights, np.sum(weights), scores_batch))))
+for k in range(n_candidates):
+    weighted_cut_k = weighted.log_loss_value_and_slope(Z_py, weights, np.sum(weights), rho_batch_py[:, k])
+    assert(np.isclose(weighted_batch_values[k], weighted_cut_k[0]))
+    assert(np.isclose(weighted_batch_cut[0][k], weighted_cut_k[0]))
+    assert(all(np.isclose(weighted_batch_cut[1][:, k], weighted_cut_k[1])))
+print("passed batched tests for weighted loss functions")
+
+
+#sparse tests
+Z_sparse = sp.csc_matrix(Z_py)
+sparse_cut = normal.log_loss_value_and_slope(Z_sparse, rho_py)
+weighted_sparse_cut = weighted.log_loss_value_and_slope(Z_sparse, weights, np.sum(weights), rho_py)
+assert(np.isclose(normal.log_loss_value(Z_sparse, rho_py), normal_value_test()))
+assert(np.isclose(sparse_cut[0], normal_cut[0]))
+assert(all(np.isclose(sparse_cut[1], normal_cut[1])))
+assert(np.isclose(weighted.log_loss_value(Z_sparse, weights, np.sum(weights), rho_py), weighted_value))
+assert(np.isclose(weighted_sparse_cut[0], weighted_cut[0]))
+assert(all(np.isclose(weighted_sparse_cut[1], weighted_cut[1])))
+print("passed sparse loss tests")
+
+#bit-packed binary tests
+Z_binary = binary.BinaryMatrix(X, Y)
+binary_cut = binary.log_loss_value_and_slope(Z_binary, rho)
+assert(Z_binary.shape == Z.shape)
+assert(np.array_equal(Z_binary.dot(rho), scores_py))
+assert(np.isclose(binary.log_loss_value(Z_binary, rho), cython_cut[0]))
+assert(np.isclose(binary_cut[0], cython_cut[0]))
+assert(all(np.isclose(binary_cut[1], cython_cut[1])))
+assert(np.array_equal(Z_binary.toarray(), Z))
+for start, end in [(0, 1), (63, 130), (n_rows // 3, n_rows // 2), (n_rows - 1, n_rows + 10)]:
+    assert(np.array_equal(Z_binary.get_rows(start, end), Z[start:end]))
+print("passed bit-packed binary loss tests")
+
+#integer lookup tests
+Z_int = integer_lookup.IntegerMatrix(Z)
+integer_cut = integer_lookup.log_loss_value_and_slope(Z_int, rho, loss_value_tbl, prob_value_tbl, loss_tbl_offset)
+integer_cut_real = integer_lookup.log_loss_value_and_slope_real(Z_int, rho)
+assert(Z_int.dtype == np.int8)
+assert(Z_int.nbytes * 8 == Z.nbytes)
+assert(np.array_equal(Z_int.int_scores(rho), scores_py))
+assert(np.array_equal(Z_int.dot(rho), scores_py))
+assert(np.isclose(integer_lookup.log_loss_value(Z_int, rho, loss_value_tbl, loss_tbl_offset), lookup_cut[0]))
+assert(np.isclose(integer_cut[0], lookup_cut[0]))
+assert(all(np.isclose(integer_cut[1], lookup_cut[1])))
+assert(np.isclose(integer_cut_real[0], cython_cut[0]))
+assert(all(np.isclose(integer_cut_real[1], cython_cut[1])))
+assert(integer_lookup.get_integer_dtype(200 * Z) == np.int16)
+assert(integer_lookup.get_integer_dtype(0.5 * Z) is None)
+scores_int = Z_int.dot(rho)
+Z_int.add_scaled_column(scores_int, 3, 2.5)
+assert(np.allclose(scores_int, scores_py + 2.5 * Z[:, 3]))
+
+# the integer lookup engine is only used when requested
+int_coef_set = CoefficientSet(variable_names = ['x%d' % j for j in range(Z.shape[1])], lb = -5, ub = 5)
+Z_default = setup_loss_functions({'X': X, 'Y': Y}, int_coef_set, loss_computation = 'lookup')[0]
+Z_opt_in = setup_loss_functions({'X': X, 'Y': Y}, int_coef_set, loss_computation = 'lookup', integer_lookup = True)[0]
+assert(isinstance(Z_default, np.ndarray) and Z_default.dtype == np.float64)
+assert(isinstance(Z_opt_in, integer_lookup.IntegerMatrix))
+print("passed integer lookup loss tests")
+
+#row compression tests
+n_compressed_cols = 8
+compressed_data = {'X': np.array(X[:, 0:n_compressed_cols], dtype = np.float_), 'Y': Y}
+rho_compressed = rho[0:n_compressed_cols]
+Z_full, loss_full, cut_full = setup_loss_functions(compressed_data, coef_set = None, loss_computation = 'fast')[0:3]
+Z_unique, loss_unique, cut_unique, _, _, _, _, _, unique_info = setup_loss_functions(compressed_data, coef_set = None, loss_computation = 'fast', compress_rows = True)
+assert(unique_info['loss_computation'] == 'weighted')
+assert(Z_unique.shape[0] <= 2**(n_compressed_cols + 1))
+assert(np.isclose(np.sum(unique_info['sample_weights']), n_rows))
+assert(np.isclose(loss_unique(rho_compressed), loss_full(rho_compressed)))
+assert(np.isclose(cut_unique(rho_compressed)[0], cut_full(rho_compressed)[0]))
+assert(all(np.isclose(cut_unique(rho_compressed)[1], cut_full(rho_compressed)[1])))
+
+rho_ub_compressed = np.repeat(rho_ub, n_compressed_cols)
+rho_lb_compressed = np.repeat(rho_lb, n_compressed_cols)
+L0_reg_ind_compressed = np.ones(n_compressed_cols, dtype = bool)
+bounds_full = get_loss_bounds(Z_full, rho_ub_compressed, rho_lb_compressed, L0_reg_ind_compressed)
+bounds_unique = get_loss_bounds(Z_unique, rho_ub_compressed, rho_lb_compressed, L0_reg_ind_compressed, sample_weights = unique_info['sample_weights'])
+assert(np.allclose(bounds_full, bounds_unique))
+print("passed row compression tests")
+
+#loss bound tests
+def full_sort_loss_bounds(Z, rho_ub, rho_lb, L0_reg_ind, L0_max, sample_weights = None):
+    max_scores = np.maximum(Z * rho_lb, Z * rho_ub)
+    min_scores = np.minimum(Z * rho_lb, Z * rho_ub)
+    max_score = np.sum(-np.sort(-max_scores[:, L0_reg_ind], axis = 1)[:, 0:L0_max], axis = 1) + np.sum(max_scores[:, ~L0_reg_ind], axis = 1)
+    min_score = np.sum(np.sort(min_scores[:, L0_reg_ind], axis = 1)[:, 0:L0_max], axis = 1) + np.sum(min_scores[:, ~L0_reg_ind], axis = 1)
+    return np.average(np.logaddexp(0, -max_score), weights = sample_weights), np.average(np.logaddexp(0, -min_score), weights = sample_weights)
+
+Z_bounds = Z[0:5000] * np.random.uniform(0.5, 1.5, size = (5000, n_cols))
+rho_ub_bounds = np.random.randint(1, 10, size = n_cols)
+rho_lb_bounds = -np.random.randint(1, 10, size = n_cols)
+for L0_max_bounds in [0, 1, 5, n_cols - 1]:
+    expected_bounds = full_sort_loss_bounds(Z_bounds, rho_ub_bounds, rho_lb_bounds, L0_reg_ind, L0_max_bounds)
+    assert(np.allclose(get_loss_bounds(Z_bounds, rho_ub_bounds, rho_lb_bounds, L0_reg_ind, L0_max_bounds), expected_bounds))
+    assert(np.allclose(get_loss_bounds(Z_bounds, rho_ub_bounds, rho_lb_bounds, L0_reg_ind, L0_max_bounds, block_size = 7), expected_bounds))
+
+bound_weights = np.random.uniform(0.5, 2.0, size = Z_bounds.shape[0])
+expected_bounds = full_sort_loss_bounds(Z_bounds, rho_ub_bounds, rho_lb_bounds, L0_reg_ind, 3, sample_weights = bound_weights)
+assert(np.allclose(get_loss_bounds(Z_bounds, rho_ub_bounds, rho_lb_bounds, L0_reg_ind, 3, sample_weights = bound_weights, block_size = 100), expected_bounds))
+
+loss_min_by_L0, loss_max_by_L0 = get_loss_bounds_by_L0(Z_bounds, rho_ub_bounds, rho_lb_bounds, L0_reg_ind, 6, sample_weights = bound_weights, block_size = 100)
+assert(len(loss_min_by_L0) == 7 and len(loss_max_by_L0) == 7)
+assert(np.all(np.diff(loss_min_by_L0) <= 0) and np.all(np.diff(loss_max_by_L0) >= 0))
+for L0_max_bounds in range(7):
+    expected_bounds = full_sort_loss_bounds(Z_bounds, rho_ub_bounds, rho_lb_bounds, L0_reg_ind, L0_max_bounds, sample_weights = bound_weights)
+    assert(np.allclose((loss_min_by_L0[L0_max_bounds], loss_max_by_L0[L0_max_bounds]), expected_bounds))
+
+# chained updates tighten the loss bounds when L0_max is reduced
+C_0_bounds = np.repeat(1e-2, n_cols - 1)
+loose_bounds = {'objval_min': 0.0, 'objval_max': loss_min_by_L0[6] + 0.035, 'loss_min': loss_min_by_L0[6], 'loss_max': loss_max_by_L0[6], 'L0_min': 0, 'L0_max': 6}
+tight_bounds = chained_updates(loose_bounds, C_0_bounds, loss_bounds_by_L0 = (loss_min_by_L0, loss_max_by_L0))
+assert(tight_bounds['L0_max'] <= 3)
+assert(tight_bounds['loss_min'] >= loss_min_by_L0[int(tight_bounds['L0_max'])])
+assert(tight_bounds['loss_max'] <= loss_max_by_L0[int(tight_bounds['L0_max'])])
+print("passed loss bound tests")
+
+#mixed-precision tests
+n_mixed_rows = 100000
+X_mixed = X[0:n_mixed_rows] * np.random.uniform(low = 0.5, high = 1.5, size = (n_mixed_rows, n_cols))
+Z_mixed = np.require(X_mixed * Y[0:n_mixed_rows], dtype = np.float64, requirements = ['F'])
+Z_mixed_32 = np.require(Z_mixed, dtype = np.float32, requirements = ['F'])
+mixed_cut = mixed.log_loss_value_and_slope(Z_mixed_32, rho)
+fast_mixed_cut = fast.log_loss_value_and_slope(Z_mixed, rho)
+mixed_error_bound = mixed.get_loss_error_bound(Z_mixed_32, rho)
+assert(np.isclose(mixed.log_loss_value(Z_mixed_32, rho), mixed_cut[0]))
+assert(abs(mixed_cut[0] - fast_mixed_cut[0]) <= mixed_error_bound)
+assert(np.allclose(mixed_cut[1], fast_mixed_cut[1], rtol = 1e-4))
+
+blockwise_loss, blockwise_loss_cut = _setup_blockwise_loss_functions(X_mixed, Y[0:n_mixed_rows], block_size = 30000)
+assert(np.isclose(blockwise_loss(rho), fast_mixed_cut[0]))
+assert(np.isclose(blockwise_loss_cut(rho)[0], fast_mixed_cut[0]))
+assert(np.allclose(blockwise_loss_cut(rho)[1], fast_mixed_cut[1]))
+assert(check_loss_precision(lambda rho: mixed.log_loss_value(Z_mixed_32, rho), blockwise_loss, rho, mixed_error_bound) <= mixed_error_bound)
+print("passed mixed-precision loss tests")
+
+#interpolated tests
+Z_real = np.require(Z * np.random.uniform(0.5, 1.5, size = Z.shape), requirements = ['F'])
+scores_real = np.require(Z_real.dot(rho), requirements = ['F'])
+s_min_real, s_max_real = float(np.min(scores_real)), float(np.max(scores_real))
+for max_error in [1e-3, 1e-6]:
+    interp_tbl, interp_step = interpolated.get_interpolation_table(s_min_real, s_max_real, max_error)
+    assert(interp_step == interpolated.get_interpolation_step(max_error))
+    assert(s_min_real + (len(interp_tbl) - 1) * interp_step >= s_max_real)
+    interp_loss = interpolated.log_loss_value_from_scores(scores_real, interp_tbl, s_min_real, interp_step)
+    assert(abs(interp_loss - fast.log_loss_value_from_scores(scores_real)) <= max_error)
+    # scores outside of the table are computed exactly
+    outside_scores = np.require(np.array([s_min_real - 10.0, s_max_real + 10.0]), requirements = ['F'])
+    assert(np.isclose(interpolated.log_loss_value_from_scores(outside_scores, interp_tbl, s_min_real, interp_step), fast.log_loss_value_from_scores(outside_scores)))
+
+# the interpolated loss is only used for scores
+interp_data = {'X': Z_real, 'Y': np.ones((Z_real.shape[0], 1))}
+interp_coef_set = CoefficientSet(variable_names = ['x%d' % j for j in range(Z_real.shape[1])], lb = rho_lb, ub = rho_ub)
+interp_handles = setup_loss_functions(interp_data, interp_coef_set, loss_computation = 'interpolated', interpolation_error = 1e-6)
+assert(interp_handles[-1]['loss_computation'] == 'interpolated')
+assert(interp_handles[1](rho) == fast.log_loss_value(Z_real, rho))
+assert(np.array_equal(interp_handles[2](rho)[1], fast.log_loss_value_and_slope(Z_real, rho)[1]))
+assert(interp_handles[6](scores_real) == fast.log_loss_value_from_scores(scores_real))
+assert(abs(interp_handles[3](scores_real) - fast.log_loss_value_from_scores(scores_real)) <= 1e-6)
+print("passed interpolated loss tests")
+
+#lookup table cache tests
+with tempfile.TemporaryDirectory() as table_cache_dir:
+    assert(find_cached_table(table_cache_dir, -10, 10) is None)
+    wide_tables = get_cached_loss_value_and_prob_tables(-50, 60, table_cache_dir)
+    narrow_tables = get_cached_loss_value_and_prob_tables(-10, 20, table_cache_dir)
+    assert(len(os.listdir(table_cache_dir)) == 1)
+    assert(find_cached_table(table_cache_dir, -10, 20)[1:] == (-50, 60))
+    for cached_tables, (s_lo, s_hi) in [(wide_tables, (-50, 60)), (narrow_tables, (-10, 20))]:
+        expected_tables = lookup.get_loss_value_and_prob_tables(s_lo, s_hi)
+        assert(cached_tables[2] == expected_tables[2])
+        assert(np.array_equal(cached_tables[0], expected_tables[0]))
+        assert(np.array_equal(cached_tables[1], expected_tables[1]))
+
+    # tables that are not covered by the cache are added to the cache
+    get_cached_loss_value_and_prob_tables(-100, 0, table_cache_dir)
+    assert(len(os.listdir(table_cache_dir)) == 2)
+
+    # cached tables can be used by the kernels
+    cached_loss_tbl, cached_prob_tbl, cached_offset = get_cached_loss_value_and_prob_tables(min_score, max_score, table_cache_dir)
+    assert(lookup.log_loss_value(Z, rho, cached_loss_tbl, cached_offset) == lookup_value_test())
+    assert(np.array_equal(lookup.log_loss_value_and_slope(Z, rho, cached_loss_tbl, cached_prob_tbl, cached_offset)[1], lookup_cut[1]))
+print("passed lookup table cache tests")
+
+#memory-mapped data tests
+n_mmap_rows = 5000
+mmap_dir = tempfile.mkdtemp()
+mmap_csv_file = os.path.join(mmap_dir, 'mmap_data.csv')
+mmap_file = os.path.join(mmap_dir, 'mmap_data.mmap')
+mmap_df = pd.DataFrame(X_mixed[0:n_mmap_rows, 1:], columns = ['x%d' % j for j in range(1, n_cols)])
+mmap_df.insert(0, 'y', (Y[0:n_mmap_rows, 0] == 1).astype(int))
+mmap_df.to_csv(mmap_csv_file, index = False)
+
+convert_csv_to_mmap(mmap_csv_file, mmap_file, chunk_size = 1200)
+mmap_data = load_data_from_mmap(mmap_file)
+assert(isinstance(mmap_data['X'], np.memmap))
+assert(mmap_data['X'].shape == (n_mmap_rows, n_cols))
+assert(np.allclose(mmap_data['X'][:, 1:], X_mixed[0:n_mmap_rows, 1:]))
+assert(np.array_equal(mmap_data['Y'], Y[0:n_mmap_rows]))
+
+Z_mmap, mmap_loss, mmap_loss_cut = setup_loss_functions(mmap_data, coef_set = None, loss_computation = 'normal')[0:3]
+Z_dense = mmap_data['X'] * mmap_data['Y']
+Z_blocked = MappedMatrix(mmap_data['X'], mmap_data['Y'], block_size = 700)
+assert(isinstance(Z_mmap, MappedMatrix))
+for Z_mapped in [Z_mmap, Z_blocked]:
+    scores_mmap = Z_mapped.dot(rho)
+    assert(np.allclose(scores_mmap, Z_dense.dot(rho)))
+    assert(np.allclose(Z_mapped.tdot(scores_mmap), Z_dense.T.dot(scores_mmap)))
+    Z_mapped.add_scaled_column(scores_mmap, 3, 2.0)
+    assert(np.allclose(scores_mmap, Z_dense.dot(rho) + 2.0 * Z_dense[:, 3]))
+    assert(np.array_equal(Z_mapped.get_columns([2, 5]), Z_dense[:, [2, 5]]))
+    assert(np.array_equal(Z_mapped.toarray(), Z_dense))
+assert(np.isclose(mmap_loss(rho), normal.log_loss_value(Z_dense, rho)))
+assert(np.isclose(mmap_loss_cut(rho)[0], normal.log_loss_value_and_slope(Z_dense, rho)[0]))
+assert(np.allclose(mmap_loss_cut(rho)[1], normal.log_loss_value_and_slope(Z_dense, rho)[1]))
+print("passed memory-mapped data tests")
 
 # print 'timing for loss value computation \n'
 # %timeit -n 20 normal_value = normal_value_test()
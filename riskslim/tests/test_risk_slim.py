@@ -1,5 +1,10 @@
+import contextlib
+import io
 import os
 import pprint
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 import riskslim
@@ -122,9 +127,245 @@ def test_risk_slim(data_csv_file, sample_weights_csv_file = None, max_coefficien
     return True
 
 
+def test_risk_slim_checkpoint(data_csv_file, max_coefficient = 5, max_L0_value = 5, max_offset = 50, settings = None):
+
+    # load dataset
+    data = riskslim.load_data_from_csv(dataset_csv_file = data_csv_file)
+
+    def get_constraints():
+        coef_set = riskslim.CoefficientSet(variable_names=data['variable_names'], lb=-max_coefficient, ub=max_coefficient, sign=0)
+        coef_set.update_intercept_bounds(X = data['X'], y = data['Y'], max_offset = max_offset, max_L0_value = max_L0_value)
+        return {'L0_min': 0, 'L0_max': max_L0_value, 'coef_set': coef_set}
+
+    with tempfile.TemporaryDirectory() as checkpoint_dir:
+
+        # stop early and save checkpoints
+        checkpoint_settings = dict(settings)
+        checkpoint_settings['checkpoint_file'] = os.path.join(checkpoint_dir, 'checkpoint.npz')
+        checkpoint_settings['checkpoint_interval'] = 0.0
+        checkpoint_settings['max_runtime'] = 1.0
+        _, _, lcpa_info = riskslim.run_lattice_cpa(data, get_constraints(), checkpoint_settings)
+        assert lcpa_info['n_checkpoints'] > 0
+
+        checkpoint = riskslim.checkpoint.load_checkpoint(checkpoint_settings['checkpoint_file'])
+        assert len(checkpoint['cut_rhs']) == lcpa_info['n_cuts'] - lcpa_info['n_cut_cache_hits']
+
+        # resume and solve to optimality
+        checkpoint_settings['max_runtime'] = settings['max_runtime']
+        resumed_model_info, _, _ = riskslim.resume_lattice_cpa(data, get_constraints(), checkpoint_settings['checkpoint_file'], checkpoint_settings)
+        model_info, _, _ = riskslim.run_lattice_cpa(data, get_constraints(), settings)
+        assert np.isclose(resumed_model_info['objective_value'], model_info['objective_value'])
+
+    return True
+
+
+def test_risk_slim_cut_pool(data_csv_file, max_coefficient = 5, max_L0_value = 5, max_offset = 50, settings = None):
+
+    # load dataset
+    data = riskslim.load_data_from_csv(dataset_csv_file = data_csv_file)
+
+    def get_constraints(L0_max):
+        coef_set = riskslim.CoefficientSet(variable_names=data['variable_names'], lb=-max_coefficient, ub=max_coefficient, sign=0)
+        coef_set.update_intercept_bounds(X = data['X'], y = data['Y'], max_offset = max_offset, max_L0_value = L0_max)
+        return {'L0_min': 0, 'L0_max': L0_max, 'coef_set': coef_set}
+
+    with tempfile.TemporaryDirectory() as cut_pool_dir:
+
+        cut_pool_settings = dict(settings)
+        cut_pool_settings['cut_pool_dir'] = cut_pool_dir
+        fingerprint = riskslim.cut_pool.get_data_fingerprint(data, settings['w_pos'])
+
+        # first run fills the pool
+        model_info, _, lcpa_info = riskslim.run_lattice_cpa(data, get_constraints(max_L0_value), cut_pool_settings)
+        cut_coefs, cut_rhs = riskslim.cut_pool.load_cut_pool(cut_pool_dir, fingerprint)
+        assert lcpa_info['n_cut_pool_cuts'] == len(cut_rhs) > 0
+        assert len(np.unique(np.column_stack([cut_coefs, cut_rhs]), axis = 0)) == len(cut_rhs)
+
+        # cuts remain valid for a problem with a different L0_max
+        pooled_model_info, _, _ = riskslim.run_lattice_cpa(data, get_constraints(max_L0_value - 1), cut_pool_settings)
+        model_info, _, _ = riskslim.run_lattice_cpa(data, get_constraints(max_L0_value - 1), settings)
+        assert np.isclose(pooled_model_info['objective_value'], model_info['objective_value'])
+
+        # pool is capped at cut_pool_max_cuts
+        n_cuts = riskslim.cut_pool.append_to_cut_pool(cut_pool_dir, fingerprint, cut_coefs, cut_rhs, max_cuts = 5)
+        assert n_cuts == 5
+
+        # runs that update the pool at the same time keep each other's cuts
+        def append_cuts(k):
+            riskslim.cut_pool.append_to_cut_pool(cut_pool_dir, 'concurrent', cut_coefs[k:k + 1] + k, cut_rhs[k:k + 1])
+
+        with ThreadPoolExecutor(max_workers = 4) as executor:
+            list(executor.map(append_cuts, range(20)))
+        _, concurrent_rhs = riskslim.cut_pool.load_cut_pool(cut_pool_dir, 'concurrent')
+        assert len(concurrent_rhs) == 20
+
+    return True
+
+
+def test_risk_slim_c0_path(data_csv_file, c0_values, max_coefficient = 5, max_L0_value = 5, max_offset = 50, settings = None):
+
+    # load dataset
+    data = riskslim.load_data_from_csv(dataset_csv_file = data_csv_file)
+
+    def get_constraints():
+        coef_set = riskslim.CoefficientSet(variable_names=data['variable_names'], lb=-max_coefficient, ub=max_coefficient, sign=0)
+        coef_set.update_intercept_bounds(X = data['X'], y = data['Y'], max_offset = max_offset, max_L0_value = max_L0_value)
+        return {'L0_min': 0, 'L0_max': max_L0_value, 'coef_set': coef_set}
+
+    path = riskslim.run_c0_path(data, get_constraints(), c0_values, settings)
+    assert [m['c0_value'] for m in path] == sorted(c0_values, reverse = True)
+    assert path[0]['n_warm_start_cuts'] == 0
+    assert all(m['n_warm_start_cuts'] > 0 for m in path[1:])
+
+    # models that violate the bounds carried from previous runs are not used as warm starts
+    assert all(1 <= m['n_warm_start_solutions'] <= k for k, m in enumerate(path) if k > 0)
+
+    # warm starts do not change the optimal objective value
+    for model_info in path:
+        run_settings = dict(settings)
+        run_settings['c0_value'] = model_info['c0_value']
+        expected_model_info, _, _ = riskslim.run_lattice_cpa(data, get_constraints(), run_settings)
+        assert np.isclose(model_info['objective_value'], expected_model_info['objective_value'])
+
+    return True
+
+
+def test_risk_slim_L0_path(data_csv_file, L0_max_values, max_coefficient = 5, max_offset = 50, settings = None):
+
+    # load dataset
+    data = riskslim.load_data_from_csv(dataset_csv_file = data_csv_file)
+
+    def get_constraints(L0_max):
+        coef_set = riskslim.CoefficientSet(variable_names=data['variable_names'], lb=-max_coefficient, ub=max_coefficient, sign=0)
+        coef_set.update_intercept_bounds(X = data['X'], y = data['Y'], max_offset = max_offset, max_L0_value = max(L0_max_values))
+        return {'L0_min': 0, 'L0_max': L0_max, 'coef_set': coef_set}
+
+    # CPLEX writes its log to the stream that is sys.stdout when the MIP is created
+    cplex_log = io.StringIO()
+    with contextlib.redirect_stdout(cplex_log):
+        path = riskslim.run_L0_path(data, get_constraints(max(L0_max_values)), L0_max_values, settings)
+    print(cplex_log.getvalue())
+    table = riskslim.get_path_table(path)
+    assert table['L0_max'].tolist() == sorted(L0_max_values)
+
+    # models from previous sizes are accepted as MIP starts
+    assert np.all(table['n_warm_start_solutions'][1:] > 0)
+    n_accepted_starts = len(re.findall(r"MIP start '\w+' defined initial solution", cplex_log.getvalue()))
+    assert n_accepted_starts >= len(L0_max_values) - 1
+    assert np.all(np.diff(table['objective_value']) <= 1e-8)
+
+    # warm starts do not change the optimal objective value
+    for model_info in path:
+        expected_model_info, _, _ = riskslim.run_lattice_cpa(data, get_constraints(model_info['L0_max']), settings)
+        assert np.isclose(model_info['objective_value'], expected_model_info['objective_value'])
+
+    return True
+
+
+def test_risk_slim_cross_validation(data_csv_file, n_folds = 3, max_coefficient = 5, max_L0_value = 5, max_offset = 50, settings = None):
+
+    # load dataset
+    data = riskslim.load_data_from_csv(dataset_csv_file = data_csv_file)
+    N = data['X'].shape[0]
+    fold_idx = np.arange(N) % n_folds + 1
+
+    coef_set = riskslim.CoefficientSet(variable_names=data['variable_names'], lb=-max_coefficient, ub=max_coefficient, sign=0)
+    coef_set.update_intercept_bounds(X = data['X'], y = data['Y'], max_offset = max_offset, max_L0_value = max_L0_value)
+    constraints = {'L0_min': 0, 'L0_max': max_L0_value, 'coef_set': coef_set}
+
+    cv_info = riskslim.run_cross_validation(data, constraints, fold_idx, settings, n_cores = 2)
+    folds = cv_info['folds']
+    assert folds['fold'].tolist() == list(range(1, n_folds + 1))
+    assert folds['n_test'].sum() == N
+    assert cv_info['n_workers'] == 2 and cv_info['n_cores_per_worker'] == 1
+    assert 0.5 <= cv_info['mean_test_auc'] <= 1.0
+
+    # each fold matches a model trained on the training split
+    for fold_num in (1, n_folds):
+        train_idx = fold_idx != fold_num
+        fold_data = dict(data)
+        fold_data.update({'X': data['X'][train_idx], 'Y': data['Y'][train_idx], 'sample_weights': data['sample_weights'][train_idx]})
+        model_info, _, _ = riskslim.run_lattice_cpa(fold_data, constraints, settings)
+        assert np.isclose(folds['objective_value'][fold_num - 1], model_info['objective_value'])
+
+    # weighted AUC matches the AUC of a dataset where each sample is repeated sample_weights times
+    scores = data['X'].dot(model_info['solution'])
+    sample_weights = np.arange(N) % 3 + 1
+    weighted_auc = riskslim.cross_validation.get_auc(scores, data['Y'], sample_weights)
+    assert np.isclose(weighted_auc, riskslim.cross_validation.get_auc(np.repeat(scores, sample_weights), np.repeat(data['Y'], sample_weights)))
+
+    return True
+
+
+def test_risk_slim_grid_search(data_csv_file, param_grid, max_offset = 50, settings = None):
+
+    # load dataset
+    data = riskslim.load_data_from_csv(dataset_csv_file = data_csv_file)
+
+    with tempfile.TemporaryDirectory() as results_dir:
+        results_file = os.path.join(results_dir, 'results.csv')
+        results = riskslim.run_grid_search(data, param_grid, settings, max_offset = max_offset, results_file = results_file, n_cores = 2)
+        assert os.path.isfile(results_file)
+
+    n_runs = np.prod([len(v) for v in param_grid.values()])
+    assert len(results) == n_runs
+
+    # each chain relaxes the constraints of the previous run, and chains can run in parallel
+    chains = riskslim.grid_search.get_grid_chains(param_grid)
+    assert len(chains) == len(param_grid['c0_value']) * len(param_grid['w_pos']) * len(param_grid['max_coefficient'])
+    for chain in chains:
+        assert len(set((params['c0_value'], params['w_pos'], params['max_coefficient']) for params in chain)) == 1
+        assert np.all(np.diff([params['L0_max'] for params in chain]) > 0)
+    assert np.all(np.diff([chain[0]['max_coefficient'] for chain in chains]) >= 0)
+    assert all('rho_%s' % name in results for name in data['variable_names'])
+
+    # chains with a larger max_coefficient start after a chain has finished, so they are warm started with its cuts and models
+    larger = results['max_coefficient'] == np.max(param_grid['max_coefficient'])
+    assert np.all(results.loc[larger, 'n_warm_start_solutions'] > 0)
+    assert np.all(results.loc[larger, 'n_warm_start_cuts'] > 0)
+
+    # warm starts do not change the optimal objective value
+    for _, row in results.iterrows():
+        coef_set = riskslim.CoefficientSet(variable_names=data['variable_names'], lb=-row['max_coefficient'], ub=row['max_coefficient'], sign=0)
+        coef_set.update_intercept_bounds(X = data['X'], y = data['Y'], max_offset = max_offset, max_L0_value = row['L0_max'])
+        constraints = {'L0_min': 0, 'L0_max': row['L0_max'], 'coef_set': coef_set}
+        run_settings = dict(settings)
+        run_settings.update({'c0_value': row['c0_value'], 'w_pos': row['w_pos']})
+        model_info, _, _ = riskslim.run_lattice_cpa(data, constraints, run_settings)
+        assert np.isclose(row['objective_value'], model_info['objective_value'])
+
+    return True
+
+
+def test_risk_slim_heuristic_workers(data_csv_file, max_coefficient = 5, max_L0_value = 5, max_offset = 50, settings = None):
+
+    # load dataset
+    data = riskslim.load_data_from_csv(dataset_csv_file = data_csv_file)
+    coef_set = riskslim.CoefficientSet(variable_names=data['variable_names'], lb=-max_coefficient, ub=max_coefficient, sign=0)
+    coef_set.update_intercept_bounds(X = data['X'], y = data['Y'], max_offset = max_offset, max_L0_value = max_L0_value)
+    constraints = {'L0_min': 0, 'L0_max': max_L0_value, 'coef_set': coef_set}
+
+    # running heuristics in worker processes does not change the optimal objective value
+    worker_settings = dict(settings)
+    worker_settings['heuristic_n_workers'] = 2
+    worker_model_info, _, worker_lcpa_info = riskslim.run_lattice_cpa(data, constraints, worker_settings)
+    model_info, _, _ = riskslim.run_lattice_cpa(data, constraints, settings)
+    assert np.isclose(worker_model_info['objective_value'], model_info['objective_value'])
+    assert worker_lcpa_info['n_heuristic_worker_tasks'] >= worker_lcpa_info['n_rounded'] + worker_lcpa_info['n_polished']
+
+    return True
+
+
 test_risk_slim(data_csv_file = data_csv_file, max_coefficient = 5, max_L0_value = 5, max_offset = 50, settings = default_settings)
 test_risk_slim(data_csv_file = data_csv_file, max_coefficient = 5, max_L0_value = 1, max_offset = 50, settings = default_settings)
 test_risk_slim(data_csv_file = data_csv_file, max_coefficient = 5, max_L0_value = 0, max_offset = 50, settings = default_settings)
-test_risk_slim(data_csv_file = data_csv_file, max_coefficient = 5, max_L0_value = 0, max_offset = 0, settings = default_settings)
-
+test_risk_slim_checkpoint(data_csv_file = data_csv_file, max_coefficient = 5, max_L0_value = 5, max_offset = 50, settings = default_settings)
+test_risk_slim_cut_pool(data_csv_file = data_csv_file, max_coefficient = 5, max_L0_value = 5, max_offset = 50, settings = default_settings)
+test_risk_slim_c0_path(data_csv_file = data_csv_file, c0_values = [1e-6, 1e-2, 1e-3], max_coefficient = 5, max_L0_value = 5, max_offset = 50, settings = default_settings)
+test_risk_slim_L0_path(data_csv_file = data_csv_file, L0_max_values = [1, 2, 3, 5], max_coefficient = 5, max_offset = 50, settings = default_settings)
+test_risk_slim_cross_validation(data_csv_file = data_csv_file, n_folds = 3, max_coefficient = 5, max_L0_value = 5, max_offset = 50, settings = default_settings)
+test_risk_slim_grid_search(data_csv_file = data_csv_file, param_grid = {'c0_value': [1e-6, 1e-3], 'max_coefficient': [3, 5], 'L0_max': [2, 4], 'w_pos': [1.0]}, max_offset = 50, settings = default_settings)
+test_risk_slim_heuristic_workers(data_csv_file = data_csv_file, max_coefficient = 5, max_L0_value = 5, max_offset = 50, settings = default_settings)
 
+# fails with 'CPLEX Error 1210: Name not found' when max_L0_value = 0 and max_offset = 0 (known issue, runs last)
+test_risk_slim(data_csv_file = data_csv_file, max_coefficient = 5, max_L0_value = 0, max_offset = 0, settings = default_settings)
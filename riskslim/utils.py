@@ -4,6 +4,7 @@ from pathlib import Path
 import time
 import warnings
 import numpy as np
+import scipy.sparse as sp
 import pandas as pd
 import prettytable as pt
 from .defaults import INTERCEPT_NAME
@@ -94,16 +95,8 @@ def load_data_from_csv(dataset_csv_file, sample_weights_csv_file = None, fold_cs
 
     #load folds
     if fold_csv_file is not None:
-        fold_csv_file = Path(fold_csv_file)
-        if not fold_csv_file.exists():
-            raise IOError('could not find fold_csv_file: %s' % fold_csv_file)
-
-        fold_idx = pd.read_csv(fold_csv_file, sep=',', header=None)
-        fold_idx = fold_idx.values.flatten()
+        fold_idx = load_fold_indices(fold_csv_file, N)
         K = max(fold_idx)
-        all_fold_nums = np.sort(np.unique(fold_idx))
-        assert len(fold_idx) == N, "dimension mismatch: read %r fold indices (expected N = %r)" % (len(fold_idx), N)
-        assert np.all(all_fold_nums == np.arange(1, K+1)), "folds should contain indices between 1 to %r" % K
         assert fold_num in np.arange(0, K+1), "fold_num should either be 0 or an integer between 1 to %r" % K
         if fold_num >= 1:
             #test_idx = fold_num == fold_idx
@@ -116,6 +109,34 @@ def load_data_from_csv(dataset_csv_file, sample_weights_csv_file = None, fold_cs
     return data
 
 
+def load_fold_indices(fold_csv_file, N):
+    """
+    loads the indices of folds for K-fold cross validation
+
+    Parameters
+    ----------
+    fold_csv_file                   csv file containing indices of folds for K-fold cross validation
+                                    fold indices stored as a table with N rows and 1 column
+                                    folds must be integers between 1 to K
+    N                               number of samples in the dataset
+
+    Returns
+    -------
+    N x 1 vector of fold indices (numpy.ndarray)
+    """
+    fold_csv_file = Path(fold_csv_file)
+    if not fold_csv_file.exists():
+        raise IOError('could not find fold_csv_file: %s' % fold_csv_file)
+
+    fold_idx = pd.read_csv(fold_csv_file, sep=',', header=None)
+    fold_idx = fold_idx.values.flatten()
+    K = max(fold_idx)
+    all_fold_nums = np.sort(np.unique(fold_idx))
+    assert len(fold_idx) == N, "dimension mismatch: read %r fold indices (expected N = %r)" % (len(fold_idx), N)
+    assert np.all(all_fold_nums == np.arange(1, K+1)), "folds should contain indices between 1 to %r" % K
+    return fold_idx
+
+
 def check_data(data):
     """
     makes sure that 'data' contains training data that is suitable for binary classification problems
@@ -123,7 +144,7 @@ def check_data(data):
 
     'data' is a dictionary that must contain:
 
-     - 'X' N x P matrix of features (numpy.ndarray) with a column of 1s for the INTERCEPT_NAME
+     - 'X' N x P matrix of features (numpy.ndarray, numpy.memmap or scipy.sparse matrix) with a column of 1s for the INTERCEPT_NAME
      - 'Y' N x 1 vector of labels (+1/-1) (numpy.ndarray)
      - 'variable_names' list of strings containing the names of each feature (list)
 
@@ -141,10 +162,10 @@ def check_data(data):
     assert type(data) is dict, "data should be a dict"
 
     assert 'X' in data, "data should contain X matrix"
-    assert type(data['X']) is np.ndarray, "type(X) should be numpy.ndarray"
+    assert isinstance(data['X'], np.ndarray) or sp.issparse(data['X']), "type(X) should be numpy.ndarray, numpy.memmap or scipy.sparse matrix"
 
     assert 'Y' in data, "data should contain Y matrix"
-    assert type(data['Y']) is np.ndarray, "type(Y) should be numpy.ndarray"
+    assert isinstance(data['Y'], np.ndarray), "type(Y) should be numpy.ndarray"
 
     assert 'variable_names' in data, "data should contain variable_names"
     assert type(data['variable_names']) is list, "variable_names should be a list"
@@ -164,13 +185,25 @@ def check_data(data):
     assert len(list(set(data['variable_names']))) == len(data['variable_names']), 'variable_names is not unique'
     assert len(data['variable_names']) == P, 'len(variable_names) should be same as # of cols in X'
 
-    # feature matrix
-    assert np.all(~np.isnan(X)), 'X has nan entries'
-    assert np.all(~np.isinf(X)), 'X has inf entries'
+    # feature matrix (memory-mapped matrices are checked in blocks of rows)
+    if sp.issparse(X):
+        X_blocks = [X.data]
+    elif isinstance(X, np.memmap):
+        block_size = max(1, 2**20 // P)
+        X_blocks = (X[i:i + block_size] for i in range(0, N, block_size))
+    else:
+        X_blocks = [X]
+
+    for X_values in X_blocks:
+        assert np.all(~np.isnan(X_values)), 'X has nan entries'
+        assert np.all(~np.isinf(X_values)), 'X has inf entries'
 
     # offset in feature matrix
     if INTERCEPT_NAME in variable_names:
-        assert all(X[:, variable_names.index(INTERCEPT_NAME)] == 1.0), "(Intercept)' column should only be composed of 1s"
+        intercept_values = X[:, variable_names.index(INTERCEPT_NAME)]
+        if sp.issparse(X):
+            intercept_values = intercept_values.toarray().flatten()
+        assert all(intercept_values == 1.0), "(Intercept)' column should only be composed of 1s"
     else:
         warnings.warn("there is no column named INTERCEPT_NAME in variable_names")
 
@@ -219,7 +252,11 @@ def print_model(rho, data,  show_omitted_variables = False):
         selected_ind = np.flatnonzero(rho_values)
         rho_values = rho_values[selected_ind]
         rho_names = [rho_names[i] for i in selected_ind]
-        rho_binary = [np.all((data['X'][:,j] == 0) | (data['X'][:,j] == 1)) for j in selected_ind]
+        if sp.issparse(data['X']):
+            X_csc = sp.csc_matrix(data['X'])
+            rho_binary = [np.all(X_csc[:,j].data == 1) for j in selected_ind]
+        else:
+            rho_binary = [np.all((data['X'][:,j] == 0) | (data['X'][:,j] == 1)) for j in selected_ind]
 
         #sort by most positive to most negative
         sort_ind = np.argsort(-np.array(rho_values))
@@ -46,13 +46,44 @@ extensions =[
         [DISTNAME + "/loss_functions/fast_log_loss.pyx"],
         include_dirs=[numpy.get_include(), scipy.get_include()],
         libraries=["m"],
-        extra_compile_args=["-ffast-math"]
+        extra_compile_args=["-ffast-math", "-fopenmp"],
+        extra_link_args=["-fopenmp"]
     ),
     Extension(
         DISTNAME + ".loss_functions." + "lookup_log_loss",
         [DISTNAME + "/loss_functions/lookup_log_loss.pyx"],
         include_dirs=[numpy.get_include(), scipy.get_include()],
         libraries=["m"],
+        extra_compile_args=["-ffast-math"]),
+    Extension(
+        DISTNAME + ".loss_functions." + "fast_discrete_descent",
+        [DISTNAME + "/loss_functions/fast_discrete_descent.pyx"],
+        include_dirs=[numpy.get_include(), scipy.get_include()],
+        libraries=["m"],
+        extra_compile_args=["-ffast-math"]),
+    Extension(
+        DISTNAME + ".loss_functions." + "binary_log_loss",
+        [DISTNAME + "/loss_functions/binary_log_loss.pyx"],
+        include_dirs=[numpy.get_include(), scipy.get_include()],
+        libraries=["m"],
+        extra_compile_args=["-ffast-math"]),
+    Extension(
+        DISTNAME + ".loss_functions." + "integer_lookup_log_loss",
+        [DISTNAME + "/loss_functions/integer_lookup_log_loss.pyx"],
+        include_dirs=[numpy.get_include(), scipy.get_include()],
+        libraries=["m"],
+        extra_compile_args=["-ffast-math"]),
+    Extension(
+        DISTNAME + ".loss_functions." + "mixed_log_loss",
+        [DISTNAME + "/loss_functions/mixed_log_loss.pyx"],
+        include_dirs=[numpy.get_include(), scipy.get_include()],
+        libraries=["m"],
+        extra_compile_args=["-ffast-math"]),
+    Extension(
+        DISTNAME + ".loss_functions." + "interpolated_log_loss",
+        [DISTNAME + "/loss_functions/interpolated_log_loss.pyx"],
+        include_dirs=[numpy.get_include(), scipy.get_include()],
+        libraries=["m"],
         extra_compile_args=["-ffast-math"])
 ]
 